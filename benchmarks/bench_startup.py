@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+statements = {
+    "config": "import covid19.config",
+    "updater": "import covid19.updater",
+    "package": "import covid19",
+    "shorthands": "from covid19 import config; config.shorthands['Italy']",
+    "plotting": "import covid19.monitor, covid19.drawers, covid19.renderer",
+}
+
+# modules which do not draw anything, and must not import matplotlib
+data_modules = [
+    "covid19",
+    "covid19.updater",
+    "covid19.patcher",
+    "covid19.monitor",
+    "covid19.drawers",
+    "covid19.plot_utils",
+    "covid19.renderer",
+    "covid19.specs",
+]
+
+
+def time_import(statement, repeat):
+    """ Wall time of a fresh interpreter running `statement`, minus the bare startup. """
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=root_dir, check=True)
+        timings.append(time.perf_counter() - start)
+
+    return sorted(timings)[len(timings) // 2]
+
+
+def get_import_times(statement):
+    """
+    Self and cumulative times (in seconds) spent importing each module while
+    running `statement`, as reported by -X importtime.
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=root_dir,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    times = {}
+    for line in out.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[0].split()[-1].isdigit():
+            times[fields[2]] = (
+                int(fields[0].split()[-1]) * 1e-6,
+                int(fields[1]) * 1e-6,
+            )
+
+    return times
+
+
+def get_self_import_time(module):
+    """ Time spent importing `module` itself, as reported by -X importtime. """
+    times = get_import_times(f"import {module}")
+    return times[module][0] if module in times else float("nan")
+
+
+def check_data_imports(max_time):
+    """
+    Check that importing the data modules does not import matplotlib, and that
+    their cumulative import time does not exceed `max_time` seconds.
+    Return the list of failures.
+    """
+    times = get_import_times("import " + ", ".join(data_modules))
+    failures = []
+
+    plotting = [module for module in times if module.split(".")[0] == "matplotlib"]
+    if plotting:
+        failures.append(f"matplotlib imported at startup ({len(plotting)} modules)")
+
+    elapsed = sum(times[module][1] for module in times if "." not in module)
+    print(f"{'data only':>12s}: {1e3 * elapsed:8.2f} ms (-X importtime)")
+    if max_time is not None and elapsed > max_time:
+        failures.append(
+            f"data-only import took {1e3 * elapsed:.2f} ms > {1e3 * max_time:.2f} ms"
+        )
+
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the time taken to import the covid19 package."
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=11, help="Number of runs. Defaults to 11."
+    )
+    parser.add_argument(
+        "-c",
+        "--check",
+        action="store_true",
+        help="Only check the data-only startup, and exit with an error on failure.",
+    )
+    parser.add_argument(
+        "-m",
+        "--max-time",
+        type=float,
+        default=None,
+        help="Maximum data-only import time in ms, checked with --check.",
+    )
+    args = parser.parse_args()
+
+    if args.check:
+        max_time = None if args.max_time is None else 1e-3 * args.max_time
+        failures = check_data_imports(max_time)
+        for failure in failures:
+            print(f"FAILED: {failure}")
+        sys.exit(1 if failures else 0)
+
+    baseline = time_import("pass", args.repeat)
+    print(f"{'interpreter':>12s}: {1e3 * baseline:8.2f} ms")
+
+    for name, statement in statements.items():
+        elapsed = time_import(statement, args.repeat) - baseline
+        print(f"{name:>12s}: {1e3 * elapsed:8.2f} ms")
+
+    print(
+        f"{'config self':>12s}: {1e3 * get_self_import_time('covid19.config'):8.2f} ms"
+    )
@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+import argparse
+import contextlib
+import datetime
+import functools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# render off-screen, and use the package from this checkout
+os.environ.setdefault("MPLBACKEND", "Agg")
+root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, root_dir)
+
+from covid19 import config, synthetic  # noqa: E402
+from covid19.drawers import LineCollectionDrawer, TimeSeriesDrawer  # noqa: E402
+from covid19.loader import Loader  # noqa: E402
+from covid19.monitor import Monitor  # noqa: E402
+from covid19.patcher import Patcher  # noqa: E402
+from covid19.patchers.italy import PatcherItaly  # noqa: E402
+from covid19.patchers.world import PatcherWorld  # noqa: E402
+from covid19.updaters.utils import update_repo  # noqa: E402
+from covid19.utils import LazyModule  # noqa: E402
+
+
+plt = LazyModule("matplotlib.pyplot")
+
+# the benchmarks, each taking the datasets of a given size
+benchmarks = {}
+
+
+def benchmark(name):
+    def wrapper(fct):
+        benchmarks[name] = fct
+        return fct
+    return wrapper
+
+
+def measure(fct, repeat, setup=None):
+    """ Best wall time of `fct` over `repeat` runs, each preceded by `setup`. """
+    timings = []
+
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fct()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def make_datasets(work_dir, days):
+    """
+    Write the synthetic datasets with `days` days into `work_dir`. The Italian
+    data are cloned from a local remote, which has one more commit than the
+    clone is reset to before each pull. The global data are patched, except
+    for a pristine copy on which the patches are benchmarked. The headers of
+    the Italian data are harmonized on a copy whose history mostly has the
+    historical headers, e.g. "totale_attualmente_positivi".
+    """
+    datasets = {
+        "italy": os.path.join(work_dir, "italy"),
+        "italy_upstream": os.path.join(work_dir, "italy_upstream"),
+        "italy_remote": os.path.join(work_dir, "italy.git"),
+        "world_pristine": os.path.join(work_dir, "world_pristine"),
+        "world": os.path.join(work_dir, "world"),
+        "world_patched": os.path.join(work_dir, "world_patched"),
+        "italy_headers_pristine": os.path.join(work_dir, "italy_headers_pristine"),
+        "italy_headers": os.path.join(work_dir, "italy_headers"),
+        "figures": os.path.join(work_dir, "figures"),
+    }
+
+    synthetic.generate(
+        "italy",
+        datasets["italy_upstream"],
+        days=days - 1,
+        remote_dir=datasets["italy_remote"],
+    )
+    synthetic.write_dpc(datasets["italy_upstream"], days=days, first_day=days - 1)
+    synthetic.commit_repo(datasets["italy_upstream"], "Add the last day")
+    synthetic.clone_repo(datasets["italy_remote"], datasets["italy"])
+
+    synthetic.generate("world", datasets["world_pristine"], days=days, countries=50)
+    shutil.copytree(datasets["world_pristine"], datasets["world"])
+    shutil.copytree(datasets["world_pristine"], datasets["world_patched"])
+    config.repo_world_dir = datasets["world_patched"]
+    Patcher.factory("world", update_data=False).run()
+
+    synthetic.write_dpc(
+        datasets["italy_headers_pristine"],
+        days=days,
+        schemas=("2020-02", "2020-03", "2020-04"),
+    )
+
+    os.makedirs(datasets["figures"], exist_ok=True)
+
+    return datasets
+
+
+def reset_world(datasets):
+    shutil.rmtree(datasets["world"])
+    shutil.copytree(datasets["world_pristine"], datasets["world"])
+
+
+def reset_italy_headers(datasets):
+    shutil.rmtree(datasets["italy_headers"], ignore_errors=True)
+    shutil.copytree(datasets["italy_headers_pristine"], datasets["italy_headers"])
+
+
+def get_loader(name):
+    loader = Loader.factory(name, False, False)
+    loader.unmount()
+    return loader
+
+
+def mount_italy(loader):
+    loader.mount_country()
+    loader.mount_regions()
+    loader.mount_provinces()
+
+
+def time_cold_mount(name, mount, repo_dir):
+    """ Time the first mount in a fresh interpreter, i.e. without warm caches. """
+    statement = (
+        "import time\n"
+        "from covid19 import config\n"
+        f"config.repo_{name}_dir = {repo_dir!r}\n"
+        "from covid19.loader import Loader\n"
+        f"loader = Loader.factory({name!r}, False, False)\n"
+        "start = time.perf_counter()\n"
+        f"{mount}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", statement],
+        cwd=root_dir,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    return float(out.stdout.split()[-1])
+
+
+@benchmark("mount_italy_cold")
+def bench_mount_italy_cold(datasets, repeat):
+    mount = "loader.mount_country(); loader.mount_regions(); loader.mount_provinces()"
+    return min(
+        time_cold_mount("italy", mount, datasets["italy"]) for _ in range(repeat)
+    )
+
+
+@benchmark("mount_italy_warm")
+def bench_mount_italy_warm(datasets, repeat):
+    loader = get_loader("italy")
+    return measure(functools.partial(mount_italy, loader), repeat, loader.unmount)
+
+
+@benchmark("mount_world_cold")
+def bench_mount_world_cold(datasets, repeat):
+    return min(
+        time_cold_mount("world", "loader.mount()", datasets["world_patched"])
+        for _ in range(repeat)
+    )
+
+
+@benchmark("mount_world_warm")
+def bench_mount_world_warm(datasets, repeat):
+    loader = get_loader("world")
+    return measure(loader.mount, repeat, loader.unmount)
+
+
+@benchmark("query_italy_country")
+def bench_query_italy_country(datasets, repeat):
+    loader = get_loader("italy")
+    loader.mount_country()
+    return measure(lambda: loader.run("incremento_totale_casi"), repeat)
+
+
+@benchmark("query_italy_region")
+def bench_query_italy_region(datasets, repeat):
+    loader = get_loader("italy")
+    loader.mount_regions()
+    return measure(lambda: loader.run("totale_casi", region="Lombardia"), repeat)
+
+
+@benchmark("query_italy_regions_single")
+def bench_query_italy_regions_single(datasets, repeat):
+    loader = get_loader("italy")
+    loader.mount_regions()
+    regions = synthetic.dpc_regions
+
+    def query():
+        for region in regions:
+            loader.run("totale_casi", region=region)
+
+    return measure(query, repeat)
+
+
+@benchmark("query_italy_regions_batch")
+def bench_query_italy_regions_batch(datasets, repeat):
+    loader = get_loader("italy")
+    loader.mount_regions()
+    regions = synthetic.dpc_regions
+    return measure(lambda: loader.run("totale_casi", region=regions), repeat)
+
+
+@benchmark("query_italy_provinces_batch")
+def bench_query_italy_provinces_batch(datasets, repeat):
+    loader = get_loader("italy")
+    provinces = loader.get_province_names()
+    return measure(
+        lambda: loader.run("incremento_totale_casi", province=provinces), repeat
+    )
+
+
+@benchmark("query_world_country")
+def bench_query_world_country(datasets, repeat):
+    loader = get_loader("world")
+    loader.mount()
+    return measure(lambda: loader.run("Confirmed", country="China"), repeat)
+
+
+@benchmark("query_world_countries_batch")
+def bench_query_world_countries_batch(datasets, repeat):
+    loader = get_loader("world")
+    countries = loader.get_country_names()
+    return measure(lambda: loader.run("Confirmed", country=countries), repeat)
+
+
+def bench_patch_world(patch, datasets, repeat):
+    config.repo_world_dir = datasets["world"]
+    try:
+        return measure(
+            getattr(PatcherWorld, patch),
+            repeat,
+            functools.partial(reset_world, datasets),
+        )
+    finally:
+        config.repo_world_dir = datasets["world_patched"]
+
+
+for patch in ("replace_mainland_china", "fill_header", "fill_data", "check_date"):
+    benchmark(f"patch_world_{patch}")(functools.partial(bench_patch_world, patch))
+
+
+@benchmark("patch_italy_harmonize_headers")
+def bench_patch_italy_harmonize_headers(datasets, repeat):
+    config.repo_italy_dir = datasets["italy_headers"]
+    try:
+        return measure(
+            PatcherItaly.harmonize_headers,
+            repeat,
+            functools.partial(reset_italy_headers, datasets),
+        )
+    finally:
+        config.repo_italy_dir = datasets["italy"]
+
+
+@benchmark("update_repo_noop")
+def bench_update_repo_noop(datasets, repeat):
+    return measure(
+        lambda: update_repo(datasets["italy"], "master", datasets["italy"] + ".log"),
+        repeat,
+    )
+
+
+@benchmark("update_repo_pull")
+def bench_update_repo_pull(datasets, repeat):
+    return measure(
+        lambda: update_repo(datasets["italy"], "master", datasets["italy"] + ".log"),
+        repeat,
+        lambda: synthetic.git(datasets["italy"], "reset", "-q", "--hard", "HEAD~1"),
+    )
+
+
+def render(monitor, save_dest):
+    monitor.run(save_dest=save_dest, show=False, profile="web")
+    plt.close("all")
+
+
+@benchmark("render_timeseries")
+def bench_render_timeseries(datasets, repeat):
+    loader = get_loader("italy")
+    regions = synthetic.dpc_regions[:3]
+    monitor = Monitor(
+        [functools.partial(loader.run, "totale_casi", region=name) for name in regions],
+        [TimeSeriesDrawer({"legend_label": name}) for name in regions],
+        axes_properties={"title_center": "totale_casi", "legend_on": True},
+    )
+    save_dest = os.path.join(datasets["figures"], "timeseries")
+    return measure(lambda: render(monitor, save_dest), repeat)
+
+
+@benchmark("render_linecollection")
+def bench_render_linecollection(datasets, repeat):
+    loader = get_loader("italy")
+    provinces = loader.get_province_names()
+    monitor = Monitor(
+        [functools.partial(loader.run, "totale_casi", province=provinces)],
+        [LineCollectionDrawer({"labels": provinces})],
+        axes_properties={"title_center": "totale_casi", "y_scale": "log"},
+    )
+    save_dest = os.path.join(datasets["figures"], "linecollection")
+    return measure(lambda: render(monitor, save_dest), repeat)
+
+
+def run(sizes, repeat, work_dir, selected=None):
+    """
+    Run the benchmarks whose name contains any of `selected` on synthetic data
+    with increasing numbers of days `sizes`. Return the timings in seconds,
+    keyed by "<benchmark>[days=<size>]".
+    """
+    results = {}
+
+    for days in sizes:
+        print(f"Write {days} days of synthetic data ...")
+        size_dir = os.path.join(work_dir, f"days_{days}")
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            datasets = make_datasets(size_dir, days)
+
+        config.repo_italy_dir = datasets["italy"]
+
+        for name, fct in benchmarks.items():
+            if selected and not any(pattern in name for pattern in selected):
+                continue
+
+            key = f"{name}[days={days}]"
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                results[key] = fct(datasets, repeat)
+            print(f"{key:>44s}: {1e3 * results[key]:10.2f} ms")
+
+        Loader.factory("italy", False, False).unmount()
+        Loader.factory("world", False, False).unmount()
+        shutil.rmtree(size_dir)
+
+    return results
+
+
+def compare(results, baseline, threshold, min_delta=1e-3):
+    """
+    Compare the timings with the `baseline`. A benchmark regresses if it is
+    slower by more than the fraction `threshold` and by more than `min_delta`
+    seconds, so that noise on very fast benchmarks does not fail the run.
+    Return the list of regressions.
+    """
+    regressions = []
+
+    for key, elapsed in results.items():
+        if key not in baseline:
+            continue
+
+        reference = baseline[key]
+        ratio = elapsed / reference if reference > 0 else float("inf")
+        status = ""
+        if elapsed > reference * (1.0 + threshold) and elapsed - reference > min_delta:
+            status = "REGRESSION"
+            regressions.append(key)
+
+        print(
+            f"{key:>44s}: {1e3 * reference:10.2f} ms -> {1e3 * elapsed:10.2f} ms "
+            f"({ratio:5.2f}x) {status}"
+        )
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark mounting, querying, patching, updating and rendering "
+        "on synthetic datasets of increasing size."
+    )
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[30, 90, 180],
+        help="Numbers of days of the synthetic datasets. Defaults to 30 90 180.",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="Number of runs. Defaults to 3."
+    )
+    parser.add_argument(
+        "-k",
+        "--select",
+        nargs="+",
+        default=None,
+        help="Only run the benchmarks whose name contains any of these strings. "
+        "Available benchmarks: {}.".format(", ".join(benchmarks)),
+    )
+    parser.add_argument(
+        "-o", "--output", default=None, help="JSON file to save the results to."
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        default=None,
+        help="JSON file with the results of a previous run to compare against.",
+    )
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown with respect to the baseline that fails the run. "
+        "Defaults to 0.2, i.e. 20%%.",
+    )
+    parser.add_argument(
+        "-w",
+        "--work-dir",
+        default=None,
+        help="Directory for the synthetic data. Defaults to a temporary directory.",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = run(args.sizes, args.repeat, args.work_dir or tmp_dir, args.select)
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "repeat": args.repeat,
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+        print(f"Results saved to {args.output}.")
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)["results"]
+
+        threshold = 100 * args.threshold
+        print(f"Compare with {args.baseline} (threshold {threshold:.0f}%) ...")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed.")
+            sys.exit(1)
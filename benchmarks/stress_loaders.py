@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+import argparse
+import collections
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, root_dir)
+
+from covid19 import config, synthetic, timing  # noqa: E402
+from covid19.loader import Loader  # noqa: E402
+from covid19.patcher import Patcher  # noqa: E402
+from covid19.loaders import LoaderItaly, LoaderWorld  # noqa: E402
+
+
+def make_datasets(work_dir, days):
+    """
+    Write the synthetic Italian and (patched) global data, and return the queries
+    run on them.
+    """
+    config.repo_italy_dir = os.path.join(work_dir, "italy")
+    config.repo_world_dir = os.path.join(work_dir, "world")
+    synthetic.generate("italy", config.repo_italy_dir, days=days)
+    synthetic.generate("world", config.repo_world_dir, days=days, countries=50)
+    Patcher.factory("world", update_data=False).run()
+
+    # read the province names without the loaders, which must not mount anything yet
+    dir = os.path.join(config.repo_italy_dir, "dati-province")
+    df = pd.read_csv(os.path.join(dir, sorted(os.listdir(dir))[0]))
+    provinces = list(df["denominazione_provincia"].drop_duplicates(keep=False))
+
+    return [
+        ("italy", "totale_casi", {}),
+        ("italy", "incremento_totale_casi", {"region": "Lazio"}),
+        ("italy", "terapia_intensiva", {"region": ["Lazio", "Veneto", "Sicilia"]}),
+        ("italy", "totale_casi", {"province": provinces[0]}),
+        ("italy", "incremento_totale_casi", {"province": provinces[:10]}),
+        ("world", "Confirmed", {"country": "China"}),
+        ("world", "increase_Deaths", {"country": ["China", "Germany", "France"]}),
+    ]
+
+
+def is_same(out, reference):
+    return out[0] == reference[0] and np.array_equal(
+        np.asarray(out[1], dtype=float),
+        np.asarray(reference[1], dtype=float),
+        equal_nan=True,
+    )
+
+
+def hammer(queries, threads, count, seed):
+    """
+    Start `threads` threads at once, each instantiating the loaders and running
+    `count` random `queries`. Return the number of mounts of each dataset, the
+    number of distinct loader instances seen, the results of each query and
+    the errors.
+    """
+    LoaderItaly.instance = None
+    LoaderWorld.instance = None
+
+    mounts = collections.Counter()
+    instances = set()
+    results = collections.defaultdict(list)
+    errors = []
+    lock = threading.Lock()
+
+    def count_mounts(record):
+        if ".mount" in record["stage"]:
+            with lock:
+                mounts[record["stage"]] += 1
+
+    names = ("italy", "world")
+    barrier = threading.Barrier(threads)
+
+    def work(index):
+        rng = random.Random(seed + index)
+        try:
+            barrier.wait()
+            loaders = {name: Loader.factory(name, False, False) for name in names}
+            with lock:
+                instances.update(id(loader) for loader in loaders.values())
+
+            for _ in range(count):
+                i = rng.randrange(len(queries))
+                name, field, kwargs = queries[i]
+                out = loaders[name].run(field, **kwargs)
+                with lock:
+                    results[i].append(out)
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+
+    timing.listeners.append(count_mounts)
+    timing.enable(summary=False)
+    try:
+        workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        timing.listeners.remove(count_mounts)
+        timing.disable()
+
+    return mounts, len(instances), results, errors
+
+
+def check(queries, mounts, instances, results, errors, budget):
+    """ Return the list of failures, comparing the results with a serial run. """
+    failures = list(errors)
+
+    if instances != 2:
+        failures.append(f"{instances} loader instances instead of 2")
+
+    # without a budget nothing is evicted, hence each dataset is mounted once
+    if budget is None:
+        failures += [
+            f"{stage} mounted {n} times" for stage, n in mounts.items() if n != 1
+        ]
+
+    for loader in (LoaderItaly.instance, LoaderWorld.instance):
+        loader.unmount()
+
+    for i, outs in results.items():
+        name, field, kwargs = queries[i]
+        reference = Loader.factory(name, False, False).run(field, **kwargs)
+        if not all(is_same(out, reference) for out in outs):
+            failures.append(f"inconsistent results for {name} {field} {kwargs}")
+
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Query the loaders from many threads at once on synthetic data, "
+        "and check that the singletons are created once, that each dataset is "
+        "mounted once and that the results match a serial run."
+    )
+    parser.add_argument(
+        "-t",
+        "--threads",
+        type=int,
+        default=16,
+        help="Number of threads. Defaults to 16.",
+    )
+    parser.add_argument(
+        "-n",
+        "--queries",
+        type=int,
+        default=10,
+        help="Number of queries per thread. Defaults to 10.",
+    )
+    parser.add_argument(
+        "-d", "--days", type=int, default=60, help="Number of days. Defaults to 60."
+    )
+    parser.add_argument(
+        "-r",
+        "--rounds",
+        type=int,
+        default=3,
+        help="Number of rounds, each with fresh singletons. Defaults to 3.",
+    )
+    parser.add_argument(
+        "-m",
+        "--memory-budget",
+        type=float,
+        default=None,
+        help="Memory budget of the mounted datasets in MB, to stress the eviction "
+        "as well; the datasets may then be mounted several times.",
+    )
+    parser.add_argument(
+        "-s",
+        "--spill",
+        action="store_true",
+        help="With a memory budget, spill the evicted datasets to disk.",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed. Defaults to 0."
+    )
+    args = parser.parse_args()
+
+    budget = None
+    if args.memory_budget is not None:
+        budget = int(args.memory_budget * 2**20)
+
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config.memory_budget = budget
+        config.spill_dir = os.path.join(tmp_dir, "spill") if args.spill else None
+
+        print(f"Write {args.days} days of synthetic data ...")
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            queries = make_datasets(tmp_dir, args.days)
+
+        for round_index in range(args.rounds):
+            start = time.perf_counter()
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                seed = args.seed + round_index * args.threads
+                mounts, instances, results, errors = hammer(
+                    queries, args.threads, args.queries, seed
+                )
+                failures = check(queries, mounts, instances, results, errors, budget)
+            elapsed = time.perf_counter() - start
+
+            total = sum(len(outs) for outs in results.values())
+            counts = ", ".join(f"{stage} x{n}" for stage, n in sorted(mounts.items()))
+            print(
+                f"Round {round_index + 1}: {total} queries from {args.threads} "
+                f"threads in {elapsed:.2f} s; mounts: {counts}"
+            )
+            for failure in failures:
+                print(f"    FAILED: {failure}")
+            failed = failed or len(failures) > 0
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import functools
+import hashlib
+import json
+import os
+
+from covid19 import metrics, plot_utils
+from covid19.loader import Loader
+
+
+def get_loader(loader_fct):
+    fct = loader_fct.func if isinstance(loader_fct, functools.partial) else loader_fct
+    loader = getattr(fct, "__self__", None)
+    return loader if isinstance(loader, Loader) else None
+
+
+def describe_loader_function(loader_fct):
+    if isinstance(loader_fct, functools.partial):
+        return [
+            describe_loader_function(loader_fct.func),
+            list(loader_fct.args),
+            loader_fct.keywords,
+        ]
+
+    module = getattr(loader_fct, "__module__", "")
+    name = getattr(loader_fct, "__qualname__", type(loader_fct).__qualname__)
+    loader = get_loader(loader_fct)
+
+    return f"{module}.{name}" + ("" if loader is None else f"[{loader.name}]")
+
+
+def encode(obj):
+    # numpy arrays and scalars
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    # e.g. the coordinates of a scatter plot, fetched at drawing time
+    if callable(obj):
+        return describe_loader_function(obj)
+    return repr(obj)
+
+
+def get_render_key(render_spec, loader_fcts, profile):
+    """
+    Compute the key identifying a rendered figure, i.e. a hash of the figure
+    description `render_spec`, the requests issued by the loader functions,
+    the output profile and the version of the data.
+
+    Return `None` if some loader functions are not bound to a
+    :class:`covid19.loader.Loader`, as the version of their data is unknown.
+    """
+    loaders = [get_loader(loader_fct) for loader_fct in loader_fcts]
+    if any(loader is None for loader in loaders):
+        return None
+
+    versions = {}
+    for loader in loaders:
+        if loader.name not in versions:
+            versions[loader.name] = loader.get_data_version()
+
+    spec = {
+        "figure": render_spec,
+        "loader_functions": [
+            describe_loader_function(loader_fct) for loader_fct in loader_fcts
+        ],
+        "profile": plot_utils.get_output_profile(profile),
+        "data": versions,
+    }
+    content = json.dumps(spec, sort_keys=True, default=encode)
+
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def get_key_filename(save_dest, profile):
+    save_path, _ = plot_utils.get_save_path(save_dest, profile)
+    return save_path + ".key"
+
+
+def is_cached(save_dest, profile, key):
+    """ Check whether the output file exists and was rendered with the given key. """
+    if key is None:
+        return False
+
+    save_path, _ = plot_utils.get_save_path(save_dest, profile)
+    key_filename = get_key_filename(save_dest, profile)
+
+    cached = False
+    if os.path.isfile(save_path) and os.path.isfile(key_filename):
+        with open(key_filename, "r") as file:
+            cached = file.read().strip() == key
+
+    metrics.add(
+        "covid19_render_cache_hits" if cached else "covid19_render_cache_misses", 1
+    )
+
+    return cached
+
+
+def store_key(save_dest, profile, key):
+    """ Store the key next to the output file, or drop a stale one. """
+    key_filename = get_key_filename(save_dest, profile)
+
+    if key is None:
+        if os.path.isfile(key_filename):
+            os.remove(key_filename)
+    else:
+        with open(key_filename, "w") as file:
+            file.write(key + "\n")
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from collections.abc import Mapping
 import csv
 import os
 
@@ -21,7 +22,18 @@ repo_world_remote = "https://github.com/CSSEGISandData/COVID-19.git"
 repo_world_branch = "master"
 repo_world_logfile = os.path.join(data_dir, "world.log")
 
-shorthands = {
+# print the memory footprint of each dataset after mounting it
+log_memory_usage = False
+
+# the memory budget in bytes of the mounted datasets, beyond which the least
+# recently used are evicted (see covid19.loader.DatasetManager); None for no limit
+memory_budget = None
+
+# the directory to spill the evicted datasets to; if None, they are unloaded and
+# mounted again from the CSV files
+spill_dir = None
+
+static_shorthands = {
     "Italy": "ITA",
     # regions
     "Abruzzo": "ABR",
@@ -46,13 +58,86 @@ shorthands = {
     "Valle d'Aosta": "VDA",
     "Veneto": "VEN",
 }
-try:
-    # provinces
-    filename = os.path.join(data_dir, "italy/dati-province/dpc-covid19-ita-province-20200224.csv")
-    with open(filename, "r") as csvfile:
-        csvdata = csv.reader(csvfile, delimiter=",")
-        for row in csvdata:
-            if csvdata.line_num > 1:
-                shorthands[row[5]] = row[6]
-except FileNotFoundError:
-    pass
+
+
+class Shorthands(Mapping):
+    """
+    The shorthands of Italy, its regions and its provinces. The provinces are
+    looked up on the first access to a key other than Italy and its regions,
+    from the province data mounted by :class:`covid19.loaders.LoaderItaly`
+    if available, from the CSV files otherwise.
+    """
+
+    def __init__(self, static):
+        self.static = static
+        self.data = None
+        self.failed = False
+
+    def load(self):
+        data = self.data
+        if data is None:
+            # the provinces were not available at the last attempt, e.g. before
+            # the data are first downloaded: wait for the loader to mount them
+            if self.failed:
+                return self.static
+
+            provinces = get_province_shorthands()
+            if len(provinces) == 0:
+                self.failed = True
+                return self.static
+
+            data = dict(self.static)
+            data.update(provinces)
+            self.data = data
+        return data
+
+    def reset(self):
+        """ Look the provinces up again on next access, e.g. once mounted. """
+        self.data = None
+        self.failed = False
+
+    def __getitem__(self, key):
+        if key in self.static:
+            return self.static[key]
+        return self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+
+def get_province_shorthands():
+    from covid19.loaders.italy import LoaderItaly
+
+    # a single reference to the mounted data, which may be evicted at any time
+    dfs = getattr(LoaderItaly.instance, "data_provinces", None)
+    if dfs is not None:
+        df = dfs[0]
+        return {
+            name: abbreviation
+            for name, abbreviation in zip(
+                df["denominazione_provincia"], df["sigla_provincia"]
+            )
+            if isinstance(abbreviation, str)
+        }
+
+    out = {}
+    filename = os.path.join(
+        repo_italy_dir, "dati-province", "dpc-covid19-ita-province-20200224.csv"
+    )
+    try:
+        with open(filename, "r") as csvfile:
+            csvdata = csv.reader(csvfile, delimiter=",")
+            for row in csvdata:
+                # as above, leave out the placeholders without abbreviation
+                if csvdata.line_num > 1 and row[6] != "":
+                    out[row[5]] = row[6]
+    except FileNotFoundError:
+        print(f"Could not read the province shorthands from {filename}.")
+
+    return out
+
+
+shorthands = Shorthands(static_shorthands)
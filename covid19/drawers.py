@@ -1,18 +1,434 @@
 # -*- coding: utf-8 -*-
-import matplotlib.pyplot as plt
+import numpy as np
 
-from covid19 import plot_utils
+from covid19 import plot_utils, timing
 from covid19.loaders import LoaderItaly
+from covid19.utils import LazyModule
+
+
+# matplotlib is imported on first use
+collections = LazyModule("matplotlib.collections")
+colors = LazyModule("matplotlib.colors")
+plt = LazyModule("matplotlib.pyplot")
 
 
 class TimeSeriesDrawer:
     def __init__(self, properties):
         self.properties = properties
+        self.lines = []
 
+    @timing.timed()
     def draw(self, time, data, ax):
-        plot_utils.make_lineplot(x=time, y=data, ax=ax, **self.properties)
+        self.lines = plot_utils.make_lineplot(x=time, y=data, ax=ax, **self.properties)
         return ax
 
+    def update(self, time, data):
+        downsample = self.properties.get("downsample", None)
+        series = (time, data, downsample)
+        if downsample is not None and len(self.lines) > 0:
+            time, data = plot_utils.downsample_series(
+                time,
+                data,
+                self.lines[0].axes,
+                downsample,
+                self.properties.get("downsample_points", None),
+            )
+
+        # register the new categories, if any
+        for line in self.lines:
+            line.axes.xaxis.update_units(time)
+            line.set_data(time, data)
+
+            # keep the full series to downsample, see plot_utils.save_figure
+            if line in plot_utils.downsampled_series:
+                plot_utils.downsampled_series[line] = series
+        return self.lines
+
+    def draw_frame(self, time, data, index):
+        for line in self.lines:
+            line.set_data(time[: index + 1], data[: index + 1])
+        return self.lines
+
+
+class LineCollectionDrawer:
+    """
+    Draw many time series at once as a single
+    :class:`matplotlib.collections.LineCollection`.
+
+    The drawer expects a 2-D array with one row per series and one column per
+    day. The available properties are:
+
+        * "linestyle", "linewidth", "alpha": the style of the lines;
+        * "linecolor": the color shared by all lines; defaults to "gray";
+        * "linecolors": a sequence with the color of each line; it overrides
+            "linecolor";
+        * "cmap": the name of a colormap from which the line colors are sampled;
+            it overrides "linecolor" and "linecolors";
+        * "legend_label": the legend label for the whole collection;
+        * "labels": the name of each series;
+        * "highlight": the series, either as indices or labels, drawn on top
+            of the collection as ordinary lines labelled with their name;
+        * "highlight_properties": the keyword arguments for
+            :func:`covid19.plot_utils.make_lineplot` used for highlighted series;
+        * "rasterized": `True` to rasterize the collection in vector outputs.
+    """
+
+    def __init__(self, properties):
+        self.properties = properties
+        self.collection = None
+        self.lines = []
+
+    def get_colors(self, n):
+        cmap = self.properties.get("cmap", None)
+        if cmap is not None:
+            return plt.get_cmap(cmap)(np.linspace(0.0, 1.0, n))
+
+        linecolors = self.properties.get("linecolors", None)
+        if linecolors is not None:
+            return list(linecolors)
+
+        return self.properties.get("linecolor", "gray")
+
+    def get_highlight_indices(self):
+        labels = list(self.properties.get("labels", []))
+        indices = []
+
+        for item in self.properties.get("highlight", []):
+            if isinstance(item, str):
+                if item not in labels:
+                    raise RuntimeError(f"Unknown series '{item}'.")
+                indices.append(labels.index(item))
+            else:
+                indices.append(item)
+
+        return indices
+
+    @staticmethod
+    def get_segments(time, data, ax):
+        data = np.asarray(data, dtype=float)
+        if data.ndim == 1:
+            data = data[np.newaxis, :]
+
+        # register the categories and map the time labels onto the x-axis
+        ax.xaxis.update_units(time)
+        x = np.asarray(ax.xaxis.convert_units(time), dtype=float)
+
+        segments = np.empty(data.shape + (2,))
+        segments[..., 0] = x
+        segments[..., 1] = data
+
+        return data, segments
+
+    @timing.timed()
+    def draw(self, time, data, ax):
+        data, segments = self.get_segments(time, data, ax)
+
+        linestyle = self.properties.get("linestyle", "solid") or "solid"
+        self.collection = collections.LineCollection(
+            segments,
+            colors=self.get_colors(data.shape[0]),
+            linestyles=plot_utils.linestyle_dict[linestyle],
+            linewidths=self.properties.get("linewidth", 1.0),
+            alpha=self.properties.get("alpha", None),
+            label=self.properties.get("legend_label", None),
+            rasterized=self.properties.get("rasterized", False),
+        )
+        ax.add_collection(self.collection, autolim=True)
+        ax.autoscale_view()
+
+        # highlight a few series
+        labels = self.properties.get("labels", None)
+        highlight_properties = self.properties.get("highlight_properties", {})
+        self.lines = []
+        for idx in self.get_highlight_indices():
+            properties = highlight_properties.copy()
+            if labels is not None:
+                properties.setdefault("legend_label", labels[idx])
+            self.lines += plot_utils.make_lineplot(time, data[idx], ax, **properties)
+
+        return ax
+
+    def update(self, time, data):
+        ax = self.collection.axes
+        data, segments = self.get_segments(time, data, ax)
+
+        self.collection.set_segments(segments)
+        for line, idx in zip(self.lines, self.get_highlight_indices()):
+            line.set_data(time, data[idx])
+
+        return [self.collection] + self.lines
+
+    def draw_frame(self, time, data, index):
+        ax = self.collection.axes
+        data, segments = self.get_segments(time, data, ax)
+
+        self.collection.set_segments(segments[:, : index + 1])
+        for line, idx in zip(self.lines, self.get_highlight_indices()):
+            line.set_data(time[: index + 1], data[idx, : index + 1])
+
+        return [self.collection] + self.lines
+
+
+class HeatmapDrawer:
+    """
+    Draw a 2-D array with one row per entity and one column per day as a
+    heatmap, with a single call to :meth:`matplotlib.axes.Axes.imshow`.
+    The available properties are:
+
+        * "cmap": the colormap; defaults to "viridis", or to "RdBu_r" when
+            "norm" is "diverging";
+        * "norm": either "linear", "log" or "diverging"; defaults to "linear";
+            with "log", the non-positive entries are left blank;
+        * "vmin", "vmax": the data range covered by the colormap;
+        * "vcenter": the value at the center of a diverging colormap;
+            defaults to 0;
+        * "sort_by": either "last", "max", "sum", "mean", or a callable
+            mapping the 2-D array onto one value per row; the rows are sorted
+            by this metric. Defaults to `None`, i.e. no sorting;
+        * "ascending": `True` to sort the rows in ascending order, `False`
+            otherwise. Defaults to `False`;
+        * "labels": the name of each row;
+        * "max_labels": the maximum number of rows to label; if exceeded,
+            the rows are not labelled. Defaults to 50;
+        * "colorbar_on": `True` to draw the colorbar. Defaults to `True`;
+        * "colorbar_label": the colorbar label;
+        * "rasterized": `True` to rasterize the image in vector outputs.
+    """
+
+    metrics = {
+        "last": lambda data: data[:, -1],
+        "max": lambda data: np.nanmax(data, axis=1),
+        "sum": lambda data: np.nansum(data, axis=1),
+        "mean": lambda data: np.nanmean(data, axis=1),
+    }
+
+    def __init__(self, properties):
+        self.properties = properties
+        self.image = None
+        self.colorbar = None
+        self.order = None
+
+        # the data of the animation, prepared once for all its frames
+        self.frame_source = None
+        self.frame_data = None
+
+    def get_norm(self):
+        norm = self.properties.get("norm", "linear")
+        vmin = self.properties.get("vmin", None)
+        vmax = self.properties.get("vmax", None)
+
+        if norm == "linear":
+            return colors.Normalize(vmin=vmin, vmax=vmax)
+        elif norm == "log":
+            return colors.LogNorm(vmin=vmin, vmax=vmax)
+        elif norm == "diverging":
+            vcenter = self.properties.get("vcenter", 0.0)
+            if vmin is not None and vmax is not None:
+                return colors.TwoSlopeNorm(vcenter, vmin=vmin, vmax=vmax)
+            return colors.CenteredNorm(vcenter=vcenter)
+        else:
+            raise RuntimeError(f"Unknown normalization '{norm}'.")
+
+    def prepare(self, time, data, ax):
+        data = np.asarray(data, dtype=float)
+        if data.ndim == 1:
+            data = data[np.newaxis, :]
+
+        # sort the rows
+        sort_by = self.properties.get("sort_by", None)
+        if sort_by is None:
+            self.order = np.arange(data.shape[0])
+        else:
+            metric = HeatmapDrawer.metrics.get(sort_by, sort_by)(data)
+            metric = np.where(np.isnan(metric), -np.inf, metric)
+            self.order = np.argsort(metric, kind="stable")
+            if not self.properties.get("ascending", False):
+                self.order = self.order[::-1]
+        data = data[self.order]
+
+        if self.properties.get("norm", "linear") == "log":
+            data = np.ma.masked_less_equal(data, 0.0)
+
+        # register the categories and map the time labels onto the x-axis
+        ax.xaxis.update_units(time)
+        x = np.asarray(ax.xaxis.convert_units(time), dtype=float)
+        extent = (x[0] - 0.5, x[-1] + 0.5, data.shape[0] - 0.5, -0.5)
+
+        return data, extent
+
+    def set_row_labels(self, ax):
+        """ Label the rows in their current order, unless they are too many. """
+        labels = self.properties.get("labels", None)
+        if labels is not None and len(labels) <= self.properties.get("max_labels", 50):
+            ax.set_yticks(range(len(self.order)))
+            ax.set_yticklabels([labels[idx] for idx in self.order])
+        else:
+            ax.set_yticks([])
+
+    @timing.timed()
+    def draw(self, time, data, ax):
+        data, extent = self.prepare(time, data, ax)
+
+        norm = self.properties.get("norm", "linear")
+        cmap = self.properties.get(
+            "cmap", "RdBu_r" if norm == "diverging" else "viridis"
+        )
+
+        self.image = ax.imshow(
+            data,
+            cmap=cmap,
+            norm=self.get_norm(),
+            aspect="auto",
+            interpolation="nearest",
+            extent=extent,
+            rasterized=self.properties.get("rasterized", False),
+        )
+
+        self.set_row_labels(ax)
+
+        if self.properties.get("colorbar_on", True):
+            self.colorbar = ax.get_figure().colorbar(self.image, ax=ax)
+            self.colorbar.set_label(self.properties.get("colorbar_label", ""))
+
+        return ax
+
+    def update(self, time, data):
+        data, extent = self.prepare(time, data, self.image.axes)
+
+        # the rows may have been sorted in another order
+        self.set_row_labels(self.image.axes)
+        self.image.set_data(data)
+        self.image.set_extent(extent)
+
+        return [self.image]
+
+    def draw_frame(self, time, data, index):
+        # sort the rows once per animation, rather than once per frame
+        if self.frame_source is not data:
+            self.frame_data, _ = self.prepare(time, data, self.image.axes)
+            self.frame_source = data
+            self.set_row_labels(self.image.axes)
+        data = self.frame_data
+
+        # blank the days to come
+        mask = np.zeros(data.shape, dtype=bool)
+        mask[:, index + 1 :] = True
+        mask |= np.ma.getmaskarray(data)
+        self.image.set_data(np.ma.masked_array(data, mask=mask))
+
+        return [self.image]
+
+
+class ScatterDrawer:
+    """
+    Draw the entities (e.g. the provinces) at their geographic location, with
+    the marker size and color encoding the value of a given day.
+
+    The drawer expects a 2-D array with one row per entity and one column per
+    day; the last day is drawn, while :meth:`draw_frame` draws any other day.
+    The available properties are:
+
+        * "longitude", "latitude": the coordinates of each entity;
+        * "coordinates": a callable returning the pair (latitude, longitude);
+            it overrides "longitude" and "latitude";
+        * "cmap": the colormap; defaults to "Reds";
+        * "norm": either "linear" or "log"; defaults to "linear";
+        * "vmin", "vmax": the data range covered by the colormap and by the
+            marker sizes; defaults to the range over all days;
+        * "size_min", "size_max": the marker size (in points^2) associated
+            with "vmin" and "vmax"; default to 5 and 500;
+        * "alpha": the marker transparency; defaults to 0.8;
+        * "colorbar_on": `True` to draw the colorbar. Defaults to `True`;
+        * "colorbar_label": the colorbar label;
+        * "date_on": `True` to print the day being drawn in the upper left
+            corner. Defaults to `True`.
+    """
+
+    def __init__(self, properties):
+        self.properties = properties
+        self.collection = None
+        self.colorbar = None
+        self.text = None
+
+    def get_coordinates(self):
+        coordinates = self.properties.get("coordinates", None)
+        if coordinates is not None:
+            latitude, longitude = coordinates()
+        else:
+            latitude = self.properties["latitude"]
+            longitude = self.properties["longitude"]
+
+        return np.column_stack(
+            (np.asarray(longitude, dtype=float), np.asarray(latitude, dtype=float))
+        )
+
+    def get_norm(self, data):
+        vmin = self.properties.get("vmin", None)
+        vmax = self.properties.get("vmax", None)
+
+        if self.properties.get("norm", "linear") == "log":
+            positive = data[data > 0]
+            if vmin is None:
+                vmin = positive.min() if positive.size > 0 else 1.0
+            if vmax is None:
+                vmax = positive.max() if positive.size > 0 else 10.0
+            if vmin <= 0:
+                raise RuntimeError("The log normalization requires a positive vmin.")
+            return colors.LogNorm(vmin=vmin, vmax=vmax)
+        else:
+            vmin = np.nanmin(data) if vmin is None else vmin
+            vmax = np.nanmax(data) if vmax is None else vmax
+            return colors.Normalize(vmin=vmin, vmax=vmax)
+
+    def get_sizes(self, values):
+        size_min = self.properties.get("size_min", 5.0)
+        size_max = self.properties.get("size_max", 500.0)
+        scaled = np.clip(np.ma.filled(self.collection.norm(values), 0.0), 0.0, 1.0)
+        return size_min + (size_max - size_min) * np.nan_to_num(scaled)
+
+    def set_day(self, time, data, index):
+        values = data[:, index]
+        self.collection.set_array(np.ma.masked_invalid(values))
+        self.collection.set_sizes(self.get_sizes(values))
+        if self.text is not None:
+            self.text.set_text(time[index])
+
+    @timing.timed()
+    def draw(self, time, data, ax):
+        data = np.asarray(data, dtype=float)
+
+        self.collection = ax.scatter(
+            *self.get_coordinates().T,
+            c=data[:, -1],
+            cmap=self.properties.get("cmap", "Reds"),
+            norm=self.get_norm(data),
+            alpha=self.properties.get("alpha", 0.8),
+            edgecolors="none",
+        )
+
+        if self.properties.get("date_on", True):
+            self.text = ax.text(
+                0.02, 0.98, "", transform=ax.transAxes, ha="left", va="top"
+            )
+
+        self.set_day(time, data, -1)
+
+        if self.properties.get("colorbar_on", True):
+            self.colorbar = ax.get_figure().colorbar(self.collection, ax=ax)
+            self.colorbar.set_label(self.properties.get("colorbar_label", ""))
+
+        return ax
+
+    def update(self, time, data):
+        data = np.asarray(data, dtype=float)
+        self.collection.set_norm(self.get_norm(data))
+        self.set_day(time, data, -1)
+        return [self.collection] + ([] if self.text is None else [self.text])
+
+    def draw_frame(self, time, data, index):
+        self.set_day(time, np.asarray(data, dtype=float), index)
+        return [self.collection] + ([] if self.text is None else [self.text])
+
 
 if __name__ == "__main__":
     fig, ax = plot_utils.get_figure_and_axes()
@@ -1,14 +1,20 @@
 # -*- coding: utf-8 -*-
 import abc
+import atexit
+import collections
 import numpy as np
 import os
 import pandas as pd
 import pathlib
+import pickle
+import sys
+import threading
 
 from covid19 import config
 from covid19.patcher import Patcher
 from covid19.updater import Updater
-from covid19.utils import convert_string_to_datetime
+from covid19.updaters.utils import get_repo_version
+from covid19.utils import convert_string_to_datetime, get_files_version
 
 
 ledger = {}
@@ -21,8 +27,227 @@ def registry(name):
     return wrapper
 
 
+def count_values(out):
+    """ The number of values retrieved by a query, given its output `(time, data)`. """
+    return int(np.size(out[1]))
+
+
+def count_batch_values(outs):
+    """ The number of values retrieved by a batch query of several fields. """
+    return sum(count_values(out) for out in outs)
+
+
+def get_memory_usage(data):
+    """
+    The deep memory footprint in bytes of `data`, i.e. a DataFrame, an array or
+    a list or dict of them, including the Python objects held by the columns.
+    """
+    if data is None:
+        return 0
+    elif isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(deep=True).sum())
+    elif isinstance(data, (pd.Series, pd.Index)):
+        return int(data.memory_usage(deep=True))
+    elif isinstance(data, np.ndarray):
+        return int(data.nbytes)
+    elif isinstance(data, dict):
+        return sys.getsizeof(data) + sum(get_memory_usage(v) for v in data.values())
+    elif isinstance(data, (list, tuple)):
+        return sys.getsizeof(data) + sum(get_memory_usage(v) for v in data)
+    else:
+        return sys.getsizeof(data)
+
+
+def get_memory_report():
+    """
+    The memory usage of the datasets mounted by the loaders instantiated so far,
+    as `{loader name: {dataset: bytes}}`.
+    """
+    report = {}
+    for name, cls in ledger.items():
+        loader = getattr(cls, "instance", None)
+        if loader is not None and getattr(loader, "initialized", False):
+            report[name] = loader.get_memory_usage()
+    return report
+
+
+def print_memory_report():
+    total = 0
+    for name, usage in get_memory_report().items():
+        for dataset, nbytes in usage.items():
+            print(f"{name:<12s} {dataset:<12s} {nbytes / 2**20:10.2f} MB")
+            total += nbytes
+    print(f"{'total':<25s} {total / 2**20:10.2f} MB")
+
+
+class DatasetManager:
+    """
+    Track the datasets mounted by all the loaders, from the least to the most
+    recently used, and keep their total footprint within `config.memory_budget`
+    bytes by evicting the least recently used: they are spilled to pickles in
+    `config.spill_dir` if set, unloaded otherwise, and mounted again by the next
+    query which needs them (see :meth:`Loader.get_dataset`).
+    """
+
+    def __init__(self):
+        # the footprint of each (loader, dataset), computed only with a budget
+        self.mounted = collections.OrderedDict()
+        self.spilled = {}
+        # bumped each time a dataset is discarded, so that a spill in progress
+        # does not register stale data
+        self.generations = collections.Counter()
+        self.lock = threading.RLock()
+
+        atexit.register(self.clear)
+
+    def add(self, loader, dataset, nbytes=None):
+        key = (loader, dataset)
+        with self.lock:
+            self.mounted[key] = nbytes
+            self.mounted.move_to_end(key)
+            victims = self.select_victims(keep=key)
+        self.release(victims)
+
+    def touch(self, loader, dataset):
+        key = (loader, dataset)
+        with self.lock:
+            if key in self.mounted:
+                self.mounted.move_to_end(key)
+
+    def evict(self, keep=None):
+        """ Evict the least recently used datasets, but `keep`, down to the budget. """
+        with self.lock:
+            victims = self.select_victims(keep)
+        self.release(victims)
+
+    def select_victims(self, keep=None):
+        """
+        Unload the least recently used datasets, but `keep`, down to the budget,
+        and return them for :meth:`release`. To be called with the lock held.
+        """
+        budget = config.memory_budget
+        if budget is None:
+            return []
+
+        for (loader, dataset), nbytes in self.mounted.items():
+            if nbytes is None:
+                attribute, _ = loader.datasets[dataset]
+                nbytes = get_memory_usage(getattr(loader, attribute))
+                self.mounted[(loader, dataset)] = nbytes
+
+        victims = []
+        total = sum(self.mounted.values())
+        for key in list(self.mounted):
+            if total <= budget:
+                break
+            if key == keep:
+                continue
+
+            loader, dataset = key
+            attribute, _ = loader.datasets[dataset]
+            data = getattr(loader, attribute)
+            nbytes = self.mounted.pop(key)
+            total -= nbytes
+            victims.append((loader, dataset, data, nbytes, self.generations[key]))
+            setattr(loader, attribute, None)
+
+        return victims
+
+    def release(self, victims):
+        """
+        Spill the datasets unloaded by :meth:`select_victims`, or let them go.
+        This runs without the lock, so that writing the pickles does not stall
+        the queries on the other datasets.
+        """
+        for loader, dataset, data, nbytes, generation in victims:
+            filename = None
+            if config.spill_dir is not None and data is not None:
+                with self.lock:
+                    filename = self.spilled.get((loader, dataset))
+                if filename is None:
+                    filename = self.spill(loader, dataset, data, generation)
+
+            if filename is None:
+                print(f"Unload {loader.name} {dataset} ({nbytes / 2**20:.2f} MB) ...")
+            else:
+                print(
+                    f"Spill {loader.name} {dataset} ({nbytes / 2**20:.2f} MB) "
+                    f"to {filename} ..."
+                )
+
+    def spill(self, loader, dataset, data, generation):
+        key = (loader, dataset)
+
+        os.makedirs(config.spill_dir, exist_ok=True)
+        filename = os.path.join(
+            config.spill_dir, f"{loader.name}-{dataset}-{os.getpid()}.pickle"
+        )
+        tmp_filename = f"{filename}.{threading.get_ident()}.tmp"
+        with open(tmp_filename, "wb") as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self.lock:
+            # the dataset was discarded meanwhile, e.g. by a refresh
+            if self.generations[key] != generation:
+                os.remove(tmp_filename)
+                return None
+
+            os.replace(tmp_filename, filename)
+            self.spilled[key] = filename
+
+        return filename
+
+    def restore(self, loader, dataset):
+        """ Read back `dataset` if it was spilled, otherwise return `None`. """
+        with self.lock:
+            filename = self.spilled.get((loader, dataset))
+        if filename is None:
+            return None
+
+        print(f"Restore {loader.name} {dataset} from {filename} ...")
+
+        try:
+            with open(filename, "rb") as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            with self.lock:
+                self.spilled.pop((loader, dataset), None)
+            return None
+
+    def discard(self, loader, dataset):
+        """ Forget `dataset`, e.g. once its data have changed, and its spill file. """
+        with self.lock:
+            self.mounted.pop((loader, dataset), None)
+            filename = self.spilled.pop((loader, dataset), None)
+            self.generations[(loader, dataset)] += 1
+        if filename is not None and os.path.exists(filename):
+            os.remove(filename)
+
+    def clear(self):
+        with self.lock:
+            keys = list(self.mounted) + list(self.spilled)
+        for loader, dataset in keys:
+            self.discard(loader, dataset)
+
+
+manager = DatasetManager()
+
+
 class Loader(abc.ABC):
+    # the keyword arguments of run which also accept a list of names, resulting
+    # in a single scan over the dataset
+    batch_levels = ()
+
+    # the attribute holding each dataset and the method mounting it
+    datasets = {}
+
     def __init__(self, name, update_data, apply_patches):
+        self.name = name
+        self.apply_patches = apply_patches
+
+        # one lock per dataset, so that concurrent queries mount it once
+        self.mount_locks = {dataset: threading.Lock() for dataset in self.datasets}
+
         if update_data:
             updater = Updater.factory(name)
             updater.run()
@@ -34,6 +259,109 @@ class Loader(abc.ABC):
     def run(self, field, province=None, region=None, country=None):
         pass
 
+    def run_batch(self, fields, level, names):
+        """
+        Retrieve each of `fields` for all the entities `names` of the `level`
+        in `batch_levels`, e.g. `run_batch(["totale_casi"], "region", regions)`.
+        Return the pair `(time, data)` of each field, the data being a 2-D array
+        with one row per entity. The loaders supporting batch queries read the
+        dataset once for all the fields.
+        """
+        return [self.run(field, **{level: list(names)}) for field in fields]
+
+    def refresh(self):
+        """
+        Pull the latest data and, if anything changed, unmount the datasets
+        so that they get re-mounted on the next query.
+        Return `True` if the data have changed.
+        """
+        updater = Updater.factory(self.name)
+        changed = updater.run()
+
+        if changed:
+            if self.apply_patches:
+                patcher = Patcher.factory(self.name, update_data=False)
+                patcher.run()
+            self.unmount()
+
+        return bool(changed)
+
+    def unmount(self):
+        for dataset, (attribute, _) in self.datasets.items():
+            with self.mount_locks[dataset]:
+                setattr(self, attribute, None)
+                manager.discard(self, dataset)
+
+    def get_dataset(self, dataset):
+        """
+        Return `dataset`, mounting it first if needed, i.e. on the first query
+        or after it was evicted by the :class:`DatasetManager`. Concurrent calls
+        mount it once: the others wait for it.
+        """
+        attribute, mount = self.datasets[dataset]
+
+        data = getattr(self, attribute)
+        if data is not None:
+            manager.touch(self, dataset)
+            return data
+
+        with self.mount_locks[dataset]:
+            # another thread may have mounted it while waiting for the lock
+            data = getattr(self, attribute)
+            if data is not None:
+                manager.touch(self, dataset)
+                return data
+
+            data = manager.restore(self, dataset)
+            if data is None:
+                return getattr(self, mount)()
+
+            setattr(self, attribute, data)
+            nbytes = None if config.memory_budget is None else get_memory_usage(data)
+            manager.add(self, dataset, nbytes)
+            return data
+
+    def get_memory_usage(self):
+        """
+        The deep memory footprint in bytes of each mounted dataset, e.g.
+        `{"regions": 1234567}`; the datasets not mounted are left out.
+        """
+        usage = {}
+        for dataset, (attribute, _) in self.datasets.items():
+            data = getattr(self, attribute, None)
+            if data is not None:
+                usage[dataset] = get_memory_usage(data)
+        return usage
+
+    def on_mount(self, dataset):
+        """
+        Hand the freshly mounted `dataset` to the :class:`DatasetManager`, and
+        print its footprint if `config.log_memory_usage` is set.
+        """
+        data = getattr(self, self.datasets[dataset][0])
+
+        # measure the footprint here rather than under the lock of the manager
+        nbytes = None
+        if config.log_memory_usage or config.memory_budget is not None:
+            nbytes = get_memory_usage(data)
+        if config.log_memory_usage:
+            print(
+                f"Mounted {self.name} {dataset}: {len(data)} files, "
+                f"{nbytes / 2**20:.2f} MB in memory"
+            )
+
+        manager.add(self, dataset, nbytes)
+
+    def get_data_version(self):
+        """
+        Identify the version of the data, i.e. the commit checked out in the
+        data repository or, if not available, a hash of the size and
+        modification time of its files.
+        """
+        repo_dir = getattr(config, f"repo_{self.name}_dir")
+        version = get_repo_version(repo_dir) or get_files_version(repo_dir)
+        return f"{version}:patched" if self.apply_patches else version
+
     @staticmethod
     def factory(name, update_data=True, apply_patches=False, *args, **kwargs):
         if name not in ledger:
@@ -3,91 +3,106 @@ import numpy as np
 import os
 import pandas as pd
 import pathlib
+import threading
 
-from covid19 import config
-from covid19.loader import Loader, registry
-from covid19.utils import convert_string_to_datetime
+from covid19 import config, timing
+from covid19.loader import Loader, count_batch_values, count_values, registry
+from covid19.patchers.italy import PatcherItaly
+from covid19.utils import compute_increments, convert_string_to_datetime
 
 
 @registry("italy")
 class LoaderItaly(Loader):
-    columns_country = {
-        "data": 0,
-        "stato": 1,
-        "ricoverati_con_sintomi": 2,
-        "terapia_intensiva": 3,
-        "totale_ospedalizzati": 4,
-        "isolamento_domiciliare": 5,
-        "totale_attualmente_positivi": 6,
-        "nuovi_attualmente_positivi": 7,
-        "dimessi_guariti": 8,
-        "deceduti": 9,
-        "totale_casi": 10,
-        "tamponi": 11,
+    columns_country = PatcherItaly.columns_country
+    columns_region = PatcherItaly.columns_region
+    columns_province = PatcherItaly.columns_province
+
+    # fields defined as the ratio of two other fields, times a factor
+    ratios = {
+        "frazione_tamponi_positivi": ("totale_casi", "tamponi", 1.0),
+        "percentuale_tamponi_positivi": ("totale_casi", "tamponi", 100.0),
+        "frazione_nuovi_tamponi_positivi": (
+            "incremento_totale_casi",
+            "incremento_tamponi",
+            1.0,
+        ),
+        "percentuale_nuovi_tamponi_positivi": (
+            "incremento_totale_casi",
+            "incremento_tamponi",
+            100.0,
+        ),
     }
-    columns_region = {
-        "data": 0,
-        "stato": 1,
-        "codice_regione": 2,
-        "denominazione_regione": 3,
-        "lat": 4,
-        "long": 5,
-        "ricoverati_con_sintomi": 6,
-        "terapia_intensiva": 7,
-        "totale_ospedalizzati": 8,
-        "isolamento_domiciliare": 9,
-        "totale_attualmente_positivi": 10,
-        "nuovi_attualmente_positivi": 11,
-        "dimessi_guariti": 12,
-        "deceduti": 13,
-        "totale_casi": 14,
-        "tamponi": 15,
-    }
-    columns_province = {
-        "data": 0,
-        "stato": 1,
-        "codice_regione": 2,
-        "denominazione_regione": 3,
-        "codice_provincia": 4,
-        "denominazione_provincia": 5,
-        "sigla_provincia": 6,
-        "lat": 7,
-        "long": 8,
-        "totale_casi": 9,
+
+    batch_levels = ("region", "province")
+
+    datasets = {
+        "country": ("data_country", "mount_country"),
+        "regions": ("data_regions", "mount_regions"),
+        "provinces": ("data_provinces", "mount_provinces"),
     }
 
     instance = None
+    instance_lock = threading.Lock()
 
     def __new__(cls, *args, **kwargs):
         if LoaderItaly.instance is None:
-            LoaderItaly.instance = super().__new__(cls)
-            LoaderItaly.instance.initialized = False
+            with LoaderItaly.instance_lock:
+                if LoaderItaly.instance is None:
+                    instance = super().__new__(cls)
+                    instance.initialized = False
+                    LoaderItaly.instance = instance
         return LoaderItaly.instance
 
     def __init__(self, name, update_data, apply_patches):
         if not self.initialized:
-            super().__init__(name, update_data, apply_patches)
+            with LoaderItaly.instance_lock:
+                if not self.initialized:
+                    super().__init__(name, update_data, apply_patches)
 
-            # lazy loading
-            self.data_country = None
-            self.data_regions = None
-            self.data_provinces = None
+                    # lazy loading
+                    self.data_country = None
+                    self.data_regions = None
+                    self.data_provinces = None
 
-            self.initialized = True
+                    self.initialized = True
 
     def run(self, field, province=None, region=None, country=None):
         if region is not None and province is not None:
             raise ValueError("Either region or province must be None.")
+        elif isinstance(region, (list, tuple)):
+            return self.load_regions(field, region)
         elif region is not None:
             return self.load_region(field, region)
+        elif isinstance(province, (list, tuple)):
+            return self.load_provinces(field, province)
         elif province is not None:
             return self.load_province(field, province)
         else:
             return self.load_country(field)
 
+    def run_batch(self, fields, level, names):
+        if level == "region":
+            dataset, key = "regions", "denominazione_regione"
+            columns = LoaderItaly.columns_region
+        elif level == "province":
+            dataset, key = "provinces", "denominazione_provincia"
+            columns = LoaderItaly.columns_province
+        else:
+            raise RuntimeError(f"Level '{level}' does not support batch queries.")
+
+        dfs = self.get_dataset(dataset)
+
+        print(f"Load {len(fields)} fields concerning {len(names)} {dataset} ...")
+
+        return self.fetch_fields_batch(fields, columns, dfs, key, list(names))
+
+    @timing.timed(rows=count_values)
     def fetch_time_and_data(self, field, columns, dfs):
         error = RuntimeError(f"Don't know how to retrieve '{field}'.")
 
+        # support the historical column names
+        field = PatcherItaly.get_canonical_name(field)
+
         if field in columns:
             time = []
             data = []
@@ -169,6 +184,106 @@ class LoaderItaly(Loader):
 
         return time, data
 
+    @staticmethod
+    def get_increment_column(field):
+        """ The column whose increments `field` is, e.g. "incremento_totale_casi". """
+        if "incremento_relativo_percentuale_" in field:
+            return field[32:]
+        elif "incremento_relativo_" in field:
+            return field[20:]
+        else:
+            return field[11:]
+
+    def get_batch_columns(self, field, columns, key):
+        """ The columns of the dataset `field` is computed from by a batch query. """
+        error = RuntimeError(f"Don't know how to retrieve '{field}'.")
+
+        # support the historical column names
+        field = PatcherItaly.get_canonical_name(field)
+
+        if field in columns and field not in ("data", "stato", key):
+            return [field]
+        elif "incremento_" in field:
+            column_field = LoaderItaly.get_increment_column(field)
+            if column_field not in columns or column_field in ("data", "stato"):
+                raise error
+            return self.get_batch_columns(column_field, columns, key)
+        elif field in LoaderItaly.ratios:
+            num_field, den_field, _ = LoaderItaly.ratios[field]
+            num_columns = self.get_batch_columns(num_field, columns, key)
+            return num_columns + self.get_batch_columns(den_field, columns, key)
+        else:
+            raise error
+
+    def compute_batch(self, field, values):
+        """
+        Compute `field` from `values`, the 2-D arrays of the columns returned
+        by :meth:`get_batch_columns`.
+        """
+        field = PatcherItaly.get_canonical_name(field)
+
+        if field in values:
+            return values[field]
+        elif "incremento_" in field:
+            data = self.compute_batch(LoaderItaly.get_increment_column(field), values)
+            return compute_increments(
+                data,
+                relative="incremento_relativo_" in field,
+                percentage="incremento_relativo_percentuale_" in field,
+            )
+        else:
+            num_field, den_field, factor = LoaderItaly.ratios[field]
+            nums = self.compute_batch(num_field, values).astype(float)
+            dens = self.compute_batch(den_field, values).astype(float)
+            return factor * np.divide(
+                nums, dens, out=np.zeros_like(nums), where=~np.isclose(dens, 0.0)
+            )
+
+    def fetch_time_and_data_batch(self, field, columns, dfs, key, names):
+        """
+        Vectorized counterpart of :meth:`fetch_time_and_data`, retrieving `field`
+        for all the entities `names` identified by the column `key` in a single
+        scan over the days. The data are returned as a 2-D array with one row per
+        entity and one column per day; missing entries are NaN.
+        """
+        return self.fetch_fields_batch([field], columns, dfs, key, names)[0]
+
+    @timing.timed(rows=count_batch_values)
+    def fetch_fields_batch(self, fields, columns, dfs, key, names):
+        """
+        Same as :meth:`fetch_time_and_data_batch` for several `fields` at once:
+        the columns they are computed from are all read in the same scan over
+        the days. Return the pair `(time, data)` of each field.
+        """
+        needed = []
+        for field in fields:
+            needed += [
+                column
+                for column in self.get_batch_columns(field, columns, key)
+                if column not in needed
+            ]
+
+        time = []
+        rows = {column: [] for column in needed}
+        for df in dfs:
+            time.append(df["data"].iloc[0][5:10])
+
+            # locate the entities once per day, leaving out the names shared by
+            # several rows, e.g. the placeholders of the provinces
+            unique = ~df[key].duplicated(keep=False).to_numpy()
+            indexer = pd.Index(df[key].to_numpy()[unique]).get_indexer(names)
+
+            for column in needed:
+                rows[column].append(
+                    pd.api.extensions.take(
+                        df[column].to_numpy()[unique], indexer, allow_fill=True
+                    )
+                )
+
+        values = {column: np.stack(rows[column], axis=1) for column in needed}
+
+        return [(list(time), self.compute_batch(field, values)) for field in fields]
+
     def mount_country(self):
         print("Mount data concerning Italy ... ")
 
@@ -176,20 +291,28 @@ class LoaderItaly(Loader):
         filenames = pathlib.Path(dir).glob("dpc-covid19-ita-andamento-nazionale-*.csv")
         filenames = sorted(filenames)[:-1]
 
-        self.data_country = []
+        dfs = []
 
-        for filename in filenames:
-            self.data_country.append(pd.read_csv(str(filename), delimiter=","))
+        with timing.timer("LoaderItaly.mount_country") as t:
+            for filename in filenames:
+                df = pd.read_csv(str(filename), delimiter=",")
+                dfs.append(PatcherItaly.harmonize(df, LoaderItaly.columns_country))
+
+            if t.active:
+                t.rows = sum(len(df) for df in dfs)
+                t.nbytes = timing.get_file_sizes(filenames)
+
+        self.data_country = dfs
+        self.on_mount("country")
+
+        return dfs
 
     def load_country(self, field):
-        if self.data_country is None:
-            self.mount_country()
+        dfs = self.get_dataset("country")
 
         print("Load data concerning Italy ...")
 
-        return self.fetch_time_and_data(
-            field, LoaderItaly.columns_country, self.data_country
-        )
+        return self.fetch_time_and_data(field, LoaderItaly.columns_country, dfs)
 
     def mount_regions(self):
         print("Mount data concerning the Italian regions ... ")
@@ -198,20 +321,30 @@ class LoaderItaly(Loader):
         filenames = pathlib.Path(dir).glob("dpc-covid19-ita-regioni-*.csv")
         filenames = sorted(filenames)[:-1]
 
-        self.data_regions = []
+        dfs = []
+
+        with timing.timer("LoaderItaly.mount_regions") as t:
+            for filename in filenames:
+                df = pd.read_csv(str(filename), delimiter=",")
+                dfs.append(PatcherItaly.harmonize(df, LoaderItaly.columns_region))
 
-        for filename in filenames:
-            self.data_regions.append(pd.read_csv(str(filename), delimiter=","))
+            if t.active:
+                t.rows = sum(len(df) for df in dfs)
+                t.nbytes = timing.get_file_sizes(filenames)
+
+        self.data_regions = dfs
+        self.on_mount("regions")
+
+        return dfs
 
     def load_region(self, field, region):
-        if self.data_regions is None:
-            self.mount_regions()
+        dfs = self.get_dataset("regions")
 
         print("Load data concerning {} ... ".format(region))
 
         rows = []
 
-        for df in self.data_regions:
+        for df in dfs:
             row = df.loc[df["denominazione_regione"] == region]
             row.reset_index(drop=True)
 
@@ -222,6 +355,26 @@ class LoaderItaly(Loader):
 
         return self.fetch_time_and_data(field, LoaderItaly.columns_region, rows)
 
+    def get_region_names(self):
+        dfs = self.get_dataset("regions")
+
+        return list(dfs[-1]["denominazione_regione"].unique())
+
+    def load_regions(self, field, regions=None):
+        dfs = self.get_dataset("regions")
+
+        regions = self.get_region_names() if regions is None else list(regions)
+
+        print("Load data concerning {} regions ... ".format(len(regions)))
+
+        return self.fetch_time_and_data_batch(
+            field,
+            LoaderItaly.columns_region,
+            dfs,
+            "denominazione_regione",
+            regions,
+        )
+
     def mount_provinces(self):
         print("Mount data concerning the Italian provinces ... ")
 
@@ -229,20 +382,36 @@ class LoaderItaly(Loader):
         filenames = pathlib.Path(dir).glob("dpc-covid19-ita-province-*.csv")
         filenames = sorted(filenames)[:-1]
 
-        self.data_provinces = []
+        dfs = []
+
+        with timing.timer("LoaderItaly.mount_provinces") as t:
+            for filename in filenames:
+                # only empty cells are missing: "NA" is the abbreviation of Napoli
+                df = pd.read_csv(
+                    str(filename), delimiter=",", keep_default_na=False, na_values=[""]
+                )
+                dfs.append(PatcherItaly.harmonize(df, LoaderItaly.columns_province))
+
+            if t.active:
+                t.rows = sum(len(df) for df in dfs)
+                t.nbytes = timing.get_file_sizes(filenames)
+
+        self.data_provinces = dfs
+        self.on_mount("provinces")
 
-        for filename in filenames:
-            self.data_provinces.append(pd.read_csv(str(filename), delimiter=","))
+        # the province shorthands may not have been available so far
+        config.shorthands.reset()
+
+        return dfs
 
     def load_province(self, field, province):
-        if self.data_provinces is None:
-            self.mount_provinces()
+        dfs = self.get_dataset("provinces")
 
         print("Load data concerning {} ...".format(province))
 
         rows = []
 
-        for df in self.data_provinces:
+        for df in dfs:
             row = df.loc[df["denominazione_provincia"] == province]
             row.reset_index(drop=True)
 
@@ -252,3 +421,52 @@ class LoaderItaly(Loader):
             rows.append(row)
 
         return self.fetch_time_and_data(field, LoaderItaly.columns_province, rows)
+
+    def get_province_names(self):
+        dfs = self.get_dataset("provinces")
+
+        # leave out the placeholders shared by several regions
+        names = dfs[-1]["denominazione_provincia"]
+        return list(names[~names.duplicated(keep=False)])
+
+    def get_provinces_by_region(self):
+        dfs = self.get_dataset("provinces")
+
+        df = dfs[-1]
+        df = df.loc[~df["denominazione_provincia"].duplicated(keep=False)]
+
+        out = {}
+        for region, province in zip(
+            df["denominazione_regione"], df["denominazione_provincia"]
+        ):
+            out.setdefault(region, []).append(province)
+
+        return out
+
+    def load_provinces(self, field, provinces=None):
+        dfs = self.get_dataset("provinces")
+
+        provinces = self.get_province_names() if provinces is None else list(provinces)
+
+        print("Load data concerning {} provinces ...".format(len(provinces)))
+
+        return self.fetch_time_and_data_batch(
+            field,
+            LoaderItaly.columns_province,
+            dfs,
+            "denominazione_provincia",
+            provinces,
+        )
+
+    def get_coordinates(self, level, names):
+        """ Get the latitude and longitude of the given regions or provinces. """
+        if level == "region":
+            df, key = self.get_dataset("regions")[-1], "denominazione_regione"
+        elif level == "province":
+            df, key = self.get_dataset("provinces")[-1], "denominazione_provincia"
+        else:
+            raise RuntimeError(f"Don't know the coordinates of the level '{level}'.")
+
+        df = df.drop_duplicates(key, keep=False).set_index(key).reindex(list(names))
+
+        return df["lat"].to_numpy(dtype=float), df["long"].to_numpy(dtype=float)
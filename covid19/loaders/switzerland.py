@@ -3,6 +3,7 @@ import numpy as np
 import os
 import pandas as pd
 import pathlib
+import threading
 
 from covid19 import config
 from covid19.loader import Loader, registry
@@ -12,17 +13,23 @@ from covid19.utils import convert_string_to_datetime
 @registry("switzerland")
 class LoaderSwitzerland(Loader):
     instance = None
+    instance_lock = threading.Lock()
 
     def __new__(cls, *args, **kwargs):
         if LoaderSwitzerland.instance is None:
-            LoaderSwitzerland.instance = super().__new__(cls)
-            LoaderSwitzerland.instance.initialized = False
+            with LoaderSwitzerland.instance_lock:
+                if LoaderSwitzerland.instance is None:
+                    instance = super().__new__(cls)
+                    instance.initialized = False
+                    LoaderSwitzerland.instance = instance
         return LoaderSwitzerland.instance
 
     def __init__(self, name, update_data, apply_patches):
         if not self.initialized:
-            super().__init__(name, update_data, apply_patches)
-            self.initialized = True
+            with LoaderSwitzerland.instance_lock:
+                if not self.initialized:
+                    super().__init__(name, update_data, apply_patches)
+                    self.initialized = True
 
     def run(self, field, province=None, region=None, country=None):
         pass
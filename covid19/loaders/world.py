@@ -3,10 +3,11 @@ import numpy as np
 import os
 import pandas as pd
 import pathlib
+import threading
 
-from covid19 import config
-from covid19.loader import Loader, registry
-from covid19.utils import convert_string_to_datetime
+from covid19 import config, timing
+from covid19.loader import Loader, count_batch_values, count_values, registry
+from covid19.utils import compute_increments, convert_string_to_datetime
 
 
 @registry("world")
@@ -22,31 +23,53 @@ class LoaderWorld(Loader):
         "Longitude": 7,
     }
 
+    batch_levels = ("country",)
+
+    datasets = {"reports": ("data", "mount")}
+
     instance = None
+    instance_lock = threading.Lock()
 
     def __new__(cls, *args, **kwargs):
         if LoaderWorld.instance is None:
-            LoaderWorld.instance = super().__new__(cls)
-            LoaderWorld.instance.initialized = False
+            with LoaderWorld.instance_lock:
+                if LoaderWorld.instance is None:
+                    instance = super().__new__(cls)
+                    instance.initialized = False
+                    LoaderWorld.instance = instance
         return LoaderWorld.instance
 
     def __init__(self, name, update_data, apply_patches):
         if not self.initialized:
-            super().__init__(name, update_data, apply_patches)
+            with LoaderWorld.instance_lock:
+                if not self.initialized:
+                    super().__init__(name, update_data, apply_patches)
 
-            # lazy loading
-            self.data = None
+                    # lazy loading
+                    self.data = None
 
-            self.initialized = True
+                    self.initialized = True
 
     def run(self, field, province=None, region=None, country=None):
         if province is not None:
             return self.load_province(field, province)
+        elif isinstance(country, (list, tuple)):
+            return self.load_countries(field, country)
         elif country is not None:
             return self.load_country(field, country)
         else:
             raise RuntimeError("Either province or country must be not None.")
 
+    def run_batch(self, fields, level, names):
+        if level != "country":
+            raise RuntimeError(f"Level '{level}' does not support batch queries.")
+
+        dfs = self.get_dataset("reports")
+
+        print(f"Load {len(fields)} fields concerning {len(names)} countries ...")
+
+        return self.fetch_fields_batch(fields, dfs, list(names))
+
     def mount(self):
         print("Mount global data ...")
 
@@ -56,11 +79,22 @@ class LoaderWorld(Loader):
         filenames = pathlib.Path(dir).glob("*.csv")
         filenames = sorted(filenames)
 
-        self.data = []
+        dfs = []
+
+        with timing.timer("LoaderWorld.mount") as t:
+            for filename in filenames:
+                dfs.append(pd.read_csv(str(filename), delimiter=","))
+
+            if t.active:
+                t.rows = sum(len(df) for df in dfs)
+                t.nbytes = timing.get_file_sizes(filenames)
+
+        self.data = dfs
+        self.on_mount("reports")
 
-        for filename in filenames:
-            self.data.append(pd.read_csv(str(filename), delimiter=","))
+        return dfs
 
+    @timing.timed(rows=count_values)
     def fetch_time_and_data(self, field, dfs):
         error = RuntimeError(f"Don't know how to retrieve '{field}'.")
 
@@ -118,15 +152,93 @@ class LoaderWorld(Loader):
 
         return time, data
 
+    @staticmethod
+    def get_increase_column(field):
+        """ The column whose increases `field` is, e.g. "increase_Confirmed". """
+        if "relative_percentage_increase_" in field:
+            return field[29:]
+        elif "relative_increase_" in field:
+            return field[18:]
+        else:
+            return field[9:]
+
+    @staticmethod
+    def get_batch_column(field):
+        """ The column `field` is computed from by a batch query. """
+        column_field = field
+        if "increase_" in field:
+            column_field = LoaderWorld.get_increase_column(field)
+
+        if column_field not in ("Confirmed", "Deaths", "Recovered"):
+            raise RuntimeError(f"Don't know how to retrieve '{field}'.")
+
+        return column_field
+
+    def fetch_time_and_data_batch(self, field, dfs, countries):
+        """
+        Vectorized counterpart of :meth:`fetch_time_and_data`, retrieving `field`
+        for all `countries` in a single scan over the days. The data are returned
+        as a 2-D array with one row per country and one column per day; missing
+        entries are NaN.
+        """
+        return self.fetch_fields_batch([field], dfs, countries)[0]
+
+    @timing.timed(rows=count_batch_values)
+    def fetch_fields_batch(self, fields, dfs, countries):
+        """
+        Same as :meth:`fetch_time_and_data_batch` for several `fields` at once:
+        the columns they are computed from are all read in the same scan over
+        the days. Return the pair `(time, data)` of each field.
+        """
+        needed = []
+        for field in fields:
+            column_field = LoaderWorld.get_batch_column(field)
+            if column_field not in needed:
+                needed.append(column_field)
+
+        # the countries may be requested more than once
+        index = pd.Index(countries).unique()
+        positions = index.get_indexer(countries)
+
+        time = []
+        sums = {column: [] for column in needed}
+        for df in dfs:
+            time.append(df["Last Update"][df.index[0]][:10])
+
+            # sum up the rows of each country, once located; the countries
+            # without any row are NaN
+            codes = index.get_indexer(df["Country/Region"])
+            found = codes >= 0
+            counts = np.bincount(codes[found], minlength=len(index))
+
+            for column in needed:
+                weights = np.nan_to_num(df[column].to_numpy(dtype=float)[found])
+                total = np.bincount(codes[found], weights, minlength=len(index))
+                sums[column].append(np.where(counts > 0, total, np.nan)[positions])
+
+        values = {column: np.stack(sums[column], axis=1) for column in needed}
+
+        out = []
+        for field in fields:
+            data = values[LoaderWorld.get_batch_column(field)]
+            if "increase_" in field:
+                data = compute_increments(
+                    data,
+                    relative="relative_" in field,
+                    percentage="relative_percentage_increase_" in field,
+                )
+            out.append((list(time), data))
+
+        return out
+
     def load_province(self, field, province):
-        if self.data is None:
-            self.mount()
+        dfs = self.get_dataset("reports")
 
         print(f"Load data concerning {province} ...")
 
         rows = []
 
-        for df in self.data:
+        for df in dfs:
             row = df.loc[df["Province/State"] == province]
             if len(row) == 0:
                 raise RuntimeError(f"Sorry, province '{province}' does not exist.")
@@ -136,14 +248,13 @@ class LoaderWorld(Loader):
         return self.fetch_time_and_data(field, rows)
 
     def load_country(self, field, country):
-        if self.data is None:
-            self.mount()
+        dfs = self.get_dataset("reports")
 
         print(f"Load data concerning {country} ...")
 
         subdfs = []
 
-        for df in self.data:
+        for df in dfs:
             subdf = df.loc[df["Country/Region"] == country]
             if len(subdf) == 0:
                 raise RuntimeError(f"Sorry, country '{country}' does not exist.")
@@ -151,3 +262,17 @@ class LoaderWorld(Loader):
             subdfs.append(subdf)
 
         return self.fetch_time_and_data(field, subdfs)
+
+    def get_country_names(self):
+        dfs = self.get_dataset("reports")
+
+        return list(dfs[-1]["Country/Region"].unique())
+
+    def load_countries(self, field, countries=None):
+        dfs = self.get_dataset("reports")
+
+        countries = self.get_country_names() if countries is None else list(countries)
+
+        print(f"Load data concerning {len(countries)} countries ...")
+
+        return self.fetch_time_and_data_batch(field, dfs, countries)
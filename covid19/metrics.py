@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from covid19 import timing
+
+
+# the exported metrics, with their Prometheus type and help
+catalog = {
+    "covid19_update_duration_seconds": ("gauge", "Time spent updating a dataset."),
+    "covid19_update_bytes_pulled": (
+        "gauge",
+        "Growth in bytes of the git objects of a dataset during the update, "
+        "0 if they were repacked.",
+    ),
+    "covid19_update_files_changed": (
+        "gauge",
+        "Number of files changed by the update of a dataset.",
+    ),
+    "covid19_patch_duration_seconds": ("gauge", "Time spent patching a dataset."),
+    "covid19_patch_step_duration_seconds": (
+        "gauge",
+        "Time spent applying a single patch to a dataset.",
+    ),
+    "covid19_mount_duration_seconds": ("gauge", "Time spent mounting a dataset."),
+    "covid19_mount_rows": ("gauge", "Number of rows mounted."),
+    "covid19_mount_bytes": ("gauge", "Size in bytes of the files mounted."),
+    "covid19_render_cache_hits": ("gauge", "Figures found up to date."),
+    "covid19_render_cache_misses": ("gauge", "Figures to be rendered again."),
+    "covid19_render_cache_hit_ratio": (
+        "gauge",
+        "Fraction of the figures found up to date.",
+    ),
+    "covid19_figures_rendered": ("gauge", "Number of figures saved."),
+    "covid19_figures_save_seconds": ("gauge", "Time spent saving figures."),
+    "covid19_figures_bytes": ("gauge", "Size in bytes of the figures saved."),
+    "covid19_run_duration_seconds": ("gauge", "Duration of the run."),
+    "covid19_run_timestamp_seconds": ("gauge", "End of the run, as a Unix time."),
+}
+
+enabled = False
+filename = None
+output_format = None
+
+# the value of each metric and label set
+values = {}
+
+lock = threading.Lock()
+
+start_time = time.time()
+
+# the timing stages of the updaters, patchers and loaders, e.g. "LoaderItaly.mount"
+stage_pattern = re.compile(r"^(Updater|Patcher|Loader)(\w+)\.(\w+)$")
+
+
+def add(name, value, **labels):
+    """ Add `value` to the metric `name` with the given labels. """
+    if not enabled:
+        return
+
+    if name not in catalog:
+        raise RuntimeError(f"Metric {name} does not exist.")
+
+    key = (name, tuple(sorted(labels.items())))
+    with lock:
+        values[key] = values.get(key, 0) + value
+
+
+def record_stage(record):
+    """ Turn the timing records of the pipeline stages into metrics. """
+    if record["stage"] == "savefig":
+        add("covid19_figures_rendered", 1)
+        add("covid19_figures_save_seconds", record["wall"])
+        add("covid19_figures_bytes", record["bytes"] or 0)
+        return
+
+    match = stage_pattern.match(record["stage"])
+    if match is None:
+        return
+
+    kind, dataset, method = match.groups()
+    dataset = dataset.lower()
+
+    if kind == "Updater" and method == "run":
+        add("covid19_update_duration_seconds", record["wall"], dataset=dataset)
+    elif kind == "Patcher" and method == "run":
+        add("covid19_patch_duration_seconds", record["wall"], dataset=dataset)
+    elif kind == "Patcher":
+        add(
+            "covid19_patch_step_duration_seconds",
+            record["wall"],
+            dataset=dataset,
+            patch=method,
+        )
+    elif kind == "Loader" and method.startswith("mount"):
+        level = method[6:] or "all"
+        labels = {"dataset": dataset, "level": level}
+        add("covid19_mount_duration_seconds", record["wall"], **labels)
+        add("covid19_mount_rows", record["rows"] or 0, **labels)
+        add("covid19_mount_bytes", record["bytes"] or 0, **labels)
+
+
+def get_samples():
+    """ The list of `(name, labels, value)`, including the run-wide metrics. """
+    job = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+    now = time.time()
+
+    with lock:
+        samples = [
+            (name, dict(labels), value) for (name, labels), value in values.items()
+        ]
+
+    totals = {}
+    for name, _, value in samples:
+        totals[name] = totals.get(name, 0) + value
+
+    hits = totals.get("covid19_render_cache_hits", 0)
+    misses = totals.get("covid19_render_cache_misses", 0)
+    if hits + misses > 0:
+        samples.append(("covid19_render_cache_hit_ratio", {}, hits / (hits + misses)))
+
+    samples.append(("covid19_run_duration_seconds", {}, now - start_time))
+    samples.append(("covid19_run_timestamp_seconds", {}, now))
+
+    return [(name, dict(labels, job=job), value) for name, labels, value in samples]
+
+
+def escape(label):
+    return str(label).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_prometheus(samples):
+    lines = []
+
+    for name in catalog:
+        selected = [
+            (labels, value)
+            for sample_name, labels, value in samples
+            if sample_name == name
+        ]
+        if len(selected) == 0:
+            continue
+
+        kind, description = catalog[name]
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in selected:
+            content = ",".join(
+                f'{key}="{escape(label)}"' for key, label in sorted(labels.items())
+            )
+            lines.append(f"{name}{{{content}}} {value:.17g}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write():
+    """
+    Write the metrics of this run. A Prometheus textfile is replaced atomically,
+    as expected by the textfile collector of node_exporter; with JSON lines,
+    a line is appended for each run.
+    """
+    samples = get_samples()
+
+    if output_format == "prometheus":
+        tmp_filename = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp_filename, "w") as file:
+            file.write(format_prometheus(samples))
+        os.replace(tmp_filename, filename)
+    else:
+        line = {
+            "timestamp": time.time(),
+            "metrics": [
+                {"name": name, "labels": labels, "value": value}
+                for name, labels, value in samples
+            ],
+        }
+        with open(filename, "a") as file:
+            file.write(json.dumps(line) + "\n")
+
+
+def enable(output, fmt=None):
+    """
+    Collect the metrics of the run, and write them at exit to the file `output`.
+    The format `fmt` is either "prometheus" or "jsonl"; by default, it is
+    "prometheus" for files with the extension .prom, "jsonl" otherwise.
+    This also enables :mod:`covid19.timing`, which times the stages.
+    """
+    global enabled, filename, output_format
+
+    if fmt is None:
+        fmt = "prometheus" if output.endswith(".prom") else "jsonl"
+    if fmt not in ("prometheus", "jsonl"):
+        raise RuntimeError(f"Metrics format {fmt} does not exist.")
+
+    filename = output
+    output_format = fmt
+
+    if not enabled:
+        enabled = True
+        timing.listeners.append(record_stage)
+        timing.enable(summary=False)
+        atexit.register(write)
+
+
+# COVID19_METRICS=<filename> enables the metrics, in the format given by
+# COVID19_METRICS_FORMAT or by the extension of the file
+if os.environ.get("COVID19_METRICS", ""):
+    enable(os.environ["COVID19_METRICS"], os.environ.get("COVID19_METRICS_FORMAT"))
@@ -1,9 +1,214 @@
 # -*- coding: utf-8 -*-
-from matplotlib import rcParams
-import matplotlib.pyplot as plt
-import os
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import numpy as np
+import time
 
-from covid19 import plot_utils
+from covid19 import cache, plot_utils
+from covid19.utils import LazyModule
+
+
+# matplotlib is imported on first use
+mpl = LazyModule("matplotlib")
+animation = LazyModule("matplotlib.animation")
+plt = LazyModule("matplotlib.pyplot")
+textpath = LazyModule("matplotlib.textpath")
+ticker = LazyModule("matplotlib.ticker")
+transforms = LazyModule("matplotlib.transforms")
+
+
+def make_hashable(obj):
+    if isinstance(obj, (list, tuple)):
+        return tuple(make_hashable(item) for item in obj)
+    if isinstance(obj, dict):
+        return tuple(sorted((key, make_hashable(obj[key])) for key in obj))
+    if isinstance(obj, (set, frozenset)):
+        return frozenset(make_hashable(item) for item in obj)
+    return obj
+
+
+def get_loader_function_key(loader_fct):
+    """
+    Get a key identifying the request issued by a loader function, so that
+    e.g. two :class:`functools.partial` objects wrapping the same loader method
+    with the same arguments share the same key.
+    """
+    if isinstance(loader_fct, functools.partial):
+        key = (
+            loader_fct.func,
+            make_hashable(loader_fct.args),
+            make_hashable(loader_fct.keywords),
+        )
+    else:
+        key = loader_fct
+
+    try:
+        hash(key)
+    except TypeError:
+        key = id(loader_fct)
+
+    return key
+
+
+def get_loaders(loader_fcts):
+    """ Get the loaders the loader functions are bound to. """
+    from covid19.loader import Loader
+
+    loaders = []
+
+    for loader_fct in loader_fcts:
+        fct = (
+            loader_fct.func if isinstance(loader_fct, functools.partial) else loader_fct
+        )
+        loader = getattr(fct, "__self__", None)
+        if isinstance(loader, Loader) and all(loader is not ld for ld in loaders):
+            loaders.append(loader)
+
+    return loaders
+
+
+def is_same_data(data, other_data):
+    if len(data) != len(other_data):
+        return False
+
+    for (x, y), (other_x, other_y) in zip(data, other_data):
+        if list(x) != list(other_x):
+            return False
+        try:
+            if not np.array_equal(np.asarray(y), np.asarray(other_y), equal_nan=True):
+                return False
+        except TypeError:
+            if not np.array_equal(np.asarray(y), np.asarray(other_y)):
+                return False
+
+    return True
+
+
+def watch(
+    monitor, poll_interval=3600.0, max_polls=None, save_dest=None, profile="print"
+):
+    """
+    Keep the figure managed by a monitor up to date: every `poll_interval`
+    seconds, refresh the loaders the monitor draws on and, if new data arrived,
+    re-render only the panels whose series have changed.
+
+    Parameters
+    ----------
+    monitor : `Monitor` or `MonitorComposite`
+        The monitor.
+    poll_interval : `float`, optional
+        Seconds between two polls. Defaults to 3600.
+    max_polls : `int`, optional
+        Maximum number of polls. Defaults to `None`, i.e. poll forever.
+    save_dest : `str`, optional
+        If given, the figure is saved to this file every time it changes.
+    profile : `str` or `dict`, optional
+        The output profile; see :func:`covid19.plot_utils.save_figure`.
+    """
+    panels = monitor.get_panels()
+
+    data = monitor.load()
+    out_fig, _ = monitor.run(data=data, save_dest=save_dest, profile=profile)
+
+    polls = 0
+
+    while max_polls is None or polls < max_polls:
+        if monitor.interactive:
+            plt.pause(poll_interval)
+        else:
+            time.sleep(poll_interval)
+        polls += 1
+
+        # pull the new data, if any
+        changed = False
+        for loader in get_loaders(monitor.get_loader_functions()):
+            changed = loader.refresh() or changed
+        if not changed:
+            continue
+
+        new_data = monitor.load()
+
+        # re-render only the panels whose series have changed
+        rendered = False
+        start = 0
+        for panel in panels:
+            stop = start + len(panel.get_loader_functions())
+            if not is_same_data(data[start:stop], new_data[start:stop]):
+                print("Refresh the panel {} ...".format(panels.index(panel)))
+                panel.update(new_data[start:stop])
+                rendered = True
+            start = stop
+
+        data = new_data
+
+        if rendered and not (save_dest is None or save_dest == ""):
+            monitor.save_timings = plot_utils.save_figure(out_fig, save_dest, profile)
+
+
+def call_loader_function(loader_fct):
+    start = time.perf_counter()
+    out = loader_fct()
+    return out, time.perf_counter() - start
+
+
+def run_loaders(loader_fcts, max_workers=None):
+    """
+    Invoke the loader functions, possibly concurrently. Loader functions issuing
+    the same request are invoked only once, and share the output. Only the
+    queries of a :class:`covid19.loader.Loader`, e.g.
+    ``functools.partial(loader.run, field, region=region)``, are run in
+    threads, as the loaders synchronize their lazy mounts; other callables are
+    invoked in the calling thread.
+
+    Parameters
+    ----------
+    loader_fcts : Sequence[Callable]
+        The loader functions.
+    max_workers : `int`, optional
+        Maximum number of threads used to run the loader functions.
+        If 1, the loader functions are run sequentially in the calling thread.
+        Defaults to `None`, i.e. as many threads as loader queries.
+
+    Returns
+    -------
+    data : List[Tuple[Sequence, Sequence]]
+        The output of each loader function, in order.
+    timings : List[float]
+        The wall time in seconds taken by each loader function, in order.
+    """
+    keys = [get_loader_function_key(loader_fct) for loader_fct in loader_fcts]
+
+    # collect the unique requests
+    unique_fcts = {}
+    for key, loader_fct in zip(keys, loader_fcts):
+        unique_fcts.setdefault(key, loader_fct)
+
+    # only the queries of the loaders, which mount each dataset once even when
+    # queried concurrently, are run in threads; any other loader function is
+    # run in the calling thread
+    threaded = [key for key, fct in unique_fcts.items() if cache.get_loader(fct)]
+
+    if max_workers == 1 or len(threaded) <= 1:
+        outs = {key: call_loader_function(fct) for key, fct in unique_fcts.items()}
+    else:
+        max_workers = max_workers or len(threaded)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                key: executor.submit(call_loader_function, unique_fcts[key])
+                for key in threaded
+            }
+            outs = {
+                key: call_loader_function(fct)
+                for key, fct in unique_fcts.items()
+                if key not in futures
+            }
+            outs.update((key, future.result()) for key, future in futures.items())
+
+    # dispatch the outputs
+    data = [outs[key][0] for key in keys]
+    timings = [outs[key][1] for key in keys]
+
+    return data, timings
 
 
 class Monitor:
@@ -14,20 +219,54 @@ class Monitor:
         interactive=False,
         figure_properties=None,
         axes_properties=None,
+        max_workers=None,
     ):
         self.loader_fcts = loader_functions
         self.drawers = drawers
         self.interactive = interactive
         self.figure_properties = figure_properties or {}
         self.axes_properties = axes_properties or {}
+        self.max_workers = max_workers
+        self.loader_timings = []
+        self.save_timings = None
         self._figure = None
+        self._axes = None
+        self._background = None
+        self._animation = None
+        self._days = None
 
     @property
     def figure(self):
         self.set_figure()
         return self._figure
 
-    def run(self, fig=None, ax=None, save_dest=None, show=False):
+    def run(
+        self,
+        fig=None,
+        ax=None,
+        save_dest=None,
+        show=False,
+        data=None,
+        profile="print",
+        use_cache=False,
+    ):
+        # skip the rendering if the output is up to date
+        key = None
+        if use_cache and not (save_dest is None or save_dest == ""):
+            key = self.get_render_key(profile)
+            if cache.is_cached(save_dest, profile, key):
+                print(f"The figure {save_dest} is up to date.")
+                return None, None
+
+        # in interactive mode, refresh the existing artists in place
+        if self.interactive and fig is None and ax is None and self._axes is not None:
+            out_fig, out_ax = self.update(data)
+            if not (save_dest is None or save_dest == ""):
+                self.save_timings = plot_utils.save_figure(out_fig, save_dest, profile)
+                if use_cache:
+                    cache.store_key(save_dest, profile, key)
+            return out_fig, out_ax
+
         # set the private _figure attribute
         self.set_figure(fig)
 
@@ -48,14 +287,17 @@ class Monitor:
         if ax is None:
             out_ax.cla()
 
-        # load the data and draw
-        for loader_fct, drawer in zip(self.loader_fcts, self.drawers):
-            x, y = loader_fct()
+        # load the data, unless provided
+        if data is None:
+            data = self.load()
+
+        # draw
+        for (x, y), drawer in zip(data, self.drawers):
             drawer.draw(x, y, out_ax)
 
         # set axes properties
         if self.axes_properties != {}:
-            plot_utils.set_axes_properties(out_ax, **self.axes_properties)
+            plot_utils.set_axes_properties(out_ax, **self.get_axes_properties(data))
 
         # if figure is not provided, set figure properties
         if fig is None and self.figure_properties != {}:
@@ -63,8 +305,9 @@ class Monitor:
 
         # save
         if not (save_dest is None or save_dest == ""):
-            _, ext = os.path.splitext(save_dest)
-            plt.savefig(save_dest, format=ext[1:], dpi=1000)
+            self.save_timings = plot_utils.save_figure(out_fig, save_dest, profile)
+            if use_cache:
+                cache.store_key(save_dest, profile, key)
 
         # show
         if fig is None:
@@ -74,8 +317,187 @@ class Monitor:
             elif show:
                 plt.show()
 
+        # keep track of the axes for later in-place updates
+        self._axes = out_ax
+        self._background = None
+        self._days = len(data[0][0]) if len(data) > 0 else None
+
+        return out_fig, out_ax
+
+    def update(self, data=None):
+        """
+        Swap the new data into the artists drawn by the last call to :meth:`run`,
+        without rebuilding the figure. The view is rescaled only if the data limits
+        change; otherwise, only the data artists are redrawn, blitting them over
+        the cached background if the backend supports it.
+        """
+        if self._axes is None:
+            return self.run(data=data)
+
+        # load the data, unless provided
+        if data is None:
+            data = self.load()
+
+        ax = self._axes
+        old_limits = ax.dataLim.frozen()
+
+        # update the artists
+        artists = []
+        for (x, y), drawer in zip(data, self.drawers):
+            artists += drawer.update(x, y)
+
+        # rescale, if needed
+        ax.relim()
+        rescale = not np.allclose(ax.dataLim.bounds, old_limits.bounds)
+        if rescale:
+            ax.autoscale_view()
+
+        # place the ticks over the new days, if any
+        days = len(data[0][0]) if len(data) > 0 else None
+        retick = days != self._days and "x_ticklabels_step" in self.axes_properties
+        if retick:
+            self.set_time_ticks(ax, data)
+        self._days = days
+
+        self.refresh_canvas(artists, rescale or retick)
+
+        return ax.get_figure(), ax
+
+    def animate(self, save_dest=None, fps=5, dpi=100, data=None, show=False):
+        """
+        Animate the series day by day. The whole figure is drawn first, so that
+        the axes, ticks, grid, legend and title are set once for the full time
+        range; each frame then only redraws the data artists up to a given day.
+
+        Parameters
+        ----------
+        save_dest : `str`, optional
+            If given, the animation is saved to this ".gif" or ".mp4" file.
+        fps : `float`, optional
+            Frames per second. Defaults to 5.
+        dpi : `float`, optional
+            The resolution of the saved animation. Defaults to 100.
+        data : `List[Tuple[Sequence, Sequence]]`, optional
+            The data to animate. Defaults to the output of the loader functions.
+        show : `bool`, optional
+            `True` to play the animation on screen. Defaults to `False`.
+        """
+        # load the data, unless provided
+        if data is None:
+            data = self.load()
+
+        out_fig, out_ax = self.run(data=data)
+
+        frames = len(data[0][0])
+        artists = []
+        for (x, y), drawer in zip(data, self.drawers):
+            artists += drawer.draw_frame(x, y, frames - 1)
+
+        def update(index):
+            out = []
+            for (x, y), drawer in zip(data, self.drawers):
+                out += drawer.draw_frame(x, y, index)
+            return out
+
+        if not (save_dest is None or save_dest == ""):
+            elapsed = plot_utils.save_animation(
+                out_fig, artists, update, frames, save_dest, fps=fps, dpi=dpi
+            )
+            print(f"Saved {frames} frames to {save_dest} in {elapsed:.2f} s.")
+
+        if show:
+            # keep a reference to the animation, lest it be garbage-collected
+            self._animation = animation.FuncAnimation(
+                out_fig,
+                update,
+                frames=frames,
+                interval=1000.0 / fps,
+                blit=True,
+            )
+            plt.show()
+
         return out_fig, out_ax
 
+    def refresh_canvas(self, artists, full_redraw=False):
+        fig = self._axes.get_figure()
+        canvas = fig.canvas
+
+        if full_redraw or not getattr(canvas, "supports_blit", False):
+            self._background = None
+            canvas.draw_idle()
+            return
+
+        # cache the background, i.e. the axes without the data artists
+        bbox = self._axes.bbox
+        if self._background is None or self._background[0] != bbox.bounds:
+            for artist in artists:
+                artist.set_visible(False)
+            canvas.draw()
+            self._background = (bbox.bounds, canvas.copy_from_bbox(bbox))
+            for artist in artists:
+                artist.set_visible(True)
+
+        # blit the data artists over the background
+        canvas.restore_region(self._background[1])
+        for artist in artists:
+            self._axes.draw_artist(artist)
+        canvas.blit(bbox)
+        canvas.flush_events()
+
+    def get_axes_properties(self, data):
+        """
+        Resolve the special axes property "x_ticklabels_step" into ticks and
+        labels placed every so many days along the time axis of the first series.
+        """
+        axes_properties = self.axes_properties.copy()
+
+        step = axes_properties.pop("x_ticklabels_step", None)
+        if step is not None and len(data) > 0:
+            time = list(data[0][0])
+            axes_properties.setdefault("x_ticks", time[::step])
+            axes_properties.setdefault("x_ticklabels", time[::step])
+
+        return axes_properties
+
+    def set_time_ticks(self, ax, data):
+        """ Apply the ticks and labels resolved from "x_ticklabels_step" to `ax`. """
+        axes_properties = self.get_axes_properties(data)
+        ax.set_xticks(axes_properties["x_ticks"])
+        ax.set_xticklabels(
+            axes_properties["x_ticklabels"],
+            rotation=axes_properties.get("x_ticklabels_rotation", 0),
+        )
+
+    def get_loader_functions(self):
+        return list(self.loader_fcts)
+
+    def get_render_spec(self):
+        return {
+            "drawers": [
+                {"class": type(drawer).__name__, "properties": drawer.properties}
+                for drawer in self.drawers
+            ],
+            "figure_properties": self.figure_properties,
+            "axes_properties": self.axes_properties,
+        }
+
+    def get_render_key(self, profile="print"):
+        return cache.get_render_key(
+            self.get_render_spec(), self.get_loader_functions(), profile
+        )
+
+    def get_panels(self):
+        return [self]
+
+    def watch(
+        self, poll_interval=3600.0, max_polls=None, save_dest=None, profile="print"
+    ):
+        watch(self, poll_interval, max_polls, save_dest, profile)
+
+    def load(self):
+        data, self.loader_timings = run_loaders(self.loader_fcts, self.max_workers)
+        return data
+
     def set_figure(self, fig=None):
         if fig is not None:
             self._figure = None
@@ -87,35 +509,78 @@ class Monitor:
         if self.interactive:
             plt.ion()
             if self._figure is not None:
-                rcParams["font.size"] = fontsize
+                mpl.rcParams["font.size"] = fontsize
                 self._figure = plt.figure(figsize=figsize)
         else:
             plt.ioff()
-            rcParams["font.size"] = fontsize
+            mpl.rcParams["font.size"] = fontsize
             self._figure = (
                 plt.figure(figsize=figsize) if self._figure is None else self._figure
             )
 
 
 class MonitorComposite:
-    def __init__(self, slaves, nrows, ncols, interactive=False, figure_properties=None):
+    def __init__(
+        self,
+        slaves,
+        nrows,
+        ncols,
+        interactive=False,
+        figure_properties=None,
+        max_workers=None,
+    ):
         self.slaves = slaves
         self.nrows = nrows
         self.ncols = ncols
         assert len(slaves) == nrows * ncols
         self.interactive = interactive
         self.figure_properties = figure_properties or {}
+        self.max_workers = max_workers
+        self.loader_timings = []
+        self.save_timings = None
         self._figure = None
+        self._axes = []
 
     @property
     def figure(self):
         self.set_figure()
         return self._figure
 
-    def run(self, fig=None, ax=None, save_dest=None, show=False):
+    def run(
+        self,
+        fig=None,
+        ax=None,
+        save_dest=None,
+        show=False,
+        data=None,
+        profile="print",
+        use_cache=False,
+    ):
+        # skip the rendering if the output is up to date
+        key = None
+        if use_cache and not (save_dest is None or save_dest == ""):
+            key = self.get_render_key(profile)
+            if cache.is_cached(save_dest, profile, key):
+                print(f"The figure {save_dest} is up to date.")
+                return None, None
+
         # set the private _figure attribute
         self.set_figure(fig)
 
+        # remove the panels drawn on this figure by a previous run, lest the
+        # new panels be stacked over them
+        target = fig if fig is not None else self._figure
+        for old_ax in self._axes:
+            if target is not None and old_ax in target.get_axes():
+                old_ax.remove()
+        self._axes = []
+
+        # load the data of all slaves at once, unless provided
+        if data is None:
+            data = self.load()
+
+        start = 0
+
         for index, slave in enumerate(self.slaves):
             # retrieve figure and axes
             out_fig, out_ax = plot_utils.get_figure_and_axes(
@@ -129,7 +594,11 @@ class MonitorComposite:
             )
 
             # invoke the slaves
-            slave.run(fig=out_fig, ax=out_ax, show=False)
+            stop = start + len(slave.get_loader_functions())
+            slave.run(fig=out_fig, ax=out_ax, show=False, data=data[start:stop])
+            start = stop
+
+            self._axes.append(out_ax)
 
         # if figure is not provided, set figure properties
         if fig is None and self.figure_properties != {}:
@@ -137,8 +606,9 @@ class MonitorComposite:
 
         # save
         if not (save_dest is None or save_dest == ""):
-            _, ext = os.path.splitext(save_dest)
-            plt.savefig(save_dest, format=ext[1:], dpi=1000)
+            self.save_timings = plot_utils.save_figure(out_fig, save_dest, profile)
+            if use_cache:
+                cache.store_key(save_dest, profile, key)
 
         # show
         if fig is None:
@@ -150,6 +620,40 @@ class MonitorComposite:
 
         return out_fig, out_ax
 
+    def get_loader_functions(self):
+        return [
+            loader_fct
+            for slave in self.slaves
+            for loader_fct in slave.get_loader_functions()
+        ]
+
+    def get_panels(self):
+        return list(self.slaves)
+
+    def get_render_spec(self):
+        return {
+            "nrows": self.nrows,
+            "ncols": self.ncols,
+            "figure_properties": self.figure_properties,
+            "slaves": [slave.get_render_spec() for slave in self.slaves],
+        }
+
+    def get_render_key(self, profile="print"):
+        return cache.get_render_key(
+            self.get_render_spec(), self.get_loader_functions(), profile
+        )
+
+    def load(self):
+        data, self.loader_timings = run_loaders(
+            self.get_loader_functions(), self.max_workers
+        )
+        return data
+
+    def watch(
+        self, poll_interval=3600.0, max_polls=None, save_dest=None, profile="print"
+    ):
+        watch(self, poll_interval, max_polls, save_dest, profile)
+
     def set_figure(self, fig=None):
         if fig is not None:
             self._figure = None
@@ -161,11 +665,361 @@ class MonitorComposite:
         if self.interactive:
             plt.ion()
             if self._figure is not None:
-                rcParams["font.size"] = fontsize
+                mpl.rcParams["font.size"] = fontsize
                 self._figure = plt.figure(figsize=figsize)
         else:
             plt.ioff()
-            rcParams["font.size"] = fontsize
+            mpl.rcParams["font.size"] = fontsize
             self._figure = (
                 plt.figure(figsize=figsize) if self._figure is None else self._figure
             )
+
+
+class MonitorSmallMultiples:
+    """
+    Draw the rows of a single batch query, e.g. one field for all provinces,
+    as a grid of small panels sharing both axes. The panels can be grouped,
+    e.g. by region: each group starts a new row of the grid, and its name
+    labels the first panel of the row.
+
+    Unlike :class:`MonitorComposite`, the panels are not backed by monitors
+    of their own: all axes are created at once, the shared tick locators,
+    formatters, scales and limits are set on one panel only, and the other
+    panels are just drawn.
+
+    The available axes properties are:
+
+        * "fontsize": the fontsize; defaults to 10;
+        * "x_ticklabels_step": the days between two consecutive ticks;
+            defaults to the fewest weeks for which the tick labels fit the
+            width of the panels, i.e. get sparser as the columns get narrower;
+        * "x_ticklabels_rotation": the rotation of the tick labels; defaults to 0;
+        * "x_label", "y_label": the labels of the axes, shared by all panels;
+        * "x_lim", "y_lim": the limits of the axes;
+        * "y_scale": the y-axis scale; defaults to "linear";
+        * "grid_on": `True` to draw the grid; defaults to `False`;
+        * "grid_properties": keyword arguments for
+            :meth:`matplotlib.axes.Axes.grid`;
+        * "title": the title of the figure.
+
+    The drawer properties are the keyword arguments accepted by
+    :func:`covid19.plot_utils.make_lineplot`.
+    """
+
+    def __init__(
+        self,
+        loader_function,
+        names,
+        groups=None,
+        ncols=None,
+        interactive=False,
+        figure_properties=None,
+        axes_properties=None,
+        drawer_properties=None,
+    ):
+        self.loader_fct = loader_function
+        self.names = list(names)
+        self.groups = groups
+        self.ncols = ncols
+        self.interactive = interactive
+        self.axes_properties = axes_properties or {}
+        self.drawer_properties = drawer_properties or {}
+        self.loader_timings = []
+        self.save_timings = None
+        self.lines = []
+
+        # by default, size the figure after the grid
+        _, _, nrows, ncols = self.get_layout()
+        self.figure_properties = {
+            "figsize": (1.8 * ncols, 1.4 * nrows),
+            "tight_layout": False,
+        }
+        self.figure_properties.update(figure_properties or {})
+
+    def get_layout(self):
+        """
+        Get the position (row, column) of the panel of each name, and the
+        size of the grid.
+        """
+        if self.groups is None:
+            groups = [(None, self.names)]
+        else:
+            groups = [
+                (group, [name for name in names if name in self.names])
+                for group, names in self.groups.items()
+            ]
+            groups = [(group, names) for group, names in groups if len(names) > 0]
+
+        ncols = self.ncols or (
+            max(len(names) for _, names in groups)
+            if self.groups is not None
+            else int(np.ceil(np.sqrt(len(self.names))))
+        )
+
+        positions = {}
+        row_labels = {}
+        row = 0
+        for group, names in groups:
+            row_labels[row] = group
+            for index, name in enumerate(names):
+                positions[name] = (row + index // ncols, index % ncols)
+            row += -(-len(names) // ncols)
+
+        return positions, row_labels, row, ncols
+
+    def run(
+        self,
+        fig=None,
+        ax=None,
+        save_dest=None,
+        show=False,
+        data=None,
+        profile="print",
+        use_cache=False,
+    ):
+        # skip the rendering if the output is up to date
+        key = None
+        if use_cache and not (save_dest is None or save_dest == ""):
+            key = self.get_render_key(profile)
+            if cache.is_cached(save_dest, profile, key):
+                print(f"The figure {save_dest} is up to date.")
+                return None, None
+
+        # load the data, unless provided
+        if data is None:
+            data = self.load()
+        time, values = data[0]
+        values = np.asarray(values, dtype=float)
+
+        positions, row_labels, nrows, ncols = self.get_layout()
+
+        # create the axes of the panels only
+        fontsize = self.axes_properties.get("fontsize", 10)
+        mpl.rcParams["font.size"] = fontsize
+        new_figure = fig is None
+        if new_figure:
+            if self.interactive:
+                plt.ion()
+            else:
+                plt.ioff()
+            fig = plt.figure(figsize=self.figure_properties["figsize"])
+        gridspec = fig.add_gridspec(nrows, ncols, **self.get_margins(fig))
+
+        # draw, with the days as integer positions along the x-axis
+        x = np.arange(len(time))
+        axes = {}
+        self.lines = []
+        for name, (row, col) in positions.items():
+            out_ax = fig.add_subplot(gridspec[row, col])
+            self.lines += plot_utils.make_lineplot(
+                x, values[self.names.index(name)], out_ax, **self.drawer_properties
+            )
+            out_ax.set_title(name, fontsize=fontsize, pad=2)
+            axes[row, col] = out_ax
+
+        # compute the limits, ticks and tick labels once...
+        formatting = self.get_axes_formatting(list(axes.values()), time)
+
+        # ...and copy them to all panels, labelling only the outer ones
+        grid_on = self.axes_properties.get("grid_on", False)
+        grid_properties = self.axes_properties.get("grid_properties", None) or {}
+        rotation = self.axes_properties.get("x_ticklabels_rotation", 0)
+        for (row, col), out_ax in axes.items():
+            self.set_axes_formatting(out_ax, formatting)
+            if grid_on:
+                out_ax.grid(True, **grid_properties)
+            out_ax.tick_params(
+                labelsize=fontsize,
+                labelbottom=(row + 1, col) not in axes,
+                labelleft=col == 0,
+            )
+            out_ax.tick_params(axis="x", labelrotation=rotation)
+            if col == 0 and row_labels.get(row, None) is not None:
+                out_ax.set_ylabel(row_labels[row], fontsize=fontsize)
+
+        if "x_label" in self.axes_properties:
+            fig.supxlabel(self.axes_properties["x_label"], fontsize=fontsize)
+        if "y_label" in self.axes_properties:
+            fig.supylabel(self.axes_properties["y_label"], fontsize=fontsize)
+        if "title" in self.axes_properties:
+            fig.suptitle(self.axes_properties["title"], fontsize=fontsize + 2)
+
+        # if figure is not provided, set figure properties
+        if new_figure and self.figure_properties != {}:
+            plot_utils.set_figure_properties(fig, **self.figure_properties)
+
+        # save
+        if not (save_dest is None or save_dest == ""):
+            self.save_timings = plot_utils.save_figure(fig, save_dest, profile)
+            if use_cache:
+                cache.store_key(save_dest, profile, key)
+
+        # show
+        if new_figure:
+            if self.interactive:
+                fig.canvas.draw()
+                plt.show(block=False)
+            elif show:
+                plt.show()
+
+        return fig, list(axes.values())
+
+    def get_margins(self, fig):
+        # fixed margins in inches, so that no layout engine needs to measure
+        # the panels one by one
+        width, height = fig.get_size_inches()
+        left = 1.3 if self.groups is not None else 0.9
+        hspace = 0.45 if self.axes_properties.get("x_ticklabels_rotation", 0) else 0.3
+        return {
+            "left": min(left / width, 0.3),
+            "right": 1.0 - min(0.2 / width, 0.1),
+            "bottom": min(0.9 / height, 0.3),
+            "top": 1.0 - min(0.8 / height, 0.2),
+            "wspace": 0.15,
+            "hspace": hspace,
+        }
+
+    def get_axes_formatting(self, axes, time):
+        """
+        Compute the scale, limits, ticks and tick labels common to all panels,
+        using the first panel as a template.
+        """
+        ax = axes[0]
+
+        # the data limits of all panels
+        ax.set_yscale(self.axes_properties.get("y_scale", "linear"))
+        ax.dataLim.set(transforms.Bbox.union([out_ax.dataLim for out_ax in axes]))
+        ax.ignore_existing_data_limits = False
+        # the limits set by a previous formatting turned the autoscaling off
+        ax.set_autoscale_on(True)
+        ax.autoscale_view()
+        if "x_lim" in self.axes_properties:
+            ax.set_xlim(self.axes_properties["x_lim"])
+        if "y_lim" in self.axes_properties:
+            ax.set_ylim(self.axes_properties["y_lim"])
+
+        step = self.axes_properties.get("x_ticklabels_step", None)
+        if step is None:
+            step = self.get_ticklabels_step(ax, time)
+        x_ticks = np.arange(0, len(time), step)
+
+        y_lim = ax.get_ylim()
+        y_ticks = [
+            tick
+            for tick in ax.yaxis.get_majorticklocs()
+            if min(y_lim) <= tick <= max(y_lim)
+        ]
+
+        return {
+            "y_scale": ax.get_yscale(),
+            "x_lim": ax.get_xlim(),
+            "y_lim": y_lim,
+            "x_ticks": x_ticks,
+            "x_ticklabels": [time[tick] for tick in x_ticks],
+            "y_ticks": y_ticks,
+            "y_ticklabels": ax.yaxis.get_major_formatter().format_ticks(y_ticks),
+        }
+
+    def get_ticklabels_step(self, ax, time):
+        """
+        Get the smallest number of weeks between two consecutive ticks for
+        which the tick labels of `ax`, and those of the panels beside it, do
+        not overlap.
+        """
+        if len(time) == 0:
+            return 7
+
+        # the horizontal room taken by a label, plus a blank character
+        fontsize = self.axes_properties.get("fontsize", 10)
+        rotation = np.deg2rad(self.axes_properties.get("x_ticklabels_rotation", 0))
+        label = max((str(day) for day in time), key=len) + "0"
+        extents = textpath.TextPath((0, 0), label, size=fontsize).get_extents()
+        width, height = extents.width, fontsize
+        if np.isclose(np.sin(rotation), 0.0):
+            room = width
+        elif np.isclose(np.cos(rotation), 0.0):
+            room = height
+        else:
+            room = min(width / abs(np.cos(rotation)), height / abs(np.sin(rotation)))
+
+        # the width of a day and of the gap between two panels, in points
+        fig = ax.get_figure()
+        x_lim = sorted(ax.get_xlim())
+        panel_width = ax.get_position().width * fig.get_size_inches()[0] * 72
+        day_width = panel_width / max(x_lim[1] - x_lim[0], 1)
+        gridspec = ax.get_subplotspec().get_gridspec()
+        gap = gridspec.get_subplot_params(fig).wspace * panel_width
+        margins = max(x_lim[1] - (len(time) - 1), 0) + max(-x_lim[0], 0)
+
+        # the last label of a panel also needs room from the first label of the
+        # panel beside it, across the margins and the gap
+        weeks = max(int(np.ceil(room / day_width / 7)), 1)
+        while (
+            7 * weeks < len(time)
+            and ((len(time) - 1) % (7 * weeks) + margins) * day_width + gap < room
+        ):
+            weeks += 1
+
+        return 7 * weeks
+
+    @staticmethod
+    def set_axes_formatting(ax, formatting):
+        ax.set_yscale(formatting["y_scale"])
+        ax.set_xlim(formatting["x_lim"])
+        ax.set_ylim(formatting["y_lim"])
+        ax.xaxis.set_major_locator(ticker.FixedLocator(formatting["x_ticks"]))
+        ax.xaxis.set_major_formatter(ticker.FixedFormatter(formatting["x_ticklabels"]))
+        ax.xaxis.set_minor_locator(ticker.NullLocator())
+        ax.yaxis.set_major_locator(ticker.FixedLocator(formatting["y_ticks"]))
+        ax.yaxis.set_major_formatter(ticker.FixedFormatter(formatting["y_ticklabels"]))
+        ax.yaxis.set_minor_locator(ticker.NullLocator())
+
+    def update(self, data=None):
+        # load the data, unless provided
+        if data is None:
+            data = self.load()
+        time, values = data[0]
+        values = np.asarray(values, dtype=float)
+
+        positions, _, _, _ = self.get_layout()
+        axes = []
+        for line, name in zip(self.lines, positions):
+            line.set_data(np.arange(len(time)), values[self.names.index(name)])
+            line.axes.relim()
+            axes.append(line.axes)
+
+        if len(axes) > 0:
+            formatting = self.get_axes_formatting(axes, time)
+            for ax in axes:
+                self.set_axes_formatting(ax, formatting)
+            axes[0].get_figure().canvas.draw_idle()
+
+    def get_loader_functions(self):
+        return [self.loader_fct]
+
+    def get_panels(self):
+        return [self]
+
+    def get_render_spec(self):
+        return {
+            "names": self.names,
+            "groups": self.groups,
+            "ncols": self.ncols,
+            "figure_properties": self.figure_properties,
+            "axes_properties": self.axes_properties,
+            "drawer_properties": self.drawer_properties,
+        }
+
+    def get_render_key(self, profile="print"):
+        return cache.get_render_key(
+            self.get_render_spec(), self.get_loader_functions(), profile
+        )
+
+    def load(self):
+        data, self.loader_timings = run_loaders([self.loader_fct])
+        return data
+
+    def watch(
+        self, poll_interval=3600.0, max_polls=None, save_dest=None, profile="print"
+    ):
+        watch(self, poll_interval, max_polls, save_dest, profile)
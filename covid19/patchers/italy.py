@@ -1,9 +1,17 @@
 # -*- coding: utf-8 -*-
+import csv
+import numpy as np
+import os
+import pandas as pd
+import pathlib
+
+from covid19 import config, timing
 from covid19.patcher import Patcher, registry
 
 
 @registry("italy")
 class PatcherItaly(Patcher):
+    # canonical schemas, i.e. the most recent DPC headers
     columns_country = {
         "data": 0,
         "stato": 1,
@@ -11,12 +19,16 @@ class PatcherItaly(Patcher):
         "terapia_intensiva": 3,
         "totale_ospedalizzati": 4,
         "isolamento_domiciliare": 5,
-        "totale_attualmente_positivi": 6,
-        "nuovi_attualmente_positivi": 7,
-        "dimessi_guariti": 8,
-        "deceduti": 9,
-        "totale_casi": 10,
-        "tamponi": 11,
+        "totale_positivi": 6,
+        "variazione_totale_positivi": 7,
+        "nuovi_positivi": 8,
+        "dimessi_guariti": 9,
+        "deceduti": 10,
+        "totale_casi": 11,
+        "tamponi": 12,
+        "casi_testati": 13,
+        "note_it": 14,
+        "note_en": 15,
     }
     columns_region = {
         "data": 0,
@@ -29,12 +41,16 @@ class PatcherItaly(Patcher):
         "terapia_intensiva": 7,
         "totale_ospedalizzati": 8,
         "isolamento_domiciliare": 9,
-        "totale_attualmente_positivi": 10,
-        "nuovi_attualmente_positivi": 11,
-        "dimessi_guariti": 12,
-        "deceduti": 13,
-        "totale_casi": 14,
-        "tamponi": 15,
+        "totale_positivi": 10,
+        "variazione_totale_positivi": 11,
+        "nuovi_positivi": 12,
+        "dimessi_guariti": 13,
+        "deceduti": 14,
+        "totale_casi": 15,
+        "tamponi": 16,
+        "casi_testati": 17,
+        "note_it": 18,
+        "note_en": 19,
     }
     columns_province = {
         "data": 0,
@@ -47,9 +63,122 @@ class PatcherItaly(Patcher):
         "lat": 7,
         "long": 8,
         "totale_casi": 9,
+        "note_it": 10,
+        "note_en": 11,
+    }
+
+    # historical column names and their canonical counterparts
+    aliases = {
+        "totale_attualmente_positivi": "totale_positivi",
+        "nuovi_attualmente_positivi": "variazione_totale_positivi",
     }
 
+    # column-index mappings, one per header signature and canonical schema
+    mappings = {}
+
+    @timing.timed()
     def run(self):
-        pass
+        PatcherItaly.harmonize_headers()
+
+    @staticmethod
+    def get_canonical_name(field):
+        for old, new in PatcherItaly.aliases.items():
+            if field.endswith(old):
+                return field[: -len(old)] + new
+        return field
+
+    @staticmethod
+    def get_mapping(header, columns):
+        """
+        Cast `header` onto the canonical schema `columns`, followed by the columns
+        of `header` unknown to the schema, e.g. those added by DPC later on.
+        Return the names of the resulting columns and, for each of them, the
+        index of the matching column in `header`, or -1 if `header` lacks it.
+        The mapping is computed once per header signature; `None` means that
+        `header` already conforms to the canonical schema.
+        """
+        key = (tuple(header), tuple(columns))
+
+        if key not in PatcherItaly.mappings:
+            positions = {}
+            for idx, name in enumerate(header):
+                positions[PatcherItaly.aliases.get(name, name)] = idx
+
+            extra = [name for name in positions if name not in columns]
+            names = tuple(columns) + tuple(extra)
+            mapping = tuple(positions.get(name, -1) for name in names)
+
+            if names == key[0]:
+                PatcherItaly.mappings[key] = None
+            else:
+                PatcherItaly.mappings[key] = (names, mapping)
+
+        return PatcherItaly.mappings[key]
+
+    @staticmethod
+    def harmonize(df, columns):
+        """
+        Cast a :class:`pandas.DataFrame` onto the canonical schema `columns`,
+        keeping the unknown columns after the canonical ones.
+        """
+        out = PatcherItaly.get_mapping(df.columns, columns)
+
+        if out is None:
+            return df
+
+        names, mapping = out
+        return pd.DataFrame(
+            {
+                name: df.iloc[:, idx] if idx >= 0 else np.nan
+                for name, idx in zip(names, mapping)
+            },
+            index=df.index,
+        )
+
+    @staticmethod
+    @timing.timed()
+    def harmonize_headers():
+        print("Apply patch harmonize_headers ...")
+
+        datasets = (
+            (
+                "dati-andamento-nazionale",
+                "dpc-covid19-ita-andamento-nazionale-*.csv",
+                PatcherItaly.columns_country,
+            ),
+            (
+                "dati-regioni",
+                "dpc-covid19-ita-regioni-*.csv",
+                PatcherItaly.columns_region,
+            ),
+            (
+                "dati-province",
+                "dpc-covid19-ita-province-*.csv",
+                PatcherItaly.columns_province,
+            ),
+        )
+
+        for subdir, pattern, columns in datasets:
+            dir = os.path.join(config.repo_italy_dir, subdir)
+            filenames = pathlib.Path(dir).glob(pattern)
+            filenames = sorted(filenames)
+
+            for filename in filenames:
+                with open(str(filename), "r") as file:
+                    csv_reader_data = list(csv.reader(file, delimiter=","))
+
+                if len(csv_reader_data) == 0:
+                    continue
 
+                out = PatcherItaly.get_mapping(csv_reader_data[0], columns)
+                if out is None:
+                    continue
 
+                names, mapping = out
+                with open(str(filename), "w") as file:
+                    csv_writer = csv.writer(file, delimiter=",")
+                    csv_writer.writerow(list(names))
+                    for row in csv_reader_data[1:]:
+                        csv_writer.writerow(
+                            [row[idx] if idx >= 0 else "" for idx in mapping]
+                        )
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
+from covid19 import timing
 from covid19.patcher import Patcher, registry
 
 
 @registry("switzerland")
 class PatcherSwitzerland(Patcher):
+    @timing.timed()
     def run(self):
         pass
@@ -3,7 +3,7 @@ import csv
 import os
 import pathlib
 
-from covid19 import config
+from covid19 import config, timing
 from covid19.patcher import Patcher, registry
 
 
@@ -20,6 +20,7 @@ class PatcherWorld(Patcher):
         "Longitude": 7,
     }
 
+    @timing.timed()
     def run(self):
         PatcherWorld.replace_mainland_china()
         PatcherWorld.fill_header()
@@ -27,6 +28,7 @@ class PatcherWorld(Patcher):
         PatcherWorld.check_date()
 
     @staticmethod
+    @timing.timed()
     def check_date():
         print("Apply patch check_date ...")
 
@@ -57,6 +59,7 @@ class PatcherWorld(Patcher):
                 csv_writer.writerows(csv_data)
 
     @staticmethod
+    @timing.timed()
     def fill_data():
         print("Apply patch fill_data ...")
 
@@ -105,6 +108,7 @@ class PatcherWorld(Patcher):
                     csv_writer.writerow([elem[0], elem[1], date, 0, 0, 0, 0.0, 0.0])
 
     @staticmethod
+    @timing.timed()
     def fill_header():
         print("Apply patch fill_header ...")
 
@@ -128,6 +132,7 @@ class PatcherWorld(Patcher):
                 csv_writer.writerows(csv_reader_data)
 
     @staticmethod
+    @timing.timed()
     def replace_mainland_china():
         print("Apply patch replace_mainland_china ...")
 
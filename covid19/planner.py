@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import functools
+import numpy as np
+
+from covid19.loader import Loader
+from covid19.monitor import run_loaders
+
+
+def get_query(loader_fct):
+    """
+    Inspect a loader function of the form
+    ``functools.partial(loader.run, field, <level>=<name or names>)``.
+
+    Return the tuple `(loader, field, level, names)` if the request can be
+    served by a batch query, `None` otherwise.
+    """
+    if not isinstance(loader_fct, functools.partial):
+        return None
+
+    loader = getattr(loader_fct.func, "__self__", None)
+    if not isinstance(loader, Loader) or loader_fct.func.__name__ != "run":
+        return None
+    if len(loader_fct.args) != 1:
+        return None
+
+    levels = [
+        (level, value)
+        for level, value in loader_fct.keywords.items()
+        if value is not None
+    ]
+    if len(levels) != 1 or levels[0][0] not in loader.batch_levels:
+        return None
+
+    level, value = levels[0]
+    names = tuple(value) if isinstance(value, (list, tuple)) else value
+
+    return loader, loader_fct.args[0], level, names
+
+
+def plan(loader_fcts):
+    """
+    Group the requests issued by the loader functions by loader and level, so
+    that each group is served by a single batch query, i.e. a single scan over
+    the dataset for all the fields requested (see
+    :meth:`covid19.loader.Loader.run_batch`).
+
+    Return the list of loader functions to invoke, and for each input loader
+    function the tuple `(index, position, rows)`, where `index` is the position
+    of the loader function serving the request, `position` the field of its
+    output to pick and `rows` the rows of this field to pick (both `None` to
+    take the output as is).
+    """
+    queries = [get_query(loader_fct) for loader_fct in loader_fcts]
+
+    # collect the fields and the names requested for each (loader, level)
+    groups = {}
+    for query in queries:
+        if query is not None:
+            loader, field, level, names = query
+            names = names if isinstance(names, tuple) else (names,)
+            fields, group = groups.setdefault((loader, level), ([], []))
+            if field not in fields:
+                fields.append(field)
+            group += [name for name in names if name not in group]
+
+    planned_fcts = []
+    batches = {}
+    for (loader, level), (fields, names) in groups.items():
+        # a single request is better served by an ordinary query
+        if len(fields) > 1 or len(names) > 1:
+            batches[(loader, level)] = (len(planned_fcts), fields, names)
+            planned_fcts.append(
+                functools.partial(loader.run_batch, list(fields), level, list(names))
+            )
+
+    dispatch = []
+    for loader_fct, query in zip(loader_fcts, queries):
+        if query is not None and (query[0], query[2]) in batches:
+            index, fields, names = batches[(query[0], query[2])]
+            if isinstance(query[3], tuple):
+                rows = [names.index(name) for name in query[3]]
+            else:
+                rows = names.index(query[3])
+            dispatch.append((index, fields.index(query[1]), rows))
+        else:
+            dispatch.append((len(planned_fcts), None, None))
+            planned_fcts.append(loader_fct)
+
+    return planned_fcts, dispatch
+
+
+def run_planned_loaders(loader_fcts, max_workers=None):
+    """
+    Same as :func:`covid19.monitor.run_loaders`, but the requests for the same
+    dataset are merged into one batch query per loader and level, i.e. a single
+    scan over the dataset for all the fields and entities requested.
+
+    Note that, unlike an ordinary query, a batch query does not fail for names
+    which do not exist in the dataset, but returns NaNs.
+    """
+    planned_fcts, dispatch = plan(loader_fcts)
+
+    print(f"Serve {len(loader_fcts)} requests with {len(planned_fcts)} queries ...")
+
+    planned_data, planned_timings = run_loaders(planned_fcts, max_workers)
+
+    data = []
+    timings = []
+    for index, position, rows in dispatch:
+        out = planned_data[index]
+        if position is not None:
+            out = out[position]
+        time, values = out
+        if rows is not None:
+            values = np.asarray(values)[rows]
+        data.append((time, values))
+        timings.append(planned_timings[index])
+
+    return data, timings
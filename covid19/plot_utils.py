@@ -1,12 +1,35 @@
 # -*- coding: utf-8 -*-
-from matplotlib import rc, rcParams
-from matplotlib.colors import LinearSegmentedColormap
-from matplotlib.offsetbox import AnchoredText
-import matplotlib.patches as patches
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FormatStrFormatter
+from __future__ import annotations
+
 import numpy as np
-from typing import Optional, Sequence, Tuple
+import os
+import subprocess
+import time
+import weakref
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from covid19 import timing
+from covid19.utils import LazyModule
+
+# matplotlib is imported on first use
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+else:
+    plt = LazyModule("matplotlib.pyplot")
+mpl = LazyModule("matplotlib")
+animation = LazyModule("matplotlib.animation")
+backend_agg = LazyModule("matplotlib.backends.backend_agg")
+offsetbox = LazyModule("matplotlib.offsetbox")
+ticker = LazyModule("matplotlib.ticker")
 
 
 text_locations = {
@@ -45,6 +68,33 @@ linestyle_dict = {
 }
 
 
+output_profiles = {
+    "web": {
+        "dpi": 72,
+        "format": "png",
+        "rasterize_threshold": None,
+        "compress_level": 9,
+    },
+    "report": {
+        "dpi": 200,
+        "format": "png",
+        "rasterize_threshold": None,
+        "compress_level": 6,
+    },
+    "print": {
+        "dpi": 1000,
+        "format": "pdf",
+        "rasterize_threshold": 5000,
+        "compress_level": 6,
+    },
+}
+
+
+# the full series of the lines downsampled to the width of their axes, so that
+# save_figure can downsample them again for the resolution of the output
+downsampled_series = weakref.WeakKeyDictionary()
+
+
 def get_figure_and_axes(
     fig: Optional[plt.Figure] = None,
     ax: Optional[plt.Axes] = None,
@@ -122,7 +172,7 @@ def get_figure_and_axes(
     fontsize = kwargs.get("fontsize", 12)
     projection = kwargs.get("projection", None)
 
-    rcParams["font.size"] = fontsize
+    mpl.rcParams["font.size"] = fontsize
 
     if (fig is not None) and (ax is not None):
         try:
@@ -247,7 +297,7 @@ def set_figure_properties(fig: plt.Figure, **kwargs) -> None:
     wspace = kwargs.get("subplots_adjust_wspace", None)
     hspace = kwargs.get("subplots_adjust_hspace", None)
 
-    rcParams["font.size"] = fontsize
+    mpl.rcParams["font.size"] = fontsize
 
     if suptitle is not None and suptitle != "":
         fig.suptitle(suptitle, fontsize=fontsize + 1)
@@ -451,16 +501,16 @@ def set_axes_properties(ax: plt.Axes, **kwargs) -> None:
     grid_on = kwargs.get("grid_on", False)
     grid_properties = kwargs.get("grid_properties", None)
 
-    rcParams["font.size"] = fontsize
+    mpl.rcParams["font.size"] = fontsize
     # rcParams['text.usetex'] = True
 
     # plot titles
     if ax.get_title(loc="center") == "":
-        ax.set_title(title_center, loc="center", fontsize=rcParams["font.size"] - 1)
+        ax.set_title(title_center, loc="center", fontsize=mpl.rcParams["font.size"] - 1)
     if ax.get_title(loc="left") == "":
-        ax.set_title(title_left, loc="left", fontsize=rcParams["font.size"] - 1)
+        ax.set_title(title_left, loc="left", fontsize=mpl.rcParams["font.size"] - 1)
     if ax.get_title(loc="right") == "":
-        ax.set_title(title_right, loc="right", fontsize=rcParams["font.size"] - 1)
+        ax.set_title(title_right, loc="right", fontsize=mpl.rcParams["font.size"] - 1)
 
     # axes labels
     if ax.get_xlabel() == "":
@@ -486,10 +536,11 @@ def set_axes_properties(ax: plt.Axes, **kwargs) -> None:
     if invert_yaxis:
         ax.invert_yaxis()
 
-    # axes scale
-    if x_scale is not None:
+    # axes scale; setting the scale resets the tick locators and formatters,
+    # e.g. those of the heatmap rows, hence only do it when needed
+    if x_scale is not None and x_scale != ax.get_xscale():
         ax.set_xscale(x_scale)
-    if y_scale is not None:
+    if y_scale is not None and y_scale != ax.get_yscale():
         ax.set_yscale(y_scale)
 
     # axes ticks
@@ -512,9 +563,9 @@ def set_axes_properties(ax: plt.Axes, **kwargs) -> None:
 
     # axes tick format
     if x_tickformat is not None:
-        ax.xaxis.set_major_formatter(FormatStrFormatter(x_tickformat))
+        ax.xaxis.set_major_formatter(ticker.FormatStrFormatter(x_tickformat))
     if y_tickformat is not None:
-        ax.yaxis.set_major_formatter(FormatStrFormatter(y_tickformat))
+        ax.yaxis.set_major_formatter(ticker.FormatStrFormatter(y_tickformat))
 
     # axes tick labels rotation
     plt.xticks(rotation=x_ticklabels_rotation)
@@ -554,7 +605,7 @@ def set_axes_properties(ax: plt.Axes, **kwargs) -> None:
 
     # text box
     if text is not None:
-        ax.add_artist(AnchoredText(text, loc=text_locations[text_loc]))
+        ax.add_artist(offsetbox.AnchoredText(text, loc=text_locations[text_loc]))
 
     # plot grid
     if grid_on:
@@ -562,7 +613,432 @@ def set_axes_properties(ax: plt.Axes, **kwargs) -> None:
         ax.grid(True, **gps)
 
 
-def make_lineplot(x: np.ndarray, y: np.ndarray, ax: plt.Axes, **kwargs) -> None:
+def get_output_profile(profile: Union[str, dict]) -> dict:
+    """ Get the output profile from its name, see :data:`output_profiles`. """
+    if isinstance(profile, str):
+        if profile not in output_profiles:
+            raise RuntimeError(f"Output profile '{profile}' does not exist.")
+        profile = output_profiles[profile]
+    return profile
+
+
+def get_save_path(save_dest: str, profile: Union[str, dict]) -> Tuple[str, str]:
+    """
+    Get the path to the output file and the file format, completing `save_dest`
+    with the extension set by the output profile if it has none.
+    """
+    profile = get_output_profile(profile)
+
+    _, ext = os.path.splitext(save_dest)
+    if ext == "":
+        return save_dest + "." + profile["format"], profile["format"]
+    else:
+        return save_dest, ext[1:]
+
+
+def make_parent_dir(save_dest: str) -> None:
+    """ Create the directory of the output file `save_dest`, if missing. """
+    dirname = os.path.dirname(save_dest)
+    if dirname != "":
+        os.makedirs(dirname, exist_ok=True)
+
+
+def save_figure(
+    fig: plt.Figure, save_dest: str, profile: Union[str, dict] = "print"
+) -> Tuple[float, float]:
+    """
+    Save a figure to file according to an output profile.
+
+    Parameters
+    ----------
+    fig : matplotlib.figure.Figure
+        The figure.
+    save_dest : str
+        Path to the output file. If the path has no extension, the format set
+        by the profile is used.
+    profile : `str` or `dict`, optional
+        Either the name of one of the profiles in :data:`output_profiles`,
+        or a dictionary with the following keys:
+
+            * "dpi": the resolution in dots per inch;
+            * "format": the file format, used only if `save_dest` has no extension;
+            * "rasterize_threshold": the lines and collections with more points
+                than this threshold are rasterized in vector outputs;
+                `None` to never rasterize;
+            * "compress_level": the zlib compression level, from 0 to 9,
+                for PNG and PDF outputs.
+
+        Defaults to "print".
+
+    Returns
+    -------
+    render_time : float
+        Time in seconds spent drawing the figure.
+    encode_time : float
+        Time in seconds spent encoding and writing the output file.
+    """
+    profile = get_output_profile(profile)
+    save_dest, fmt = get_save_path(save_dest, profile)
+    make_parent_dir(save_dest)
+
+    # rasterize the dense artists for this output only
+    threshold = profile.get("rasterize_threshold", None)
+    rasterized = []
+    if threshold is not None:
+        for ax in fig.get_axes():
+            for line in ax.get_lines():
+                if len(line.get_xdata()) > threshold:
+                    rasterized.append((line, line.get_rasterized()))
+            for collection in ax.collections:
+                paths = collection.get_paths()
+                if sum(len(path.vertices) for path in paths) > threshold:
+                    rasterized.append((collection, collection.get_rasterized()))
+
+    # compression
+    compress_level = profile.get("compress_level", 6)
+    kwargs = {}
+    rc_params = {}
+    if fmt == "png":
+        kwargs["pil_kwargs"] = {"compress_level": compress_level}
+    elif fmt == "pdf":
+        rc_params["pdf.compression"] = compress_level
+
+    # the draw event marks the end of the rendering and the start of the encoding
+    timestamps = []
+    cid = fig.canvas.mpl_connect(
+        "draw_event", lambda event: timestamps.append(time.perf_counter())
+    )
+
+    start = time.perf_counter()
+    resampled = []
+    try:
+        for artist, _ in rasterized:
+            artist.set_rasterized(True)
+
+        resampled = resample_lines(fig, profile["dpi"])
+
+        with timing.timer("savefig") as t, plt.rc_context(rc_params):
+            fig.savefig(save_dest, format=fmt, dpi=profile["dpi"], **kwargs)
+            if t.active:
+                t.nbytes = os.path.getsize(save_dest)
+    finally:
+        for artist, previous in rasterized:
+            artist.set_rasterized(previous)
+        for line, x, y in resampled:
+            line.set_data(x, y)
+        fig.canvas.mpl_disconnect(cid)
+    stop = time.perf_counter()
+
+    if len(timestamps) > 0:
+        return timestamps[-1] - start, stop - timestamps[-1]
+    else:
+        return stop - start, 0.0
+
+
+def write_gif(frames: Iterator[np.ndarray], save_dest: str, fps: float) -> None:
+    from PIL import Image
+
+    images = (
+        Image.fromarray(frame[..., :3]).convert("P", palette=Image.ADAPTIVE)
+        for frame in frames
+    )
+    first = next(images)
+    first.save(
+        save_dest,
+        save_all=True,
+        append_images=images,
+        duration=int(round(1000.0 / fps)),
+        loop=0,
+    )
+
+
+def write_mp4(frames: Iterator[np.ndarray], save_dest: str, fps: float) -> None:
+    if not animation.FFMpegWriter.isAvailable():
+        raise RuntimeError("FFmpeg is required to write MP4 files; please install it.")
+
+    first = next(frames)
+    height, width = first.shape[:2]
+
+    # stream the raw frames to ffmpeg; H.264 requires even dimensions
+    command = [
+        animation.FFMpegWriter.bin_path(),
+        "-y",
+        "-loglevel",
+        "error",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgba",
+        "-s",
+        f"{width}x{height}",
+        "-r",
+        str(fps),
+        "-i",
+        "-",
+        "-vf",
+        "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+        "-vcodec",
+        "libx264",
+        "-pix_fmt",
+        "yuv420p",
+        save_dest,
+    ]
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE)
+    try:
+        proc.stdin.write(first.tobytes())
+        for frame in frames:
+            proc.stdin.write(frame.tobytes())
+    finally:
+        proc.stdin.close()
+    if proc.wait():
+        raise RuntimeError(f"Could not write {save_dest}.")
+
+
+def save_animation(
+    fig: plt.Figure,
+    artists: Sequence[plt.Artist],
+    update: Callable[[int], Sequence[plt.Artist]],
+    frames: int,
+    save_dest: str,
+    fps: float = 5,
+    dpi: float = 100,
+) -> float:
+    """
+    Save an animation to a GIF or MP4 file. The static part of the figure,
+    i.e. everything but the data artists, is drawn once; each frame is then
+    obtained by blitting the data artists over it.
+
+    Parameters
+    ----------
+    fig : matplotlib.figure.Figure
+        The figure.
+    artists : Sequence[matplotlib.artist.Artist]
+        The data artists, i.e. the artists changing from frame to frame.
+    update : Callable[[int], Sequence[matplotlib.artist.Artist]]
+        Function updating the data artists for the given frame, and returning
+        the artists to redraw.
+    frames : int
+        The number of frames.
+    save_dest : str
+        Path to the output file; either a ".gif" or a ".mp4" file.
+    fps : `float`, optional
+        Frames per second. Defaults to 5.
+    dpi : `float`, optional
+        The resolution in dots per inch. Defaults to 100.
+
+    Returns
+    -------
+    float :
+        Time in seconds spent to render and write the animation.
+    """
+    _, ext = os.path.splitext(save_dest)
+    if ext not in (".gif", ".mp4"):
+        raise RuntimeError(f"Cannot write animations to '{ext}' files.")
+    make_parent_dir(save_dest)
+
+    start = time.perf_counter()
+
+    # render on an Agg canvas
+    canvas = fig.canvas
+    if not isinstance(canvas, backend_agg.FigureCanvasAgg):
+        backend_agg.FigureCanvasAgg(fig)
+    old_dpi = fig.dpi
+    fig.set_dpi(dpi)
+
+    # draw the static part of the figure once
+    for artist in artists:
+        artist.set_animated(True)
+    fig.canvas.draw()
+    background = fig.canvas.copy_from_bbox(fig.bbox)
+
+    def get_frames():
+        for index in range(frames):
+            fig.canvas.restore_region(background)
+            for artist in update(index):
+                fig.draw_artist(artist)
+            yield np.asarray(fig.canvas.buffer_rgba())
+
+    try:
+        if ext == ".gif":
+            write_gif(get_frames(), save_dest, fps)
+        else:
+            write_mp4(get_frames(), save_dest, fps)
+    finally:
+        for artist in artists:
+            artist.set_animated(False)
+        fig.set_dpi(old_dpi)
+        fig.set_canvas(canvas)
+
+    return time.perf_counter() - start
+
+
+def downsample_lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Select the points to keep with the Largest-Triangle-Three-Buckets algorithm.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        1-D array gathering the (numeric) x-coordinates of the points.
+    y : numpy.ndarray
+        1-D array gathering the y-coordinates of the points.
+    points : int
+        The number of points to keep.
+
+    Returns
+    -------
+    numpy.ndarray :
+        The indices of the points to keep.
+    """
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    # the first and last points are always kept, the remaining ones are
+    # split into points - 2 buckets
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    indices = np.empty(points, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+
+        # pick the point forming the largest triangle with the previously
+        # selected point and the average of the next bucket
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + np.argmax(np.where(np.isnan(area), -1.0, area))
+        indices[i + 1] = a
+
+    return indices
+
+
+def downsample_minmax(y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Select the points to keep by retaining the minimum and maximum of each bucket.
+
+    Parameters
+    ----------
+    y : numpy.ndarray
+        1-D array gathering the y-coordinates of the points.
+    points : int
+        The number of points to keep.
+
+    Returns
+    -------
+    numpy.ndarray :
+        The indices of the points to keep.
+    """
+    n = len(y)
+    buckets = points // 2
+    if points >= n or buckets < 1:
+        return np.arange(n)
+
+    # pad the series so that it can be reshaped into buckets of equal size
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(-1, size)
+    offsets = np.arange(padded.shape[0]) * size
+
+    imin = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    imax = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+
+    return np.unique(np.concatenate(([0, n - 1], imin, imax)).clip(0, n - 1))
+
+
+def downsample_series(
+    x: Sequence,
+    y: np.ndarray,
+    ax: plt.Axes,
+    method: str = "lttb",
+    points: Optional[int] = None,
+    dpi: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce the number of points of a series, preserving its visual shape.
+
+    Parameters
+    ----------
+    x : Sequence
+        1-D array gathering the x-coordinates of the points; they can be
+        categorical (e.g. the dates as strings).
+    y : numpy.ndarray
+        1-D array gathering the y-coordinates of the points.
+    ax : matplotlib.axes.Axes
+        The axes embodying the plot.
+    method : `str`, optional
+        Either "lttb" (Largest-Triangle-Three-Buckets) or "minmax" (minimum and
+        maximum of each bucket). Defaults to "lttb".
+    points : `int`, optional
+        The number of points to keep. Defaults to the width of the axes in pixels,
+        at the resolution `dpi`.
+    dpi : `float`, optional
+        The resolution in dots per inch the series is drawn at. Defaults to the
+        resolution of the figure.
+
+    Returns
+    -------
+    x : numpy.ndarray
+        The x-coordinates of the points kept.
+    y : numpy.ndarray
+        The y-coordinates of the points kept.
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    if points is None:
+        fig = ax.get_figure()
+        width = ax.bbox.width if dpi is None else ax.bbox.width * dpi / fig.dpi
+        points = max(int(width), 3)
+
+    if len(y) <= points:
+        return x, y
+
+    if x.dtype.kind in "iuf":
+        xn = x.astype(float)
+    else:
+        # register all the categories, so that the points kept retain their
+        # position along the axis
+        ax.xaxis.update_units(x)
+        xn = np.arange(len(x), dtype=float)
+
+    if method == "lttb":
+        indices = downsample_lttb(xn, y, points)
+    elif method == "minmax":
+        indices = downsample_minmax(y, points)
+    else:
+        raise RuntimeError(f"Unknown downsampling method '{method}'.")
+
+    return x[indices], y[indices]
+
+
+def resample_lines(fig: plt.Figure, dpi: float) -> List[tuple]:
+    """
+    Downsample again the lines of `fig` downsampled to the width of their axes
+    (see :data:`downsampled_series`), for an output at the resolution `dpi`.
+    Return the triplet `(line, x, y)` of the previous data of each line.
+    """
+    previous = []
+
+    for ax in fig.get_axes():
+        for line in ax.get_lines():
+            series = downsampled_series.get(line, None)
+            if series is not None:
+                x, y, method = series
+                previous.append(
+                    (line, line.get_xdata(orig=True), line.get_ydata(orig=True))
+                )
+                line.set_data(*downsample_series(x, y, ax, method, dpi=dpi))
+
+    return previous
+
+
+def make_lineplot(
+    x: np.ndarray, y: np.ndarray, ax: plt.Axes, **kwargs
+) -> List[plt.Line2D]:
     """ Plot a line.
 
     Parameters
@@ -602,6 +1078,19 @@ def make_lineplot(x: np.ndarray, y: np.ndarray, ax: plt.Axes, **kwargs) -> None:
         Marker edge color. Defaults to 'blue'.
     legend_label : str
         The legend label for the line. Defaults to an empty string.
+    downsample : str
+        If given, the series is reduced to about `downsample_points` points
+        before plotting. Either "lttb" or "minmax"; see
+        :func:`covid19.plot_utils.downsample_series`.
+    downsample_points : int
+        The number of points to keep when downsampling. Defaults to the width
+        of the axes in pixels, both on screen and, when saved through
+        :func:`covid19.plot_utils.save_figure`, at the resolution of the output.
+
+    Returns
+    -------
+    List[matplotlib.lines.Line2D] :
+        The lines added to the plot.
     """
     # get keyword arguments
     fontsize = kwargs.get("fontsize", 16)
@@ -617,9 +1106,16 @@ def make_lineplot(x: np.ndarray, y: np.ndarray, ax: plt.Axes, **kwargs) -> None:
     markerfacecolor = kwargs.get("markerfacecolor", "blue")
     markeredgecolor = kwargs.get("markeredgecolor", "blue")
     legend_label = kwargs.get("legend_label", "")
+    downsample = kwargs.get("downsample", None)
+    downsample_points = kwargs.get("downsample_points", None)
 
     # global settings
-    rcParams["font.size"] = fontsize
+    mpl.rcParams["font.size"] = fontsize
+
+    # drop the points which would not be visible anyway
+    series = (x, y, downsample)
+    if downsample is not None:
+        x, y = downsample_series(x, y, ax, downsample, downsample_points)
 
     # rescale the axes for visualization purposes
     # x *= x_factor
@@ -627,7 +1123,7 @@ def make_lineplot(x: np.ndarray, y: np.ndarray, ax: plt.Axes, **kwargs) -> None:
 
     # plot
     if legend_label == "" or legend_label is None:
-        ax.plot(
+        lines = ax.plot(
             x,
             y,
             color=linecolor,
@@ -640,7 +1136,7 @@ def make_lineplot(x: np.ndarray, y: np.ndarray, ax: plt.Axes, **kwargs) -> None:
             markeredgecolor=markeredgecolor,
         )
     else:
-        ax.plot(
+        lines = ax.plot(
             x,
             y,
             color=linecolor,
@@ -658,6 +1154,84 @@ def make_lineplot(x: np.ndarray, y: np.ndarray, ax: plt.Axes, **kwargs) -> None:
     # x /= x_factor
     # y /= y_factor
 
+    if downsample is not None and downsample_points is None:
+        for line in lines:
+            downsampled_series[line] = series
+
+    return lines
+
+
+def compute_cdf(
+    data: np.ndarray,
+    number_of_bins: int = 1000,
+    threshold: Optional[float] = None,
+    weights: Optional[np.ndarray] = None,
+    exact: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the cumulative distribution function (CDF) of an array of points.
+    The cost is O(n log n), n being the number of points.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        Array gathering the sample points; it is flattened, and NaNs are discarded.
+    number_of_bins : `int`, optional
+        Number of bins to be used to compute the CDF. Defaults to 1000.
+    threshold : `float`, optional
+        Consider only the grid values greater than this threshold.
+        If not specified, all grid values will be considered.
+    weights : `numpy.ndarray`, optional
+        Array of weights, with the same shape as `data`.
+        If not specified, all sample points have the same weight.
+    exact : `bool`, optional
+        `True` to return the exact step function, with a step at each distinct
+        sample value, `False` to sample the CDF over `number_of_bins` equispaced
+        bins. Defaults to `False`.
+
+    Returns
+    -------
+    values : numpy.ndarray
+        The sample values.
+    cdf : numpy.ndarray
+        The CDF at `values`.
+    """
+    data = np.asarray(data, dtype=float).ravel()
+    weights = (
+        np.ones_like(data)
+        if weights is None
+        else np.asarray(weights, dtype=float).ravel()
+    )
+
+    # filter data
+    mask = ~np.isnan(data)
+    if threshold is not None:
+        mask &= data > threshold
+    rdata, rweights = data[mask], weights[mask]
+    if rdata.size == 0:
+        raise RuntimeError("No sample points left to compute the CDF.")
+
+    # sort data and accumulate weights
+    order = np.argsort(rdata, kind="stable")
+    rdata = rdata[order]
+    cumweights = np.cumsum(rweights[order])
+    if not cumweights[-1] > 0.0:
+        raise RuntimeError("The weights of the sample points must have a positive sum.")
+    cumweights /= cumweights[-1]
+
+    if exact:
+        # the last occurrence of each distinct value carries its cumulative weight
+        last = np.append(rdata[1:] != rdata[:-1], True)
+        steps, cdf_steps = rdata[last], cumweights[last]
+        values = np.repeat(steps, 2)
+        cdf = np.concatenate(([0.0], np.repeat(cdf_steps, 2)[:-1]))
+    else:
+        values = np.linspace(rdata[0], rdata[-1], number_of_bins + 1)
+        indices = np.searchsorted(rdata, values, side="right")
+        cdf = np.concatenate(([0.0], cumweights))[indices]
+
+    return values, cdf
+
 
 def make_cdf(data: np.ndarray, ax: plt.Axes, **kwargs) -> None:
     """
@@ -666,7 +1240,7 @@ def make_cdf(data: np.ndarray, ax: plt.Axes, **kwargs) -> None:
     Parameters
     ----------
     data : numpy.ndarray
-        1-D array gathering the sample points.
+        Array gathering the sample points.
     ax : matplotlib.axes.Axes
         The axes embodying the plot.
 
@@ -683,6 +1257,12 @@ def make_cdf(data: np.ndarray, ax: plt.Axes, **kwargs) -> None:
     threshold : float
         Consider only the grid values greater than this threshold.
         If not specified, all grid values will be considered.
+    weights : numpy.ndarray
+        Array of weights, with the same shape as `data`.
+        If not specified, all sample points have the same weight.
+    exact : bool
+        :obj:`True` to plot the exact step function, :obj:`False` to sample
+        the CDF over `number_of_bins` bins. Defaults to :obj:`False`.
     **kwargs:
         Any keyword argument accepted by :
         func:`tasmania.python.plot.plot_utils.make_lineplot`.
@@ -692,23 +1272,20 @@ def make_cdf(data: np.ndarray, ax: plt.Axes, **kwargs) -> None:
     data_on_xaxis = kwargs.get("data_on_xaxis", False)
     number_of_bins = kwargs.get("number_of_bins", 1000)
     threshold = kwargs.get("threshold", None)
+    weights = kwargs.get("weights", None)
+    exact = kwargs.get("exact", False)
 
     # global settings
-    rcParams["font.size"] = fontsize
-
-    # filter data
-    if threshold is not None:
-        rdata = data[data > threshold]
-    else:
-        rdata = data
+    mpl.rcParams["font.size"] = fontsize
 
     # compute the cdf
-    rdata_min, rdata_max = rdata.min(), rdata.max()
-    bins = np.linspace(0, 1, number_of_bins + 1)
-    values = rdata_min + bins * (rdata_max - rdata_min)
-    cdf = np.zeros(number_of_bins + 1)
-    for k in range(number_of_bins + 1):
-        cdf[k] = np.sum(rdata <= values[k]) / rdata.size
+    values, cdf = compute_cdf(
+        data,
+        number_of_bins=number_of_bins,
+        threshold=threshold,
+        weights=weights,
+        exact=exact,
+    )
 
     # plot
     if data_on_xaxis:
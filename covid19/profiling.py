@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+import argparse
+import collections
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+from covid19 import timing
+
+
+class StackSampler:
+    """
+    Sample the call stacks of all threads every `interval` seconds, and count
+    the identical stacks, to be written in the collapsed format read by
+    flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.counts = collections.Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    @staticmethod
+    def get_label(frame):
+        code = frame.f_code
+        filename = os.path.basename(code.co_filename)
+        return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+    def sample(self):
+        own_id = threading.get_ident()
+
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append(self.get_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def write(self, filename):
+        with open(filename, "w") as file:
+            for stack, count in self.counts.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """
+    Profile the main thread and all threads started meanwhile, e.g. the workers
+    of :func:`covid19.monitor.run_loaders`, with one :class:`cProfile.Profile`
+    per thread, merged at the end.
+    """
+
+    def __init__(self):
+        self.profiles = [cProfile.Profile()]
+        self.lock = threading.Lock()
+
+    def start_thread(self, frame, event, arg):
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        threading.setprofile(self.start_thread)
+        self.profiles[0].enable()
+
+    def stop(self):
+        self.profiles[0].disable()
+        threading.setprofile(None)
+
+    def get_stats(self):
+        for profile in self.profiles:
+            profile.create_stats()
+
+        stats = pstats.Stats(self.profiles[0], stream=io.StringIO())
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+
+        return stats
+
+
+class MemoryTracer:
+    """
+    Trace the allocations with tracemalloc, and snapshot them at the end of each
+    mount and save (see :mod:`covid19.timing`): the allocation sites of a stage
+    are the difference with the previous snapshot, e.g. a render includes the
+    drawing of the figure before it is saved.
+    """
+
+    def __init__(self, limit=10):
+        self.limit = limit
+        self.snapshot = None
+        self.stages = []
+        self.final = []
+        self.peak = 0
+
+    @staticmethod
+    def is_traced(stage):
+        return ".mount" in stage or stage == "savefig"
+
+    def record_stage(self, record):
+        if not self.is_traced(record["stage"]):
+            return
+
+        snapshot = tracemalloc.take_snapshot()
+        stats = snapshot.compare_to(self.snapshot, "lineno")[: self.limit]
+        self.stages.append((record["stage"], stats))
+        self.snapshot = snapshot
+
+    def start(self):
+        tracemalloc.start()
+        self.snapshot = tracemalloc.take_snapshot()
+        timing.listeners.append(self.record_stage)
+        timing.enable(summary=False)
+
+    def stop(self):
+        timing.listeners.remove(self.record_stage)
+        self.final = tracemalloc.take_snapshot().statistics("lineno")[: self.limit]
+        self.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    def report(self):
+        print(f"Peak traced memory: {self.peak / 2**20:.2f} MB")
+
+        for stage, stats in self.stages:
+            print(f"Top allocations during {stage}:")
+            for stat in stats:
+                print(f"    {stat}")
+
+        print("Top allocations still alive at the end:")
+        for stat in self.final:
+            print(f"    {stat}")
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run, writing the statistics to PREFIX.pstats and the "
+        "sampled call stacks, for flame graphs, to PREFIX.collapsed.",
+    )
+    parser.add_argument(
+        "--profile-prefix",
+        default=None,
+        metavar="PREFIX",
+        help="Prefix of the profiling outputs. Defaults to the script name.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Trace the allocations, and report the top allocation sites of each "
+        "mount and render stage.",
+    )
+    parser.add_argument(
+        "--trace-memory-limit",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Number of allocation sites reported per stage. Defaults to 10.",
+    )
+
+
+def run(main, *args, **kwargs):
+    """
+    Entry point of the scripts: call `main(*args, **kwargs)`, optionally under
+    the profiler or the memory tracer. The options added by :func:`add_arguments`
+    are removed from the command line, which is then left to the script. Note
+    that worker processes, e.g. those of :class:`covid19.renderer.BatchRenderer`,
+    are not profiled.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    add_arguments(parser)
+    options, sys.argv[1:] = parser.parse_known_args()
+
+    prefix = options.profile_prefix
+    if prefix is None:
+        prefix = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+
+    profiler = sampler = tracer = None
+    if options.profile:
+        profiler = Profiler()
+        sampler = StackSampler()
+        sampler.start()
+        profiler.start()
+    if options.trace_memory:
+        tracer = MemoryTracer(options.trace_memory_limit)
+        tracer.start()
+
+    start = time.perf_counter()
+    try:
+        return main(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+
+        if tracer is not None:
+            tracer.stop()
+            tracer.report()
+
+        if profiler is not None:
+            profiler.stop()
+            sampler.stop()
+
+            stats = profiler.get_stats()
+            stats.dump_stats(prefix + ".pstats")
+            sampler.write(prefix + ".collapsed")
+
+            stats.stream = sys.stdout
+            stats.sort_stats("cumulative").print_stats(20)
+            print(
+                f"Profiled {elapsed:.2f} s; see {prefix}.pstats and {prefix}.collapsed."
+            )
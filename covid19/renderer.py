@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+import importlib
+import multiprocessing as mp
+import os
+import time
+
+from covid19 import cache, plot_utils, timing
+from covid19.planner import run_planned_loaders
+from covid19.utils import LazyModule
+
+
+# matplotlib is imported on first use
+mpl = LazyModule("matplotlib")
+plt = LazyModule("matplotlib.pyplot")
+
+
+# the monitors to render, together with their data and destination;
+# set by the parent process before forking the workers
+jobs = []
+
+# the figure each worker process reuses across renders
+worker_figure = None
+
+# the timing records of the current render in a pool worker, sent back to the
+# parent process, where the metrics are collected and written
+worker_records = None
+
+
+def import_object(path):
+    module_name, _, object_name = path.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, object_name)
+
+
+def init_worker():
+    global worker_figure
+    plt.switch_backend("Agg")
+    plt.close("all")
+    worker_figure = plt.figure()
+
+
+def init_pool_worker():
+    global worker_records
+
+    init_worker()
+
+    # the records are handed over to the listeners of the parent process only
+    worker_records = []
+    timing.listeners[:] = [worker_records.append]
+    timing.reset()
+
+
+def render(index):
+    start = time.perf_counter()
+
+    if worker_records is not None:
+        worker_records.clear()
+
+    monitor, data, save_dest, profile, key = jobs[index]
+
+    if worker_figure is None:
+        init_worker()
+
+    # recycle the figure
+    fig = worker_figure
+    fig.clf()
+    fig.set_size_inches(monitor.figure_properties.get("figsize", (7, 7)))
+    mpl.rcParams["font.size"] = monitor.figure_properties.get("fontsize", 12)
+    plt.figure(fig.number)
+
+    # draw
+    monitor.run(fig=fig, data=data)
+    if monitor.figure_properties != {}:
+        plot_utils.set_figure_properties(fig, **monitor.figure_properties)
+
+    # save
+    render_time, encode_time = plot_utils.save_figure(fig, save_dest, profile)
+    cache.store_key(save_dest, profile, key)
+
+    return {
+        "total": time.perf_counter() - start,
+        "render": render_time,
+        "encode": encode_time,
+        "records": list(worker_records or []),
+    }
+
+
+def merge_records(timings):
+    """ Add the timing records of a worker to those of this process. """
+    for record in timings.pop("records"):
+        timing.add_record(record)
+    return timings
+
+
+class BatchRenderer:
+    """
+    Render many figures in one go: the data are loaded once in the parent
+    process, then the figures are drawn in parallel by worker processes
+    forked from the parent, each of them reusing a single Agg figure.
+
+    Each figure spec is either a :class:`covid19.specs.FigureSpec`, or a
+    dictionary with the following keys:
+
+        * "monitor": a :class:`covid19.monitor.Monitor` or
+            :class:`covid19.monitor.MonitorComposite`, a callable returning it,
+            or the path "package.module:function" to such a callable;
+        * "kwargs" (optional): keyword arguments for the callable;
+        * "save_dest": the output file;
+        * "profile" (optional): the output profile, see
+            :func:`covid19.plot_utils.save_figure`. Defaults to "report".
+
+    The data of all figures are loaded through
+    :func:`covid19.planner.run_planned_loaders`, so that the series drawn from
+    the same dataset are retrieved with a single scan over it.
+
+    If `use_cache` is `True`, the figures whose output file was rendered
+    from the same spec and the same data version are skipped; see
+    :func:`covid19.cache.get_render_key`.
+
+    For each figure, the total time taken by the worker and the time spent
+    rendering and encoding the output are stored in :attr:`timings`. The
+    stages timed by the workers (see :mod:`covid19.timing`) are merged into
+    the records of the parent process, hence into its metrics.
+    """
+
+    def __init__(self, specs, processes=None, use_cache=False):
+        self.specs = specs
+        self.processes = processes or os.cpu_count() or 1
+        self.use_cache = use_cache
+        self.timings = []
+
+    def get_monitors(self):
+        monitors = []
+
+        for spec in self.specs:
+            if hasattr(spec, "build_monitor"):
+                monitors.append(spec.build_monitor())
+                continue
+
+            monitor = spec["monitor"]
+            if isinstance(monitor, str):
+                monitor = import_object(monitor)
+            if callable(monitor):
+                monitor = monitor(**spec.get("kwargs", {}))
+            monitors.append(monitor)
+
+        return monitors
+
+    @staticmethod
+    def get_save_dest(spec):
+        return spec.save_dest if hasattr(spec, "save_dest") else spec["save_dest"]
+
+    @staticmethod
+    def get_profile(spec):
+        return (
+            spec.profile if hasattr(spec, "profile") else spec.get("profile", "report")
+        )
+
+    def run(self):
+        global jobs
+
+        start = time.perf_counter()
+
+        # build the monitors and skip those whose output is up to date
+        specs = []
+        monitors = []
+        keys = []
+        for spec, monitor in zip(self.specs, self.get_monitors()):
+            save_dest, profile = self.get_save_dest(spec), self.get_profile(spec)
+            key = monitor.get_render_key(profile) if self.use_cache else None
+            if cache.is_cached(save_dest, profile, key):
+                print(f"The figure {save_dest} is up to date.")
+            else:
+                specs.append(spec)
+                monitors.append(monitor)
+                keys.append(key)
+
+        # load the data of all figures at once
+        loader_fcts = [monitor.get_loader_functions() for monitor in monitors]
+        data = []
+        if len(monitors) > 0:
+            data, _ = run_planned_loaders(
+                [loader_fct for fcts in loader_fcts for loader_fct in fcts]
+            )
+
+        jobs = []
+        offset = 0
+        for spec, monitor, fcts, key in zip(specs, monitors, loader_fcts, keys):
+            jobs.append(
+                (
+                    monitor,
+                    data[offset : offset + len(fcts)],
+                    self.get_save_dest(spec),
+                    self.get_profile(spec),
+                    key,
+                )
+            )
+            offset += len(fcts)
+
+        print(f"Render {len(jobs)} figures ...")
+
+        # the workers inherit the loaded data from the parent when forked
+        if len(jobs) == 0:
+            self.timings = []
+        elif self.processes > 1 and "fork" in mp.get_all_start_methods():
+            context = mp.get_context("fork")
+            with context.Pool(self.processes, initializer=init_pool_worker) as pool:
+                self.timings = [
+                    merge_records(timings)
+                    for timings in pool.imap(render, range(len(jobs)))
+                ]
+        else:
+            init_worker()
+            self.timings = [merge_records(render(index)) for index in range(len(jobs))]
+
+        elapsed = time.perf_counter() - start
+        throughput = len(jobs) / elapsed if elapsed > 0 else float("inf")
+
+        print(
+            f"Rendered {len(jobs)} figures in {elapsed:.2f} s "
+            f"({throughput:.2f} figures/s)."
+        )
+
+        jobs = []
+
+        return throughput
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass, field as dataclass_field
+import functools
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from covid19.drawers import (
+    HeatmapDrawer,
+    LineCollectionDrawer,
+    ScatterDrawer,
+    TimeSeriesDrawer,
+)
+from covid19.loader import Loader
+from covid19.monitor import Monitor, MonitorComposite
+
+
+drawers = {
+    "timeseries": TimeSeriesDrawer,
+    "linecollection": LineCollectionDrawer,
+    "heatmap": HeatmapDrawer,
+    "scatter": ScatterDrawer,
+}
+
+
+@dataclass
+class SeriesSpec:
+    """
+    A series to draw: the field retrieved by a loader for a given entity,
+    and the drawer used to draw it. Set at most one among `region`, `province`
+    and `country`; a list of names yields one row per name, to be drawn e.g.
+    by a "linecollection", "heatmap" or "scatter" drawer.
+    """
+
+    field: str
+    dataset: str = "italy"
+    region: Optional[Union[str, List[str]]] = None
+    province: Optional[Union[str, List[str]]] = None
+    country: Optional[Union[str, List[str]]] = None
+    drawer: str = "timeseries"
+    properties: Dict[str, Any] = dataclass_field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(**spec)
+
+    def get_loader_function(self, update_data=False, apply_patches=False):
+        loader = Loader.factory(self.dataset, update_data, apply_patches)
+        keywords = {
+            level: value
+            for level, value in (
+                ("region", self.region),
+                ("province", self.province),
+                ("country", self.country),
+            )
+            if value is not None
+        }
+        return functools.partial(loader.run, self.field, **keywords)
+
+    def get_drawer(self):
+        if self.drawer not in drawers:
+            raise RuntimeError(f"Drawer {self.drawer} does not exist.")
+
+        properties = self.properties.copy()
+        for level, names in (
+            ("region", self.region),
+            ("province", self.province),
+            ("country", self.country),
+        ):
+            if isinstance(names, (list, tuple)):
+                properties.setdefault("labels", list(names))
+
+                # the coordinates are fetched at drawing time
+                if self.drawer == "scatter" and "latitude" not in properties:
+                    loader = Loader.factory(self.dataset, False, False)
+                    properties.setdefault(
+                        "coordinates",
+                        functools.partial(loader.get_coordinates, level, list(names)),
+                    )
+
+        return drawers[self.drawer](properties)
+
+
+@dataclass
+class PanelSpec:
+    """ The series drawn on the same axes, and the axes properties. """
+
+    series: List[SeriesSpec]
+    axes_properties: Dict[str, Any] = dataclass_field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(
+            series=[SeriesSpec.from_dict(item) for item in spec["series"]],
+            axes_properties=spec.get("axes_properties", {}),
+        )
+
+    def build_monitor(self, update_data=False, apply_patches=False):
+        return Monitor(
+            [
+                series.get_loader_function(update_data, apply_patches)
+                for series in self.series
+            ],
+            [series.get_drawer() for series in self.series],
+            axes_properties=self.axes_properties,
+        )
+
+
+@dataclass
+class FigureSpec:
+    """
+    A figure made up of `nrows` x `ncols` panels, together with its output
+    file and profile (see :func:`covid19.plot_utils.save_figure`).
+    """
+
+    panels: List[PanelSpec]
+    save_dest: Optional[str] = None
+    profile: str = "report"
+    nrows: int = 1
+    ncols: int = 1
+    figure_properties: Dict[str, Any] = dataclass_field(default_factory=dict)
+    update_data: bool = False
+    apply_patches: bool = False
+
+    @classmethod
+    def from_dict(cls, spec):
+        spec = dict(spec)
+
+        # a figure with a single panel may list its series directly
+        if "panels" not in spec:
+            spec["panels"] = [
+                {
+                    "series": spec.pop("series"),
+                    "axes_properties": spec.pop("axes_properties", {}),
+                }
+            ]
+        spec["panels"] = [PanelSpec.from_dict(item) for item in spec["panels"]]
+
+        return cls(**spec)
+
+    def build_monitor(self):
+        slaves = [
+            panel.build_monitor(self.update_data, self.apply_patches)
+            for panel in self.panels
+        ]
+
+        if len(slaves) == 1 and self.nrows * self.ncols == 1:
+            monitor = slaves[0]
+            monitor.figure_properties = self.figure_properties
+            return monitor
+
+        return MonitorComposite(
+            slaves, self.nrows, self.ncols, figure_properties=self.figure_properties
+        )
+
+
+def read_spec_file(filename):
+    _, ext = os.path.splitext(filename)
+
+    with open(filename, "r") as file:
+        if ext in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError(
+                    "PyYAML is required to read YAML specs; please install it."
+                )
+            return yaml.safe_load(file)
+        else:
+            return json.load(file)
+
+
+def load_specs(filenames: Union[str, Sequence[str]]) -> List[Union[FigureSpec, dict]]:
+    """
+    Read the figure specs from one or more JSON or YAML files. Each file contains
+    either a list of specs, or an object whose key "figures" maps to such a list.
+
+    Specs with a key "monitor" are returned as they are, in the format accepted
+    by :class:`covid19.renderer.BatchRenderer`; all other specs are converted
+    into :class:`FigureSpec` objects.
+    """
+    if isinstance(filenames, str):
+        filenames = [filenames]
+
+    specs = []
+
+    for filename in filenames:
+        content = read_spec_file(filename)
+        if isinstance(content, dict):
+            content = content["figures"]
+
+        for spec in content:
+            specs.append(spec if "monitor" in spec else FigureSpec.from_dict(spec))
+
+    return specs
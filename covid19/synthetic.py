@@ -0,0 +1,573 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import os
+import pandas as pd
+import shutil
+import subprocess
+
+from covid19 import config
+from covid19.patchers.italy import PatcherItaly
+from covid19.patchers.world import PatcherWorld
+
+
+# the DPC headers over time, oldest first; "2020-04" is the canonical schema
+dpc_measures = {
+    "2020-02": [
+        "ricoverati_con_sintomi",
+        "terapia_intensiva",
+        "totale_ospedalizzati",
+        "isolamento_domiciliare",
+        "totale_attualmente_positivi",
+        "nuovi_attualmente_positivi",
+        "dimessi_guariti",
+        "deceduti",
+        "totale_casi",
+        "tamponi",
+    ],
+    "2020-03": [
+        "ricoverati_con_sintomi",
+        "terapia_intensiva",
+        "totale_ospedalizzati",
+        "isolamento_domiciliare",
+        "totale_positivi",
+        "variazione_totale_positivi",
+        "nuovi_positivi",
+        "dimessi_guariti",
+        "deceduti",
+        "totale_casi",
+        "tamponi",
+        "note_it",
+        "note_en",
+    ],
+    "2020-04": list(PatcherItaly.columns_country)[2:],
+}
+
+dpc_schemas = {
+    version: {
+        "country": ["data", "stato"] + measures,
+        "region": [
+            "data",
+            "stato",
+            "codice_regione",
+            "denominazione_regione",
+            "lat",
+            "long",
+        ]
+        + measures,
+        "province": list(PatcherItaly.columns_province)[:10]
+        + [name for name in ("note_it", "note_en") if name in measures],
+    }
+    for version, measures in dpc_measures.items()
+}
+
+dpc_regions = [
+    name for name, abbreviation in config.static_shorthands.items() if name != "Italy"
+]
+
+# the name DPC gives to the cases not yet assigned to a province
+dpc_placeholder = "In fase di definizione/aggiornamento"
+
+# the CSSE daily reports had 6 columns until 02-29-2020, then 8
+csse_columns = list(PatcherWorld.columns)
+csse_short_header_days = 39
+
+csse_countries = [
+    "China",
+    "Italy",
+    "US",
+    "Germany",
+    "France",
+    "Spain",
+    "Japan",
+    "South Korea",
+    "Switzerland",
+    "United Kingdom",
+]
+
+openzh_cantons = (
+    "AG AI AR BE BL BS FR GE GL GR JU LU NE NW OW SG SH SO SZ TG TI UR VD VS ZG ZH FL"
+).split()
+
+openzh_schemas = {
+    "v1": [
+        "date",
+        "time",
+        "abbreviation_canton_and_fl",
+        "ncumul_tested",
+        "ncumul_conf",
+        "ncumul_hosp",
+        "ncumul_ICU",
+        "ncumul_vent",
+        "ncumul_released",
+        "ncumul_deceased",
+        "source",
+    ],
+    "v2": [
+        "date",
+        "time",
+        "abbreviation_canton_and_fl",
+        "ncumul_tested",
+        "ncumul_conf",
+        "new_hosp",
+        "current_hosp",
+        "current_icu",
+        "current_vent",
+        "ncumul_released",
+        "ncumul_deceased",
+        "source",
+    ],
+}
+
+openzh_dirs = {
+    "v1": "fallzahlen_kanton_total_csv",
+    "v2": "fallzahlen_kanton_total_csv_v2",
+}
+
+
+def get_cumulative_cases(n, days, seed=0, onsets=None):
+    """
+    Simulate the cumulative cases of `n` entities over `days` days, as an
+    integer array of shape (n, days): a logistic curve per entity, with
+    its own size, growth rate and inflection day, and multiplicative noise
+    on the daily increments. The same seed always yields the same curves,
+    so that a tree can be extended day by day consistently.
+    """
+    rng = np.random.default_rng(seed)
+
+    sizes = rng.lognormal(mean=9.0, sigma=1.0, size=(n, 1))
+    rates = rng.uniform(0.05, 0.2, size=(n, 1))
+    inflections = rng.uniform(30.0, 90.0, size=(n, 1))
+
+    t = np.arange(days)[None, :]
+    curves = sizes / (1.0 + np.exp(-rates * (t - inflections)))
+
+    increments = np.diff(curves, axis=1, prepend=0.0)
+    # drawn day by day, so that the first days do not depend on `days`
+    increments *= rng.lognormal(mean=0.0, sigma=0.3, size=(days, n)).T
+    if onsets is not None:
+        increments[t < np.asarray(onsets)[:, None]] = 0.0
+
+    return np.floor(np.cumsum(increments, axis=1)).astype(int)
+
+
+def get_dpc_measures(cases):
+    """ Derive the DPC measures from the cumulative cases, of shape (n, days). """
+    deceased = cases // 10
+    recovered = np.maximum(
+        np.floor(0.9 * np.roll(cases, 14, axis=1)).astype(int) - deceased, 0
+    )
+    recovered[:, :14] = 0
+    positives = cases - deceased - recovered
+    hospitalized = positives // 5
+    intensive = positives // 20
+    tests = 8 * cases + 100
+    tested = 5 * cases + 50
+
+    return {
+        "ricoverati_con_sintomi": hospitalized - intensive,
+        "terapia_intensiva": intensive,
+        "totale_ospedalizzati": hospitalized,
+        "isolamento_domiciliare": positives - hospitalized,
+        "totale_positivi": positives,
+        "variazione_totale_positivi": np.diff(positives, axis=1, prepend=0),
+        "nuovi_positivi": np.diff(cases, axis=1, prepend=0),
+        "dimessi_guariti": recovered,
+        "deceduti": deceased,
+        "totale_casi": cases,
+        "tamponi": tests,
+        "casi_testati": tested,
+    }
+
+
+def get_schema_version(schemas, day, days):
+    """ The schemas are used in turn, each for an equal share of the days. """
+    return schemas[min(day * len(schemas) // max(days, 1), len(schemas) - 1)]
+
+
+def write_dpc(
+    root_dir,
+    days=60,
+    first_day=0,
+    regions=None,
+    provinces_per_region=5,
+    schemas=("2020-04",),
+    seed=0,
+):
+    """
+    Write a synthetic clone of the DPC repository (pcm-dpc/COVID-19), i.e. one
+    CSV file per day for the country, the regions and the provinces, starting
+    from 2020-02-24.
+
+    `regions` is the number of regions (at most 21) or a list of names; each
+    region has `provinces_per_region` provinces, plus the DPC placeholder for
+    the cases still to be assigned. The headers follow the `schemas` in turn
+    (see `dpc_schemas`), e.g. ("2020-02", "2020-03", "2020-04") for the
+    historical column names which PatcherItaly harmonizes. Only the days from
+    `first_day` to `days` (excluded) are written, so that an existing tree can
+    be extended.
+    """
+    if regions is None:
+        regions = dpc_regions
+    elif isinstance(regions, int):
+        regions = dpc_regions[:regions]
+    regions = list(regions)
+
+    for version in schemas:
+        if version not in dpc_schemas:
+            raise RuntimeError(f"DPC schema {version} does not exist.")
+
+    rng = np.random.default_rng(seed)
+    region_coordinates = rng.uniform((37.0, 8.0), (46.5, 18.0), size=(len(regions), 2))
+
+    # the provinces, followed by one placeholder per region
+    provinces = []
+    for i in range(len(regions)):
+        for _ in range(provinces_per_region):
+            code = 100 + len(provinces)
+            abbreviation = chr(65 + code // 26 % 26) + chr(65 + code % 26)
+            provinces.append((i, code, f"Provincia {abbreviation}", abbreviation))
+    for i in range(len(regions)):
+        provinces.append((i, 900 + i, dpc_placeholder, ""))
+    province_coordinates = region_coordinates[[p[0] for p in provinces]]
+    province_coordinates += rng.uniform(-0.5, 0.5, size=province_coordinates.shape)
+
+    # the provinces sum up to the regions, which sum up to the country
+    province_cases = get_cumulative_cases(len(provinces), days, seed)
+    region_cases = np.zeros((len(regions), days), dtype=int)
+    np.add.at(region_cases, [p[0] for p in provinces], province_cases)
+    region_measures = get_dpc_measures(region_cases)
+
+    levels = (
+        ("country", "dati-andamento-nazionale", "dpc-covid19-ita-andamento-nazionale"),
+        ("region", "dati-regioni", "dpc-covid19-ita-regioni"),
+        ("province", "dati-province", "dpc-covid19-ita-province"),
+    )
+    for _, subdir, _ in levels:
+        os.makedirs(os.path.join(root_dir, subdir), exist_ok=True)
+
+    start = pd.Timestamp("2020-02-24")
+
+    for day in range(first_day, days):
+        date = start + pd.Timedelta(days=day)
+        version = get_schema_version(schemas, day, days)
+        aliases = {new: old for old, new in PatcherItaly.aliases.items()}
+
+        region_day = {
+            "data": date.strftime("%Y-%m-%dT18:00:00"),
+            "stato": "ITA",
+            "codice_regione": np.arange(1, len(regions) + 1),
+            "denominazione_regione": regions,
+            "lat": region_coordinates[:, 0].round(6),
+            "long": region_coordinates[:, 1].round(6),
+            "note_it": "",
+            "note_en": "",
+        }
+        for name, values in region_measures.items():
+            region_day[name] = values[:, day]
+            region_day[aliases.get(name, name)] = values[:, day]
+
+        country_day = {
+            name: values.sum() if isinstance(values, np.ndarray) else values
+            for name, values in region_day.items()
+        }
+
+        province_day = {
+            "data": region_day["data"],
+            "stato": "ITA",
+            "codice_regione": [p[0] + 1 for p in provinces],
+            "denominazione_regione": [regions[p[0]] for p in provinces],
+            "codice_provincia": [p[1] for p in provinces],
+            "denominazione_provincia": [p[2] for p in provinces],
+            "sigla_provincia": [p[3] for p in provinces],
+            "lat": province_coordinates[:, 0].round(6),
+            "long": province_coordinates[:, 1].round(6),
+            "totale_casi": province_cases[:, day],
+            "note_it": "",
+            "note_en": "",
+        }
+
+        for (level, subdir, prefix), content in zip(
+            levels, (country_day, region_day, province_day)
+        ):
+            columns = dpc_schemas[version][level]
+            df = pd.DataFrame(
+                {name: content[name] for name in columns},
+                index=[0] if level == "country" else None,
+            )
+            filename = os.path.join(root_dir, subdir, f"{prefix}-{date:%Y%m%d}.csv")
+            df.to_csv(filename, index=False)
+
+
+def write_csse(
+    root_dir,
+    days=60,
+    first_day=0,
+    countries=20,
+    provinces=5,
+    short_header_days=csse_short_header_days,
+    seed=0,
+):
+    """
+    Write a synthetic clone of the CSSE repository (CSSEGISandData/COVID-19),
+    i.e. one daily report MM-DD-YYYY.csv per day, starting from 01-22-2020.
+
+    `countries` is a number of countries or a list of names; the first country
+    is split into `provinces` provinces, and reported as "Mainland China" as in
+    the early reports. The first `short_header_days` reports have the 6-column
+    header patched by PatcherWorld.fill_header, the following ones also list
+    the latitude and longitude. Countries enter the reports on different days,
+    as PatcherWorld.fill_data expects.
+    """
+    if isinstance(countries, int):
+        countries = csse_countries[:countries] + [
+            f"Country {i:03d}" for i in range(len(csse_countries), countries)
+        ]
+    countries = list(countries)
+
+    entities = [(f"Province {k:02d}", countries[0]) for k in range(provinces)]
+    entities += [("", country) for country in countries[min(provinces, 1) :]]
+
+    rng = np.random.default_rng(seed)
+    coordinates = rng.uniform((-50.0, -150.0), (60.0, 150.0), size=(len(entities), 2))
+    onsets = np.where(
+        np.arange(len(entities)) < max(provinces, 1),
+        0,
+        rng.integers(0, 45, size=len(entities)),
+    )
+
+    confirmed = get_cumulative_cases(len(entities), days, seed, onsets)
+    deaths = confirmed // 20
+    recovered = np.maximum(np.roll(confirmed, 21, axis=1) - deaths, 0)
+    recovered[:, :21] = 0
+
+    dir = os.path.join(root_dir, "csse_covid_19_data", "csse_covid_19_daily_reports")
+    os.makedirs(dir, exist_ok=True)
+
+    start = pd.Timestamp("2020-01-22")
+
+    for day in range(first_day, days):
+        date = start + pd.Timedelta(days=day)
+        rows = np.flatnonzero(onsets <= day)
+
+        if day < short_header_days:
+            columns = csse_columns[:6]
+            last_update = f"{date.month}/{date.day}/{date.year} 17:00"
+        else:
+            columns = csse_columns
+            last_update = date.strftime("%Y-%m-%dT17:00:00")
+
+        df = pd.DataFrame(
+            {
+                "Province/State": [entities[i][0] for i in rows],
+                "Country/Region": [
+                    "Mainland China"
+                    if entities[i][1] == countries[0] and day < 48
+                    else entities[i][1]
+                    for i in rows
+                ],
+                "Last Update": last_update,
+                "Confirmed": confirmed[rows, day],
+                "Deaths": deaths[rows, day],
+                "Recovered": recovered[rows, day],
+                "Latitude": coordinates[rows, 0].round(4),
+                "Longitude": coordinates[rows, 1].round(4),
+            },
+            columns=columns,
+        )
+        df.to_csv(os.path.join(dir, f"{date:%m-%d-%Y}.csv"), index=False)
+
+
+def write_openzh(root_dir, days=60, first_day=0, cantons=None, schema="v2", seed=0):
+    """
+    Write a synthetic clone of the openZH repository (openZH/covid_19), i.e. one
+    CSV file per canton with a row per day starting from 2020-02-25, and the
+    concatenation of all cantons. `schema` is either "v1" or "v2", the layouts
+    of fallzahlen_kanton_total_csv and fallzahlen_kanton_total_csv_v2.
+
+    As the files grow by one row per day, they are rewritten from the first day
+    whatever `first_day`.
+    """
+    if cantons is None:
+        cantons = openzh_cantons
+    elif isinstance(cantons, int):
+        cantons = openzh_cantons[:cantons]
+    cantons = list(cantons)
+
+    if schema not in openzh_schemas:
+        raise RuntimeError(f"openZH schema {schema} does not exist.")
+
+    cases = get_cumulative_cases(len(cantons), days, seed)
+    released = np.maximum(np.roll(cases, 14, axis=1) - cases // 25, 0)
+    released[:, :14] = 0
+    hospitalized = np.diff(cases, axis=1, prepend=0) // 8 + cases // 50
+
+    measures = {
+        "ncumul_tested": 10 * cases + 100,
+        "ncumul_conf": cases,
+        "ncumul_hosp": cases // 10,
+        "ncumul_ICU": cases // 40,
+        "ncumul_vent": cases // 60,
+        "new_hosp": np.diff(cases // 10, axis=1, prepend=0),
+        "current_hosp": hospitalized,
+        "current_icu": hospitalized // 4,
+        "current_vent": hospitalized // 6,
+        "ncumul_released": released,
+        "ncumul_deceased": cases // 25,
+    }
+
+    dir = os.path.join(root_dir, openzh_dirs[schema])
+    os.makedirs(dir, exist_ok=True)
+
+    dates = pd.date_range("2020-02-25", periods=days).strftime("%Y-%m-%d")
+
+    dfs = []
+    for i, canton in enumerate(cantons):
+        content = {
+            "date": dates,
+            "time": "15:00",
+            "abbreviation_canton_and_fl": canton,
+            "source": f"https://www.{canton.lower()}.ch",
+        }
+        for name, values in measures.items():
+            content[name] = values[i]
+
+        df = pd.DataFrame({name: content[name] for name in openzh_schemas[schema]})
+        df.to_csv(
+            os.path.join(dir, f"COVID19_Fallzahlen_Kanton_{canton}_total.csv"),
+            index=False,
+        )
+        dfs.append(df)
+
+    df = pd.concat(dfs).sort_values(["date", "abbreviation_canton_and_fl"])
+    df.to_csv(
+        os.path.join(root_dir, f"COVID19_Fallzahlen_CH_total_{schema}.csv"),
+        index=False,
+    )
+
+
+writers = {
+    "italy": write_dpc,
+    "world": write_csse,
+    "switzerland": write_openzh,
+}
+
+
+# the file marking the directories written by generate, which may be replaced
+marker = ".synthetic"
+
+
+def git(repo_dir, *args):
+    out = subprocess.run(
+        [
+            "git",
+            "-c",
+            "user.name=covid19",
+            "-c",
+            "user.email=covid19@localhost",
+            *args,
+        ],
+        cwd=repo_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    if out.returncode:
+        raise RuntimeError(f"git {' '.join(args)} failed: {out.stderr.strip()}")
+
+    return out.stdout.strip()
+
+
+def commit_repo(repo_dir, message, push=True):
+    """
+    Commit all changes in `repo_dir` and, if it has a remote, push them.
+    Return `False` if there was nothing to commit.
+    """
+    git(repo_dir, "add", "-A")
+    if not git(repo_dir, "status", "--porcelain"):
+        return False
+
+    git(repo_dir, "commit", "-q", "-m", message)
+    if push and git(repo_dir, "remote"):
+        git(repo_dir, "push", "-q", "origin", "HEAD")
+
+    return True
+
+
+def init_repo(repo_dir, remote_dir=None, branch="master"):
+    """
+    Turn the tree `repo_dir` into a git repository with a single commit on
+    `branch`. If `remote_dir` is given, create a bare repository there and
+    push to it, so that clones of `remote_dir` can be refreshed by the
+    updaters with `git pull`.
+    """
+    os.makedirs(repo_dir, exist_ok=True)
+    git(repo_dir, "init", "-q", "-b", branch)
+    commit_repo(repo_dir, "Add synthetic data", push=False)
+
+    if remote_dir is not None:
+        git(repo_dir, "init", "-q", "--bare", "-b", branch, os.path.abspath(remote_dir))
+        git(repo_dir, "remote", "add", "origin", os.path.abspath(remote_dir))
+        git(repo_dir, "push", "-q", "-u", "origin", branch)
+
+
+def clone_repo(remote_dir, repo_dir, branch="master"):
+    """ Clone the repository `remote_dir`, e.g. into the directory of a loader. """
+    git(
+        os.path.dirname(os.path.abspath(repo_dir)),
+        "clone",
+        "-q",
+        "-b",
+        branch,
+        os.path.abspath(remote_dir),
+        os.path.abspath(repo_dir),
+    )
+
+
+def is_replaceable(dir):
+    """
+    Whether the directory `dir` can be replaced by a synthetic dataset, i.e. it
+    does not exist, is empty or holds a dataset written by :func:`generate`.
+    """
+    if not os.path.isdir(dir):
+        return True
+    return len(os.listdir(dir)) == 0 or os.path.isfile(os.path.join(dir, marker))
+
+
+def generate(
+    name, root_dir, days=60, git_repo=False, remote_dir=None, force=False, **kwargs
+):
+    """
+    Write the synthetic dataset `name` ("italy", "world" or "switzerland") into
+    `root_dir`, replacing its content; the keyword arguments are passed on to
+    the writer. If `git_repo` is `True`, or a `remote_dir` is given, the tree
+    is committed to a fresh git repository (see :func:`init_repo`).
+
+    Unless `force` is `True`, the directories which are neither empty nor
+    written by a previous call, e.g. the checkouts of the real data, are never
+    replaced.
+    """
+    if name not in writers:
+        raise RuntimeError(f"Synthetic dataset {name} does not exist.")
+
+    dirs = [dir for dir in (root_dir, remote_dir) if dir is not None]
+    for dir in dirs:
+        if not force and not is_replaceable(dir):
+            raise RuntimeError(
+                f"{dir} does not contain synthetic data; refusing to replace it."
+            )
+    for dir in dirs:
+        if os.path.isdir(dir):
+            shutil.rmtree(dir)
+
+    print(f"Write {days} days of synthetic data for {name} into {root_dir} ...")
+    writers[name](root_dir, days=days, **kwargs)
+    with open(os.path.join(root_dir, marker), "w") as file:
+        file.write(f"{name}\n")
+
+    if git_repo or remote_dir is not None:
+        branch = getattr(config, f"repo_{name}_branch")
+        init_repo(root_dir, remote_dir, branch)
+    if remote_dir is not None:
+        with open(os.path.join(remote_dir, marker), "w") as file:
+            file.write(f"{name}\n")
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+
+enabled = False
+
+# the callbacks invoked with each record, e.g. to log or export it
+listeners = []
+
+# the totals of each stage: calls, wall time, CPU time, rows and bytes
+totals = {}
+
+lock = threading.Lock()
+
+# the stages currently running in each thread
+local = threading.local()
+
+
+class timer:
+    """
+    Time the enclosed block as the stage `name`. The rows and bytes processed
+    can be set on the timer within the block; the stages nested in a running
+    stage of the same name, e.g. recursive calls, are not recorded twice.
+    """
+
+    __slots__ = ("name", "rows", "nbytes", "active", "wall", "cpu")
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.nbytes = None
+        self.active = False
+
+    def __enter__(self):
+        if not enabled:
+            return self
+
+        running = getattr(local, "running", None)
+        if running is None:
+            running = local.running = set()
+        if self.name in running:
+            return self
+
+        running.add(self.name)
+        self.active = True
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.active:
+            return False
+
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        local.running.discard(self.name)
+        self.active = False
+
+        record = {
+            "stage": self.name,
+            "start": time.time() - wall,
+            "wall": wall,
+            "cpu": cpu,
+            "rows": self.rows,
+            "bytes": self.nbytes,
+            "failed": exc_type is not None,
+        }
+        add_record(record)
+
+        return False
+
+
+def timed(name=None, rows=None, nbytes=None):
+    """
+    Decorator timing each call of the decorated function as the stage `name`,
+    which defaults to the qualified name of the function. `rows` and `nbytes`
+    are optional callables computing the rows and bytes processed from the
+    value returned by the function.
+    """
+
+    def wrapper(fct):
+        stage = name or fct.__qualname__
+
+        @functools.wraps(fct)
+        def wrapped(*args, **kwargs):
+            if not enabled:
+                return fct(*args, **kwargs)
+
+            with timer(stage) as t:
+                out = fct(*args, **kwargs)
+                if t.active:
+                    t.rows = None if rows is None else rows(out)
+                    t.nbytes = None if nbytes is None else nbytes(out)
+            return out
+
+        return wrapped
+
+    return wrapper
+
+
+def get_file_sizes(filenames):
+    return sum(os.path.getsize(str(filename)) for filename in filenames)
+
+
+def add_record(record):
+    with lock:
+        total = totals.setdefault(record["stage"], [0, 0.0, 0.0, 0, 0])
+        total[0] += 1
+        total[1] += record["wall"]
+        total[2] += record["cpu"]
+        total[3] += record["rows"] or 0
+        total[4] += record["bytes"] or 0
+        callbacks = list(listeners)
+
+    for listener in callbacks:
+        listener(record)
+
+
+def get_summary():
+    """ The totals of each stage, sorted by decreasing wall time. """
+    with lock:
+        items = sorted(totals.items(), key=lambda item: -item[1][1])
+
+    return [
+        {
+            "stage": stage,
+            "calls": calls,
+            "wall": wall,
+            "cpu": cpu,
+            "rows": rows,
+            "bytes": nbytes,
+        }
+        for stage, (calls, wall, cpu, rows, nbytes) in items
+    ]
+
+
+def print_summary():
+    summary = get_summary()
+    if len(summary) == 0:
+        return
+
+    width = max(len(item["stage"]) for item in summary)
+    print(
+        f"{'stage':<{width}s} {'calls':>7s} {'wall [s]':>10s} {'cpu [s]':>10s} "
+        f"{'rows':>10s} {'MB':>10s}"
+    )
+    for item in summary:
+        print(
+            f"{item['stage']:<{width}s} {item['calls']:7d} {item['wall']:10.3f} "
+            f"{item['cpu']:10.3f} {item['rows']:10d} {item['bytes'] / 2**20:10.2f}"
+        )
+
+
+def get_json_logger(filename):
+    file = open(filename, "a", buffering=1)
+
+    def log(record):
+        file.write(json.dumps(record) + "\n")
+
+    atexit.register(file.close)
+
+    return log
+
+
+def enable(summary=True, logfile=None):
+    """
+    Start recording the stages, i.e. the blocks wrapped by :class:`timer` and
+    the functions decorated with :func:`timed`; when disabled, they cost a
+    single flag check. If `summary` is `True`, print the summary table
+    at exit; if `logfile` is given, append each record to it as a JSON line.
+    """
+    global enabled
+
+    if summary:
+        atexit.unregister(print_summary)
+        atexit.register(print_summary)
+    if logfile is not None:
+        listeners.append(get_json_logger(logfile))
+
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with lock:
+        totals.clear()
+
+
+# COVID19_TIMING=1 prints the summary at exit, COVID19_TIMING=<filename> appends
+# the records to the file as JSON lines
+if os.environ.get("COVID19_TIMING", "") not in ("", "0"):
+    if os.environ["COVID19_TIMING"] == "1":
+        enable(summary=True)
+    else:
+        enable(summary=False, logfile=os.environ["COVID19_TIMING"])
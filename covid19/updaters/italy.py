@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
-from covid19 import config
+from covid19 import config, timing
 from covid19.updater import Updater, registry
 from covid19.updaters.utils import update_repo
 
 
 @registry(name="italy")
 class UpdaterItaly(Updater):
+    @timing.timed()
     def run(self):
-        update_repo(
+        return update_repo(
             config.repo_italy_dir, config.repo_italy_branch, config.repo_italy_logfile
         )
 
@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
-from covid19 import config
+from covid19 import config, timing
 from covid19.updater import Updater, registry
 from covid19.updaters.utils import update_repo
 
 
 @registry(name="switzerland")
 class UpdaterSwitzerland(Updater):
+    @timing.timed()
     def run(self):
-        update_repo(
+        return update_repo(
             config.repo_switzerland_dir, config.repo_switzerland_branch, config.repo_switzerland_logfile
         )
 
@@ -2,8 +2,82 @@
 import os
 import subprocess
 
+from covid19 import metrics
+
+
+def get_repo_version(repo_dir):
+    # a submodule checkout has a .git file, a standalone clone a .git directory
+    if not os.path.exists(os.path.join(repo_dir, ".git")):
+        return None
+
+    out = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=repo_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+    )
+
+    return out.stdout.strip() if out.returncode == 0 else None
+
+
+def get_repo_size(repo_dir):
+    """ Size in bytes of the git objects of the repository, 0 if not available. """
+    out = subprocess.run(
+        ["git", "count-objects", "-v"],
+        cwd=repo_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+    )
+    if out.returncode:
+        return 0
+
+    sizes = dict(line.split(": ") for line in out.stdout.splitlines())
+    return 1024 * (int(sizes.get("size", 0)) + int(sizes.get("size-pack", 0)))
+
+
+def count_changed_files(repo_dir, old_version, new_version):
+    if old_version == new_version:
+        return 0
+
+    args = ["git", "ls-files"]
+    if old_version is not None:
+        args = ["git", "diff", "--name-only", old_version, new_version]
+
+    out = subprocess.run(
+        args,
+        cwd=repo_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+    )
+
+    return len(out.stdout.splitlines()) if out.returncode == 0 else 0
+
+
+def record_update_metrics(repo_dir, old_version, old_size):
+    dataset = os.path.basename(os.path.normpath(repo_dir))
+    new_version = get_repo_version(repo_dir)
+
+    # git may repack or prune the objects while pulling, shrinking the repository
+    metrics.add(
+        "covid19_update_bytes_pulled",
+        max(get_repo_size(repo_dir) - old_size, 0),
+        dataset=dataset,
+    )
+    metrics.add(
+        "covid19_update_files_changed",
+        count_changed_files(repo_dir, old_version, new_version),
+        dataset=dataset,
+    )
+
 
 def update_repo(repo_dir, repo_branch, repo_logfile):
+    """ Pull the latest data; return `True` if the checkout has changed. """
+    old_version = get_repo_version(repo_dir)
+    old_size = get_repo_size(repo_dir) if metrics.enabled and old_version else 0
+
     if not os.path.isdir(repo_dir):
         print("Clone the repo {} ...".format(repo_dir))
 
@@ -13,7 +87,7 @@ def update_repo(repo_dir, repo_branch, repo_logfile):
             )
             if clone.returncode:
                 print("Clone failed. Please see {}.".format(repo_logfile))
-                return
+                return False
             else:
                 pass
 
@@ -34,7 +108,7 @@ def update_repo(repo_dir, repo_branch, repo_logfile):
                 )
             )
             os.chdir(pwd)
-            return
+            return False
 
         pull = subprocess.run(["git", "pull"], stdout=logfile, stderr=logfile)
         if pull.returncode:
@@ -44,8 +118,11 @@ def update_repo(repo_dir, repo_branch, repo_logfile):
                 )
             )
             os.chdir(pwd)
-            return
+            return False
         else:
             os.chdir(pwd)
 
+    if metrics.enabled:
+        record_update_metrics(repo_dir, old_version, old_size)
 
+    return get_repo_version(repo_dir) != old_version
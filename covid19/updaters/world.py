@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
-from covid19 import config
+from covid19 import config, timing
 from covid19.updater import Updater, registry
 from covid19.updaters.utils import update_repo
 
 
 @registry(name="world")
 class UpdaterWorld(Updater):
+    @timing.timed()
     def run(self):
-        update_repo(
+        return update_repo(
             config.repo_world_dir, config.repo_world_branch, config.repo_world_logfile
         )
 
@@ -1,5 +1,25 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime
+import hashlib
+import importlib
+import numpy as np
+import os
+
+
+class LazyModule:
+    """
+    Stand-in for a module which is imported on first attribute access, so that
+    the code paths which never use the module do not pay for importing it.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
 
 
 def convert_string_to_datetime(time_string):
@@ -7,3 +27,50 @@ def convert_string_to_datetime(time_string):
     month = int(time_string[5:7])
     day = int(time_string[8:10])
     return datetime(year=year, month=month, day=day)
+
+
+def compute_increments(data, relative=False, percentage=False):
+    """
+    Compute the day-by-day (relative) increments of a batch of series stored
+    along the last axis of `data`. The first increment is zero, as well as the
+    relative increments over days where the series vanishes.
+    """
+    data = np.asarray(data, dtype=float)
+
+    out = np.zeros_like(data)
+    out[..., 1:] = data[..., 1:] - data[..., :-1]
+
+    if relative or percentage:
+        previous = data[..., :-1]
+        out[..., 1:] = np.divide(
+            out[..., 1:],
+            previous,
+            out=np.zeros_like(previous),
+            where=~np.isclose(previous, 0.0),
+        )
+        if percentage:
+            out *= 100.0
+
+    return out
+
+
+def get_files_version(root_dir):
+    """
+    Hash the relative path, size and modification time of all files under
+    `root_dir`, so that the hash changes whenever any file is touched.
+    Return `None` if the directory does not exist.
+    """
+    if not os.path.isdir(root_dir):
+        return None
+
+    digest = hashlib.sha1()
+
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        dirnames[:] = sorted(dirname for dirname in dirnames if dirname != ".git")
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            relpath = os.path.relpath(path, root_dir)
+            stat = os.stat(path)
+            digest.update(f"{relpath}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+
+    return digest.hexdigest()
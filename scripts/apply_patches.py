@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
+from covid19 import profiling
 from covid19.patcher import Patcher, ledger
 
 
-if __name__ == "__main__":
+def main():
     for name in ledger:
         patcher = Patcher.factory(name, update_data=True)
         patcher.run()
+
+
+if __name__ == "__main__":
+    profiling.run(main)
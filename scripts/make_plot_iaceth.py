@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from covid19 import profiling
 from covid19.monitor import MonitorComposite
 
 
@@ -6,7 +7,7 @@ fontsize = 14
 figsize = (13, 7)
 
 
-if __name__ == "__main__":
+def main():
     from scripts.make_plot_iaceth_1 import main as get_monitor_1
     from scripts.make_plot_iaceth_2 import main as get_monitor_2
 
@@ -20,3 +21,7 @@ if __name__ == "__main__":
     monitor = MonitorComposite(slaves, nrows=1, ncols=2, figure_properties=figure_properties)
 
     monitor.run(show=True)
+
+
+if __name__ == "__main__":
+    profiling.run(main)
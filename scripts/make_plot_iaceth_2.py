@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import functools
 
-from covid19 import config
+from covid19 import config, profiling
 from covid19.drawers import TimeSeriesDrawer
 from covid19.loader import Loader
 from covid19.monitor import Monitor
@@ -88,4 +88,4 @@ def main(draw=False):
 
 
 if __name__ == "__main__":
-    main(draw=True)
+    profiling.run(main, draw=True)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import functools
 
-from covid19 import config
+from covid19 import config, profiling
 from covid19.drawers import TimeSeriesDrawer
 from covid19.loader import Loader
 from covid19.monitor import Monitor
@@ -38,7 +38,7 @@ title = "$\\mathbf{(a)}$ Raw figures"
 legend_loc = "best"
 
 
-if __name__ == "__main__":
+def main():
     # labels = []
     # for i in range(len(fields)):
     #     if regions[i] is None and provinces[i] is None:
@@ -98,3 +98,7 @@ if __name__ == "__main__":
         axes_properties=axes_properties,
     )
     monitor.run(show=True)
+
+
+if __name__ == "__main__":
+    profiling.run(main)
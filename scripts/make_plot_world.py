@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import functools
 
-from covid19 import config
+from covid19 import config, profiling
 from covid19.drawers import TimeSeriesDrawer
 from covid19.loader import Loader
 from covid19.monitor import Monitor
@@ -25,7 +25,7 @@ y_label = "Confirmed cases"
 y_scale = "log"
 
 
-if __name__ == "__main__":
+def main():
     # labels = []
     # for i in range(len(fields)):
     #     label = provinces[i] if provinces[i] else countries[i]
@@ -75,3 +75,7 @@ if __name__ == "__main__":
         axes_properties=axes_properties,
     )
     monitor.run(show=True)
+
+
+if __name__ == "__main__":
+    profiling.run(main)
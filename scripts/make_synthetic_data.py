@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import argparse
+import os
+
+from covid19 import profiling, synthetic
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write synthetic DPC, CSSE and openZH datasets, e.g. to run "
+        "the loaders, patchers and benchmarks offline. Point the loaders to them "
+        "by setting covid19.config.repo_<name>_dir to <output>/<name>."
+    )
+    parser.add_argument(
+        "datasets",
+        nargs="*",
+        help="The datasets to write, among {}. Defaults to all.".format(
+            ", ".join(synthetic.writers)
+        ),
+    )
+    parser.add_argument(
+        "-o", "--output", required=True, help="The directory to write the datasets to."
+    )
+    parser.add_argument(
+        "-d", "--days", type=int, default=60, help="Number of days. Defaults to 60."
+    )
+    parser.add_argument(
+        "-s", "--seed", type=int, default=0, help="Random seed. Defaults to 0."
+    )
+    parser.add_argument(
+        "--regions",
+        type=int,
+        default=None,
+        help="Number of Italian regions. Defaults to all 21.",
+    )
+    parser.add_argument(
+        "--provinces-per-region",
+        type=int,
+        default=5,
+        help="Number of provinces per Italian region. Defaults to 5.",
+    )
+    parser.add_argument(
+        "--dpc-schemas",
+        nargs="+",
+        choices=list(synthetic.dpc_schemas),
+        default=["2020-04"],
+        help="The DPC headers, used in turn over the days. Defaults to 2020-04, "
+        "i.e. the current headers.",
+    )
+    parser.add_argument(
+        "--countries",
+        type=int,
+        default=20,
+        help="Number of countries in the CSSE reports. Defaults to 20.",
+    )
+    parser.add_argument(
+        "--short-header-days",
+        type=int,
+        default=synthetic.csse_short_header_days,
+        help="Number of CSSE reports with the 6-column header. Defaults to "
+        f"{synthetic.csse_short_header_days}, as in the real repository.",
+    )
+    parser.add_argument(
+        "--openzh-schema",
+        choices=list(synthetic.openzh_schemas),
+        default="v2",
+        help="The openZH file layout. Defaults to v2.",
+    )
+    parser.add_argument(
+        "-g",
+        "--git",
+        action="store_true",
+        help="Commit each dataset to a git repository.",
+    )
+    parser.add_argument(
+        "-r",
+        "--remote",
+        action="store_true",
+        help="Also push each repository to a bare remote <output>/<name>.git, from "
+        "which the updaters can pull.",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Replace the output directories even if they do not contain synthetic "
+        "data, e.g. the checkouts of the real data.",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    kwargs = {
+        "italy": {
+            "regions": args.regions,
+            "provinces_per_region": args.provinces_per_region,
+            "schemas": args.dpc_schemas,
+        },
+        "world": {
+            "countries": args.countries,
+            "short_header_days": args.short_header_days,
+        },
+        "switzerland": {"schema": args.openzh_schema},
+    }
+
+    for name in args.datasets or synthetic.writers:
+        remote_dir = os.path.join(args.output, name + ".git") if args.remote else None
+        synthetic.generate(
+            name,
+            os.path.join(args.output, name),
+            days=args.days,
+            git_repo=args.git,
+            remote_dir=remote_dir,
+            force=args.force,
+            seed=args.seed,
+            **kwargs.get(name, {}),
+        )
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
+from covid19 import profiling
 from covid19.updater import Updater, ledger
 
 
-if __name__ == "__main__":
+def main():
     for name in ledger:
         updater = Updater.factory(name)
         updater.run()
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import argparse
+
+from covid19 import profiling
+from covid19.renderer import BatchRenderer
+from covid19.specs import load_specs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render many figures at once with a pool of headless workers."
+    )
+    parser.add_argument(
+        "specs",
+        nargs="+",
+        help="JSON or YAML files with the list of figure specs; each spec is either "
+        "a declarative figure spec (see covid19.specs.FigureSpec and "
+        "scripts/specs/make_plot_italy.json), or an object with the keys 'monitor' "
+        "(e.g. 'scripts.make_plot_iaceth_1:main'), 'save_dest' and optionally "
+        "'kwargs' and 'profile'.",
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of worker processes. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "-u",
+        "--update",
+        action="store_true",
+        help="Pull the latest data before rendering the declarative figure specs.",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Render all figures, even those which are up to date with the data.",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    specs = load_specs(args.specs)
+    if args.update:
+        for spec in specs:
+            if hasattr(spec, "update_data"):
+                spec.update_data = True
+
+    renderer = BatchRenderer(
+        specs, processes=args.processes, use_cache=not args.force
+    )
+    renderer.run()
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -4,8 +4,8 @@ import sys
 from setuptools import setup, find_packages
 
 
-if sys.version_info.major < 3:
-    print("Python 3.x is required.")
+if sys.version_info < (3, 7):
+    print("Python 3.7 or later is required.")
     sys.exit(1)
 
 
@@ -38,6 +38,7 @@ setup(
     keywords="",
     license="",
     packages=find_packages(),
+    python_requires=">=3.7",
     install_requires=read_file("requirements.txt").split("\n"),
     setup_requires=["setuptools_scm", "pytest-runner"],
     tests_require=["pytest"],
@@ -48,8 +49,6 @@ setup(
         "Natural Language :: English",
         "Operating System :: POSIX",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.5",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
     ),
 )
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from covid19 import config, synthetic
+from covid19.config import Shorthands
+from covid19.loader import Loader
+from covid19.loaders.italy import LoaderItaly
+
+
+@pytest.fixture
+def shorthands(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "repo_italy_dir", str(tmp_path / "italy"))
+    monkeypatch.setattr(config, "shorthands", Shorthands(config.static_shorthands))
+    loader = Loader.factory("italy", False, False)
+    loader.unmount()
+    yield config.shorthands
+    loader.unmount()
+
+
+def test_static_shorthands_without_provinces(shorthands, capsys):
+    assert shorthands["Italy"] == "ITA"
+    assert shorthands.get("Lazio") == "LAZ"
+    assert "Veneto" in shorthands
+    assert capsys.readouterr().out == ""
+
+
+def test_missing_provinces_are_reported_once(shorthands, capsys, tmp_path):
+    assert shorthands.get("Provincia DW") is None
+    assert shorthands.get("Provincia DW") is None
+    assert len(shorthands) == len(config.static_shorthands)
+    assert capsys.readouterr().out.count("Could not read") == 1
+
+    # the data arrive, but the provinces are looked up again only once mounted
+    synthetic.write_dpc(str(tmp_path / "italy"), days=3, regions=2)
+    assert shorthands.get("Provincia DW") is None
+
+    LoaderItaly.instance.get_dataset("provinces")
+    assert shorthands["Provincia DW"] == "DW"
+    assert "Could not read" not in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("instance", ["evicted", "uninitialized"])
+def test_province_shorthands_fall_back_to_csv(
+    shorthands, monkeypatch, tmp_path, instance
+):
+    synthetic.write_dpc(str(tmp_path / "italy"), days=3, regions=2)
+    if instance == "uninitialized":
+        monkeypatch.setattr(LoaderItaly, "instance", object.__new__(LoaderItaly))
+
+    assert shorthands["Provincia DW"] == "DW"
+    assert synthetic.dpc_placeholder not in shorthands
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import io
+import os
+import pickle
+import threading
+
+import pandas as pd
+import pytest
+
+from covid19 import config, synthetic
+from covid19.loader import Loader, manager
+
+
+@pytest.fixture
+def loader(monkeypatch, tmp_path):
+    """ A loader over synthetic data, with a budget fitting a single dataset. """
+    monkeypatch.setattr(config, "repo_italy_dir", str(tmp_path / "italy"))
+    monkeypatch.setattr(config, "memory_budget", 1)
+    monkeypatch.setattr(config, "spill_dir", str(tmp_path / "spill"))
+    synthetic.write_dpc(str(tmp_path / "italy"), days=10, regions=4)
+
+    loader = Loader.factory("italy", False, False)
+    loader.unmount()
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield loader
+    loader.unmount()
+
+
+def assert_same_data(dfs, reference):
+    assert len(dfs) == len(reference)
+    for df, df_reference in zip(dfs, reference):
+        pd.testing.assert_frame_equal(df, df_reference)
+
+
+def test_evicted_dataset_is_spilled_and_restored(loader):
+    country = loader.get_dataset("country")
+    reference = [df.copy() for df in country]
+
+    loader.get_dataset("regions")
+
+    key = (loader, "country")
+    assert loader.data_country is None
+    assert key not in manager.mounted
+    assert os.path.exists(manager.spilled[key])
+
+    assert_same_data(loader.get_dataset("country"), reference)
+    assert loader.data_regions is None
+    assert list(manager.mounted) == [key]
+
+    loader.unmount()
+    assert manager.spilled == {}
+    assert os.listdir(config.spill_dir) == []
+
+
+def block_spill(monkeypatch, data):
+    """
+    Hold the pickling of `data` until the returned `resume` event is set, and
+    report through `started` that the spill is under way.
+    """
+    started, resume = threading.Event(), threading.Event()
+    dump = pickle.dump
+
+    def blocking_dump(obj, *args, **kwargs):
+        if obj is data:
+            started.set()
+            assert resume.wait(10)
+        return dump(obj, *args, **kwargs)
+
+    monkeypatch.setattr(pickle, "dump", blocking_dump)
+    return started, resume
+
+
+def test_concurrent_queries_during_spill(loader, monkeypatch):
+    reference = [df.copy() for df in loader.get_dataset("country")]
+    started, resume = block_spill(monkeypatch, loader.data_country)
+
+    # mounting the regions evicts the country, held while being spilled
+    spiller = threading.Thread(target=loader.get_dataset, args=("regions",))
+    spiller.start()
+    assert started.wait(10)
+    assert loader.data_country is None
+    assert (loader, "country") not in manager.spilled
+
+    # meanwhile the queries mount the country again, once for all of them
+    outs = [None] * 4
+
+    def query(index):
+        outs[index] = loader.get_dataset("country")
+
+    workers = [threading.Thread(target=query, args=(i,)) for i in range(len(outs))]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    resume.set()
+    spiller.join()
+
+    assert all(out is outs[0] for out in outs)
+    assert_same_data(outs[0], reference)
+
+    # the spilled copy is complete, and is read back on the next eviction
+    loader.get_dataset("regions")
+    assert loader.data_country is None
+    assert_same_data(loader.get_dataset("country"), reference)
+
+
+def test_discard_during_spill_drops_the_pickle(loader, monkeypatch):
+    loader.get_dataset("country")
+    started, resume = block_spill(monkeypatch, loader.data_country)
+
+    spiller = threading.Thread(target=loader.get_dataset, args=("regions",))
+    spiller.start()
+    assert started.wait(10)
+
+    # e.g. a refresh, while the old data are being written
+    manager.discard(loader, "country")
+    resume.set()
+    spiller.join()
+
+    assert (loader, "country") not in manager.spilled
+    assert [
+        filename
+        for filename in os.listdir(config.spill_dir)
+        if filename.startswith("italy-country")
+    ] == []
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+import collections
+import contextlib
+import io
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from covid19 import config, synthetic
+from covid19.loader import Loader, manager
+from covid19.loaders import LoaderItaly, LoaderWorld
+from covid19.patcher import Patcher
+
+
+queries = [
+    ("italy", "totale_casi", {}),
+    ("italy", "incremento_totale_casi", {"region": "Lazio"}),
+    ("italy", "terapia_intensiva", {"region": ["Lazio", "Veneto", "Sicilia"]}),
+    ("italy", "totale_casi", {"province": "Provincia DW"}),
+    ("italy", "incremento_totale_casi", {"province": ["Provincia DW", "Provincia EA"]}),
+    ("world", "Confirmed", {"country": "China"}),
+    ("world", "increase_Deaths", {"country": ["China", "Germany", "France"]}),
+]
+
+
+@pytest.fixture(scope="module")
+def repo_dirs(tmp_path_factory):
+    work_dir = tmp_path_factory.mktemp("data")
+    italy_dir, world_dir = str(work_dir / "italy"), str(work_dir / "world")
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(config, "repo_world_dir", world_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            synthetic.generate("italy", italy_dir, days=20)
+            synthetic.generate("world", world_dir, days=20, countries=20)
+            Patcher.factory("world", update_data=False).run()
+
+    return italy_dir, world_dir
+
+
+@pytest.fixture
+def loaders(monkeypatch, repo_dirs):
+    """ Fresh singletons, with their mounts and the evictions counted. """
+    monkeypatch.setattr(config, "repo_italy_dir", repo_dirs[0])
+    monkeypatch.setattr(config, "repo_world_dir", repo_dirs[1])
+    monkeypatch.setattr(config, "memory_budget", None)
+    monkeypatch.setattr(config, "spill_dir", None)
+    monkeypatch.setattr(LoaderItaly, "instance", None)
+    monkeypatch.setattr(LoaderWorld, "instance", None)
+
+    stats = {
+        "mounts": collections.Counter(),
+        "running": collections.Counter(),
+        "overlaps": collections.Counter(),
+        "evictions": collections.Counter(),
+    }
+    lock = threading.Lock()
+
+    def count_mounts(cls, dataset, method):
+        mount = getattr(cls, method)
+
+        def wrapped(self):
+            with lock:
+                stats["mounts"][dataset] += 1
+                stats["running"][dataset] += 1
+                if stats["running"][dataset] > 1:
+                    stats["overlaps"][dataset] += 1
+            try:
+                return mount(self)
+            finally:
+                with lock:
+                    stats["running"][dataset] -= 1
+
+        monkeypatch.setattr(cls, method, wrapped)
+
+    for cls in (LoaderItaly, LoaderWorld):
+        for dataset, (_, method) in cls.datasets.items():
+            count_mounts(cls, dataset, method)
+
+    select_victims = manager.select_victims
+
+    def count_evictions(keep=None):
+        victims = select_victims(keep)
+        for _, dataset, _, _, _ in victims:
+            stats["evictions"][dataset] += 1
+        return victims
+
+    monkeypatch.setattr(manager, "select_victims", count_evictions)
+
+    yield stats
+
+    for cls in (LoaderItaly, LoaderWorld):
+        if cls.instance is not None:
+            cls.instance.unmount()
+
+
+def run_serially():
+    """ Run the queries in turn; return their output and the dataset sizes. """
+    with contextlib.redirect_stdout(io.StringIO()):
+        outs = [
+            Loader.factory(name, False, False).run(field, **kwargs)
+            for name, field, kwargs in queries
+        ]
+
+    sizes = {}
+    for loader in (LoaderItaly.instance, LoaderWorld.instance):
+        sizes.update(loader.get_memory_usage())
+        loader.unmount()
+
+    return outs, sizes
+
+
+def hammer(threads=8, rounds=1, seed=0):
+    """
+    Start `threads` threads at once, each instantiating the loaders and running
+    all the queries `rounds` times in a random order.
+    """
+    LoaderItaly.instance = None
+    LoaderWorld.instance = None
+
+    instances = set()
+    results = collections.defaultdict(list)
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+    names = {name for name, _, _ in queries}
+
+    def work(index):
+        order = list(range(len(queries))) * rounds
+        random.Random(seed + index).shuffle(order)
+        try:
+            barrier.wait()
+            loaders = {name: Loader.factory(name, False, False) for name in names}
+            with lock:
+                instances.update(id(loader) for loader in loaders.values())
+
+            for i in order:
+                name, field, kwargs = queries[i]
+                out = loaders[name].run(field, **kwargs)
+                with lock:
+                    results[i].append(out)
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    return instances, results, errors
+
+
+def check_results(results, reference):
+    for i, outs in results.items():
+        for time, data in outs:
+            assert list(time) == list(reference[i][0])
+            assert np.array_equal(
+                np.asarray(data, dtype=float),
+                np.asarray(reference[i][1], dtype=float),
+                equal_nan=True,
+            )
+
+
+def test_concurrent_queries_mount_each_dataset_once(loaders):
+    reference, _ = run_serially()
+    loaders["mounts"].clear()
+
+    instances, results, errors = hammer()
+
+    assert errors == []
+    assert len(instances) == 2
+    assert loaders["mounts"] == {
+        "country": 1,
+        "regions": 1,
+        "provinces": 1,
+        "reports": 1,
+    }
+    check_results(results, reference)
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_concurrent_queries_with_evictions(loaders, monkeypatch, tmp_path, spill):
+    reference, sizes = run_serially()
+
+    # room for the largest dataset and a bit more, but not for all of them
+    monkeypatch.setattr(config, "memory_budget", int(1.2 * max(sizes.values())))
+    if spill:
+        monkeypatch.setattr(config, "spill_dir", str(tmp_path / "spill"))
+    loaders["mounts"].clear()
+    loaders["evictions"].clear()
+
+    instances, results, errors = hammer()
+
+    assert errors == []
+    assert len(instances) == 2
+    assert sum(loaders["evictions"].values()) > 0
+    assert sum(loaders["overlaps"].values()) == 0
+    for dataset, mounts in loaders["mounts"].items():
+        assert mounts <= 1 + loaders["evictions"][dataset]
+    check_results(results, reference)
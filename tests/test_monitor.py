@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import matplotlib
+
+matplotlib.use("Agg")
+
+import datetime  # noqa: E402
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from covid19.drawers import TimeSeriesDrawer  # noqa: E402
+from covid19.monitor import (  # noqa: E402
+    Monitor,
+    MonitorComposite,
+    MonitorSmallMultiples,
+)
+
+
+def get_days(n):
+    return [f"03-{day:02d}" for day in range(1, n + 1)]
+
+
+def get_dates(n):
+    start = datetime.date(2020, 2, 24)
+    return [(start + datetime.timedelta(days=i)).strftime("%m-%d") for i in range(n)]
+
+
+def get_overlapping_ticklabels(fig, axes):
+    """ The pairs of visible tick labels of the x-axes which overlap. """
+    fig.canvas.draw()
+    renderer = fig.canvas.get_renderer()
+    boxes = [
+        label.get_window_extent(renderer)
+        for ax in axes
+        if ax.xaxis.get_tick_params()["labelbottom"]
+        for label in ax.get_xticklabels()
+        if label.get_visible() and label.get_text() != ""
+    ]
+    return [
+        (i, j)
+        for i in range(len(boxes))
+        for j in range(i + 1, len(boxes))
+        if boxes[i].overlaps(boxes[j])
+    ], len(boxes)
+
+
+def get_monitor(days, **axes_properties):
+    return Monitor(
+        [lambda: (get_days(days), list(range(days)))],
+        [TimeSeriesDrawer({"legend_label": "cases"})],
+        axes_properties=axes_properties,
+    )
+
+
+def test_update_places_the_ticks_over_the_new_days():
+    monitor = get_monitor(10, x_ticklabels_step=3, x_ticklabels_rotation=45)
+    fig, ax = monitor.run()
+
+    monitor.update([(get_days(16), list(range(16)))])
+    fig.canvas.draw()
+
+    labels = ax.get_xticklabels()
+    assert [label.get_text() for label in labels] == get_days(16)[::3]
+    assert all(label.get_rotation() == 45 for label in labels)
+    plt.close(fig)
+
+
+def test_composite_run_twice_does_not_duplicate_the_panels():
+    monitor = MonitorComposite(
+        [get_monitor(10, legend_on=True), get_monitor(10, legend_on=True)], 1, 2
+    )
+
+    for fig in (None, plt.figure()):
+        for _ in range(2):
+            out_fig, _ = monitor.run(fig=fig)
+
+        assert len(out_fig.get_axes()) == 2
+        for ax in out_fig.get_axes():
+            assert len(ax.get_lines()) == 1
+            assert len(ax.get_legend().get_texts()) == 1
+        plt.close(out_fig)
+
+
+@pytest.mark.parametrize(
+    "names, days, figure_properties",
+    [(12, 60, None), (12, 250, None), (40, 250, None), (12, 250, {"figsize": (6, 4)})],
+)
+def test_small_multiples_ticklabels_do_not_overlap(names, days, figure_properties):
+    names = [f"Provincia {i}" for i in range(names)]
+    monitor = MonitorSmallMultiples(None, names, figure_properties=figure_properties)
+    rng = np.random.default_rng(0)
+
+    fig, axes = monitor.run(data=[(get_dates(days), rng.random((len(names), days)))])
+    overlaps, count = get_overlapping_ticklabels(fig, axes)
+    assert count > 0
+    assert overlaps == []
+
+    # the step follows the longer time axis
+    days *= 2
+    monitor.update(data=[(get_dates(days), rng.random((len(names), days)))])
+    overlaps, count = get_overlapping_ticklabels(fig, axes)
+    assert count > 0
+    assert overlaps == []
+    plt.close(fig)
+
+
+def test_small_multiples_ticklabels_step_is_kept():
+    monitor = MonitorSmallMultiples(
+        None, ["A", "B"], axes_properties={"x_ticklabels_step": 3}
+    )
+
+    fig, axes = monitor.run(data=[(get_dates(10), np.ones((2, 10)))])
+
+    labels = [label.get_text() for label in axes[0].get_xticklabels()]
+    assert labels == get_dates(10)[::3]
+    plt.close(fig)
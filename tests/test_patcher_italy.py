@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from covid19 import config, synthetic
+from covid19.loader import Loader
+from covid19.patchers.italy import PatcherItaly
+
+
+@pytest.fixture
+def loader(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "repo_italy_dir", str(tmp_path / "italy"))
+    loader = Loader.factory("italy", False, False)
+    loader.unmount()
+    yield loader
+    loader.unmount()
+
+
+def mount(loader, repo_dir, monkeypatch):
+    monkeypatch.setattr(config, "repo_italy_dir", str(repo_dir))
+    loader.unmount()
+    return {
+        field: loader.run(field, region=["Lazio", "Veneto"])[1]
+        for field in ("totale_casi", "totale_positivi", "variazione_totale_positivi")
+    }
+
+
+def test_harmonize_keeps_unknown_columns():
+    df = pd.DataFrame(
+        {
+            "data": ["2020-02-24T18:00:00"],
+            "stato": ["ITA"],
+            "totale_attualmente_positivi": [5],
+            "campo_nuovo": [7],
+        }
+    )
+    out = PatcherItaly.harmonize(df, PatcherItaly.columns_country)
+
+    assert list(out.columns) == list(PatcherItaly.columns_country) + ["campo_nuovo"]
+    assert out["totale_positivi"].item() == 5
+    assert out["campo_nuovo"].item() == 7
+    assert np.isnan(out["tamponi"].item())
+
+
+def test_harmonize_headers_keeps_unknown_columns(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "repo_italy_dir", str(tmp_path))
+    synthetic.write_dpc(str(tmp_path), days=2, regions=2, schemas=("2020-02",))
+
+    dir = tmp_path / "dati-regioni"
+    filename = sorted(dir.glob("*.csv"))[0]
+    df = pd.read_csv(filename)
+    df["campo_nuovo"] = np.arange(len(df))
+    df.to_csv(filename, index=False)
+
+    PatcherItaly.harmonize_headers()
+
+    out = pd.read_csv(filename)
+    columns = list(PatcherItaly.columns_region)
+    assert list(out.columns) == columns + ["campo_nuovo"]
+    assert list(out["campo_nuovo"]) == list(range(len(df)))
+    assert list(out["totale_positivi"]) == list(df["totale_attualmente_positivi"])
+
+
+def test_mixed_headers_mount_to_the_same_values(loader, monkeypatch, tmp_path):
+    schemas = ("2020-02", "2020-03", "2020-04")
+    synthetic.write_dpc(str(tmp_path / "mixed"), days=12, regions=5, schemas=schemas)
+    synthetic.write_dpc(str(tmp_path / "current"), days=12, regions=5)
+
+    reference = mount(loader, tmp_path / "current", monkeypatch)
+    mixed = mount(loader, tmp_path / "mixed", monkeypatch)
+
+    monkeypatch.setattr(config, "repo_italy_dir", str(tmp_path / "mixed"))
+    PatcherItaly.harmonize_headers()
+    patched = mount(loader, tmp_path / "mixed", monkeypatch)
+
+    for field, values in reference.items():
+        assert np.array_equal(mixed[field], values, equal_nan=True)
+        assert np.array_equal(patched[field], values, equal_nan=True)
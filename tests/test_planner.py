@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import functools
+
+import numpy as np
+import pytest
+
+from covid19 import config, synthetic
+from covid19.loader import Loader
+from covid19.planner import plan, run_planned_loaders
+
+
+@pytest.fixture
+def loader(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "repo_italy_dir", str(tmp_path / "italy"))
+    synthetic.write_dpc(str(tmp_path / "italy"), days=10, regions=4)
+    loader = Loader.factory("italy", False, False)
+    loader.unmount()
+    yield loader
+    loader.unmount()
+
+
+def test_plan_one_query_per_dataset(loader):
+    regions = synthetic.dpc_regions[:3]
+    fields = ["totale_casi", "incremento_tamponi", "frazione_tamponi_positivi"]
+    loader_fcts = [
+        functools.partial(loader.run, field, region=region)
+        for field in fields
+        for region in regions
+    ]
+    loader_fcts.append(functools.partial(loader.run, "totale_casi"))
+
+    planned_fcts, dispatch = plan(loader_fcts)
+
+    assert len(planned_fcts) == 2
+    assert planned_fcts[0].func == loader.run_batch
+    assert planned_fcts[0].args == (fields, "region", regions)
+    assert dispatch[4] == (0, 1, 1)
+    assert dispatch[-1] == (1, None, None)
+
+
+def test_planned_loaders_match_ordinary_queries(loader, monkeypatch):
+    scans = []
+    fetch = loader.fetch_fields_batch
+    monkeypatch.setattr(
+        loader,
+        "fetch_fields_batch",
+        lambda fields, *args: scans.append(fields) or fetch(fields, *args),
+    )
+
+    regions = synthetic.dpc_regions[:4]
+    loader_fcts = [
+        functools.partial(loader.run, "totale_casi", region=regions[0]),
+        functools.partial(loader.run, "incremento_totale_casi", region=regions[1:]),
+        functools.partial(loader.run, "percentuale_tamponi_positivi", region=regions),
+        functools.partial(loader.run, "terapia_intensiva"),
+    ]
+
+    data, _ = run_planned_loaders(loader_fcts, max_workers=1)
+
+    assert len(scans) == 1
+    for (time, values), loader_fct in zip(data, loader_fcts):
+        reference_time, reference = loader_fct()
+        assert list(time) == list(reference_time)
+        assert np.allclose(values, np.asarray(reference, dtype=float))
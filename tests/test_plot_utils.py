@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from covid19 import plot_utils  # noqa: E402
+from covid19.plot_utils import compute_cdf  # noqa: E402
+
+
+def test_compute_cdf_uniform():
+    values, cdf = compute_cdf(np.arange(1.0, 5.0), number_of_bins=3)
+
+    assert np.allclose(values, [1.0, 2.0, 3.0, 4.0])
+    assert np.allclose(cdf, [0.25, 0.5, 0.75, 1.0])
+
+
+def test_compute_cdf_nan_and_threshold():
+    data = np.array([np.nan, 0.0, 1.0, 2.0, 3.0, np.nan])
+    values, cdf = compute_cdf(data, number_of_bins=2, threshold=0.5)
+
+    assert np.allclose(values, [1.0, 2.0, 3.0])
+    assert np.allclose(cdf, [1 / 3, 2 / 3, 1.0])
+
+
+def test_compute_cdf_weighted():
+    data = np.array([[3.0, 1.0], [2.0, 1.0]])
+    weights = np.array([[1.0, 2.0], [3.0, 2.0]])
+    values, cdf = compute_cdf(data, number_of_bins=2, weights=weights)
+
+    assert np.allclose(values, [1.0, 2.0, 3.0])
+    assert np.allclose(cdf, [0.5, 7 / 8, 1.0])
+
+
+def test_compute_cdf_weighted_matches_repeated_samples():
+    data = np.array([0.5, 1.5, 2.5])
+    weights = np.array([2.0, 1.0, 3.0])
+    _, weighted = compute_cdf(data, number_of_bins=10, weights=weights)
+    _, repeated = compute_cdf(np.repeat(data, [2, 1, 3]), number_of_bins=10)
+
+    assert np.allclose(weighted, repeated)
+
+
+def test_compute_cdf_exact_steps():
+    values, cdf = compute_cdf(np.array([2.0, 1.0, 2.0, 4.0]), exact=True)
+
+    # a vertical step at each distinct value, from the CDF just below it
+    assert np.allclose(values, [1.0, 1.0, 2.0, 2.0, 4.0, 4.0])
+    assert np.allclose(cdf, [0.0, 0.25, 0.25, 0.75, 0.75, 1.0])
+
+
+def test_compute_cdf_exact_weighted():
+    data = np.array([1.0, 2.0, 2.0])
+    weights = np.array([2.0, 1.0, 1.0])
+    values, cdf = compute_cdf(data, weights=weights, exact=True)
+
+    assert np.allclose(values, [1.0, 1.0, 2.0, 2.0])
+    assert np.allclose(cdf, [0.0, 0.5, 0.5, 1.0])
+
+
+def test_compute_cdf_no_samples():
+    with pytest.raises(RuntimeError):
+        compute_cdf(np.array([np.nan, 1.0]), threshold=2.0)
+
+
+def test_compute_cdf_zero_weights():
+    with pytest.raises(RuntimeError):
+        compute_cdf(np.array([1.0, 2.0]), weights=np.zeros(2))
+
+
+def test_downsampled_lines_follow_the_output_dpi(monkeypatch, tmp_path):
+    x = np.arange(20000.0)
+    fig, ax = plt.subplots(figsize=(6, 4), dpi=100)
+    (line,) = plot_utils.make_lineplot(x, np.sin(x / 50.0), ax, downsample="lttb")
+    drawn = len(line.get_xdata())
+    assert drawn == int(ax.bbox.width)
+
+    points = []
+    downsample_series = plot_utils.downsample_series
+
+    def spy(*args, **kwargs):
+        out = downsample_series(*args, **kwargs)
+        points.append(len(out[0]))
+        return out
+
+    monkeypatch.setattr(plot_utils, "downsample_series", spy)
+    profile = {"dpi": 300, "format": "png", "rasterize_threshold": None}
+    plot_utils.save_figure(fig, str(tmp_path / "figure"), profile)
+
+    assert points == [int(ax.bbox.width * 3)]
+    assert len(line.get_xdata()) == drawn
+    plt.close(fig)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from covid19 import config, metrics, synthetic, timing
+from covid19.loader import Loader
+from covid19.renderer import BatchRenderer
+from covid19.specs import FigureSpec
+
+
+@pytest.fixture
+def collect_metrics(monkeypatch, tmp_path):
+    monkeypatch.setattr(metrics, "enabled", True)
+    monkeypatch.setattr(metrics, "filename", str(tmp_path / "run.prom"))
+    monkeypatch.setattr(metrics, "output_format", "prometheus")
+    monkeypatch.setattr(metrics, "values", {})
+    monkeypatch.setattr(timing, "enabled", True)
+    monkeypatch.setattr(timing, "listeners", [metrics.record_stage])
+    monkeypatch.setattr(timing, "totals", {})
+    return tmp_path / "run.prom"
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_render_metrics(collect_metrics, monkeypatch, tmp_path, processes):
+    monkeypatch.setattr(config, "repo_italy_dir", str(tmp_path / "italy"))
+    synthetic.write_dpc(str(tmp_path / "italy"), days=10, regions=3)
+    Loader.factory("italy", False, False).unmount()
+
+    specs = [
+        FigureSpec.from_dict(
+            {
+                "save_dest": str(tmp_path / "figures" / f"figure_{index}"),
+                "profile": "web",
+                "series": [
+                    {"field": "totale_casi", "region": synthetic.dpc_regions[0]}
+                ],
+            }
+        )
+        for index in range(3)
+    ]
+    BatchRenderer(specs, processes=processes).run()
+    Loader.factory("italy", False, False).unmount()
+
+    metrics.write()
+    lines = collect_metrics.read_text().splitlines()
+    samples = {
+        line.split("{")[0]: float(line.split()[-1])
+        for line in lines
+        if not line.startswith("#")
+    }
+
+    sizes = sum(path.stat().st_size for path in (tmp_path / "figures").iterdir())
+    assert samples["covid19_figures_rendered"] == 3
+    assert samples["covid19_figures_save_seconds"] > 0
+    assert samples["covid19_figures_bytes"] == sizes
+    assert timing.totals["savefig"][0] == 3
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from covid19 import synthetic
+
+
+def test_generate_refuses_to_replace_other_data(tmp_path):
+    root_dir = tmp_path / "italy"
+    root_dir.mkdir()
+    (root_dir / "README.md").write_text("The real data.")
+
+    with pytest.raises(RuntimeError):
+        synthetic.generate("italy", str(root_dir), days=3, regions=2)
+    assert os.listdir(root_dir) == ["README.md"]
+
+    synthetic.generate("italy", str(root_dir), days=3, regions=2, force=True)
+    assert not (root_dir / "README.md").exists()
+
+
+def test_generate_replaces_synthetic_data(tmp_path):
+    root_dir = tmp_path / "world"
+    root_dir.mkdir()
+
+    for days in (5, 3):
+        synthetic.generate("world", str(root_dir), days=days, countries=5)
+
+        reports = root_dir / "csse_covid_19_data" / "csse_covid_19_daily_reports"
+        assert len(list(reports.glob("*.csv"))) == days
+        assert (root_dir / synthetic.marker).is_file()